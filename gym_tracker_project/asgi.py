@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+The live coach feed (workouts.views.coach_feed_view) is an async streaming
+view and needs an ASGI server to stream, e.g.:
+    uvicorn gym_tracker_project.asgi:application
+Under WSGI it answers 204 and the coach dashboard polls for new workouts.
 """
 
 import os
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # gym_tracker_project/settings.py
 
@@ -19,16 +20,22 @@ import os
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Quick-start development settings - unsuitable for production
+# Settings profile: development by default, GYM_TRACKER_ENV=production switches on the
+# production block at the end of this file (validated at startup by workouts/checks.py).
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+ENVIRONMENT = os.environ.get('GYM_TRACKER_ENV', 'development')
+PRODUCTION = ENVIRONMENT == 'production'
+TESTING = sys.argv[1:2] == ['test']  # manage.py test
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-m4ase!_7(39gz_ya32g#9*e3o&5hu!oxj@+@x=5*@i$yg(jbg!'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', 'django-insecure-m4ase!_7(39gz_ya32g#9*e3o&5hu!oxj@+@x=5*@i$yg(jbg!'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
 
 # Application definition
 
@@ -52,11 +59,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'workouts.middleware.RequestLogMiddleware',  # First, so its timing covers the whole stack
+    'workouts.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'workouts.middleware.ProfilingMiddleware',  # Needs request.user
     'django.contrib.messages.middleware.MessageMiddleware',
     # 'workouts.middleware.TimezoneMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -182,15 +192,152 @@ CACHES = {
 }
 
 # SESSION ENGINE Configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+SESSION_ENGINE = 'workouts.session_store'  # The cache backend, plus hit/miss counts for /metrics
 SESSION_CACHE_ALIAS = 'default'  # Tells the session engine to use the cache named 'default'
 
 AUTHENTICATION_BACKENDS = [
     # Needed to login by username in Django admin, regardless of `allauth`
-    'django.contrib.auth.backends.ModelBackend',
+    # (the workouts subclasses load request.user together with its profile)
+    'workouts.auth_backends.ProfileModelBackend',
 
     # `allauth` specific authentication methods, e.g. login by e-mail
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'workouts.auth_backends.ProfileAuthenticationBackend',
 ]
 
 SITE_ID = 1
+
+# Background jobs (workouts/jobs.py) - run the worker with: python manage.py run_jobs
+BACKGROUND_JOBS_EAGER = False  # True runs jobs inline at enqueue time (handy for local testing)
+EXPORTS_ROOT = BASE_DIR / 'exports'  # CSV exports written by the export_workouts_csv job
+BACKGROUND_JOBS_RETENTION_DAYS = 7  # Finished jobs (and their export files) are purged by run_jobs after this
+
+# Archival of cold workout history (workouts/archive.py) - run with: python manage.py archive_workouts
+ARCHIVE_AFTER_DAYS = 730  # Whole months older than this move to compressed per-user archive files
+ARCHIVE_ROOT = BASE_DIR / 'archive'
+
+# Email - printed to the console locally; weekly digests (workouts/digest.py) are sent with:
+# python manage.py send_weekly_digests
+EMAIL_BACKEND = os.environ.get('DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'  # Used by the file backend (django.core.mail.backends.filebased.EmailBackend)
+DEFAULT_FROM_EMAIL = os.environ.get('DJANGO_DEFAULT_FROM_EMAIL', 'Gym Tracker <noreply@localhost>')
+# Unhandled 500s are mailed here when DEBUG is off (comma-separated addresses)
+ADMINS = [(address, address) for address in os.environ.get('DJANGO_ADMINS', '').split(',') if address]
+WEEKLY_DIGEST_CHUNK_SIZE = 500  # Users summarized and sent per chunk (and per email connection)
+
+# Slow-query log (workouts/slow_queries.py) - report with: python manage.py slow_query_report
+SLOW_QUERY_THRESHOLD_MS = 100  # Statements at least this slow are logged with their query plan; None disables
+SLOW_QUERY_LOG_FILE = BASE_DIR / 'logs' / 'slow_queries.jsonl'  # Rotated at 5 MB, 5 files kept
+
+# Logging - structured JSON lines; request threads only enqueue, a listener thread writes (workouts/logging_utils.py)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'require_debug_false': {'()': 'django.utils.log.RequireDebugFalse'},
+        'request_context': {'()': 'workouts.logging_utils.RequestContextFilter'},
+        'rate_limit': {'()': 'workouts.logging_utils.RateLimitFilter', 'period': 60, 'burst': 5},
+    },
+    'formatters': {
+        'json': {'()': 'workouts.logging_utils.JsonFormatter'},
+    },
+    'handlers': {
+        'json_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'workouts.logging_utils.QueueListenerHandler',
+            'handlers': ['json_console'],
+            'filters': ['request_context', 'rate_limit'],
+        },
+        'slow_query_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'json',
+        },
+        'mail_admins': {
+            'class': 'django.utils.log.AdminEmailHandler',
+            'level': 'ERROR',
+            'filters': ['require_debug_false'],
+        },
+        'slow_query_queue': {
+            '()': 'workouts.logging_utils.QueueListenerHandler',
+            'handlers': ['slow_query_file'],
+            'filters': ['request_context'],  # Not rate-limited: every slow query is kept
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': 'INFO',
+    },
+    'loggers': {
+        'django': {'handlers': ['queue'], 'level': 'INFO', 'propagate': False},
+        'django.request': {'handlers': ['queue', 'mail_admins'], 'level': 'INFO', 'propagate': False},
+        'django.server': {'level': 'WARNING', 'propagate': True},  # RequestLogMiddleware replaces the access log
+        'workouts.request': {'level': 'INFO'},
+        'workouts.slow_queries': {'handlers': ['slow_query_queue'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+if TESTING:
+    # Keep the handler chain (filters, queues) but don't write test runs to the console or log files
+    LOGGING['handlers']['json_console'] = {'class': 'logging.NullHandler'}
+    LOGGING['handlers']['slow_query_file'] = {'class': 'logging.NullHandler'}
+
+# Metrics (workouts/metrics.py) - Prometheus text format at /metrics
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']  # Scrapers allowed without a staff login
+METRICS_MULTIPROCESS_DIR = None  # Shared directory when running several worker processes; None = this process only
+
+# On-demand request profiling (workouts/profiling.py) - staff add ?_profile=1, or issue a token for a user
+# with: python manage.py profile_token <username>. Profiles are listed in the admin.
+PROFILE_TOKEN_MAX_AGE = 24 * 60 * 60  # Seconds a profile token stays valid
+
+# --- Production profile (GYM_TRACKER_ENV=production) ---
+if PRODUCTION:
+    # Compiled templates are kept in memory; APP_DIRS must be off when loaders are listed
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+    # Persistent database connections, checked before reuse
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DJANGO_CONN_MAX_AGE', 60))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+    # Brotli/gzip compression (skips Server-Sent Events), before anything that touches the body
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                      'workouts.middleware.CompressionMiddleware')
+
+    # Hashed static file names, so they can be cached forever (run collectstatic on deploy)
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'},
+    }
+
+    # Sessions and cookies
+    SESSION_COOKIE_SECURE = True
+    SESSION_COOKIE_HTTPONLY = True
+    SESSION_COOKIE_SAMESITE = 'Lax'
+    SESSION_COOKIE_AGE = 14 * 24 * 60 * 60
+    SESSION_SAVE_EVERY_REQUEST = False  # Only write sessions that changed
+    CSRF_COOKIE_SECURE = True
+
+    # Outgoing email over SMTP unless DJANGO_EMAIL_BACKEND says otherwise
+    EMAIL_BACKEND = os.environ.get('DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+    EMAIL_HOST = os.environ.get('DJANGO_EMAIL_HOST', 'localhost')
+    EMAIL_PORT = int(os.environ.get('DJANGO_EMAIL_PORT', 587))
+    EMAIL_HOST_USER = os.environ.get('DJANGO_EMAIL_HOST_USER', '')
+    EMAIL_HOST_PASSWORD = os.environ.get('DJANGO_EMAIL_HOST_PASSWORD', '')
+    EMAIL_USE_TLS = os.environ.get('DJANGO_EMAIL_USE_TLS', '1') == '1'
+
+    # A shared cache, so sessions and cached pages survive across worker processes
+    if os.environ.get('REDIS_URL'):
+        CACHES['default'] = {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
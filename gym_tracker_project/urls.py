@@ -22,6 +22,8 @@ urlpatterns = [
     path('', workout_views.home_view, name='home'),
     path('admin/', admin.site.urls),
     path('workouts/', include('workouts.urls')),
+    path('api/v1/', include('workouts.api_urls')),
+    path('metrics', workout_views.metrics_view, name='metrics'),
     path('accounts/signup/', workout_views.signup_view, name='signup'),
     path('accounts/', include('django.contrib.auth.urls')),
     path('accounts/', include('allauth.urls')),
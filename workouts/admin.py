@@ -1,8 +1,305 @@
 # workouts/admin.py
+import csv
+
 from django.contrib import admin
-from .models import Exercise, WorkoutSession, WorkoutLog, UserProfile
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html, format_html_join
+from django.utils.translation import gettext as _
+
+from .models import (Exercise, WorkoutSession, WorkoutLog, UserProfile, CoachingRelationship, BackgroundJob,
+                     ArchivedMonth, RequestProfile, Routine, RoutineItem, WeeklyDigestRun)
+
+APPROXIMATE_COUNT_THRESHOLD = 10000  # Below this the exact COUNT(*) is cheap enough
+CSV_EXPORT_CHUNK_SIZE = 2000
+
+
+# --- Pagination without COUNT(*) on large tables ---
+def estimated_row_count(model, using='default'):
+    """Returns the database's row estimate for a model's table, or None if unavailable."""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s", [model._meta.db_table]
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f"SELECT MAX(rowid) FROM {table}")  # Walks the rowid b-tree, not the table
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:  # PostgreSQL reports -1 before the first ANALYZE
+        return None
+    return int(row[0])
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator for huge changelists: an unfiltered list uses the table's row
+    estimate instead of COUNT(*). Filtered/searched lists are counted exactly,
+    which stays cheap as long as the filter is selective and indexed.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate > APPROXIMATE_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+# --- Streaming CSV export action ---
+class _Echo:
+    """File-like object whose write() just returns the line, for csv.writer streaming."""
+
+    def write(self, value):
+        return value
+
+
+def csv_export_action(fields, description="Export selected rows to CSV"):
+    """
+    Builds an admin action that streams the selected rows as CSV.
+    `fields` maps column headers to values() lookups, so rows are read in
+    chunks straight from the database without building model instances.
+    """
+    headers, lookups = list(fields.keys()), list(fields.values())
+
+    def export_csv(modeladmin, request, queryset):
+        writer = csv.writer(_Echo())
+        rows = queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=CSV_EXPORT_CHUNK_SIZE)
+
+        def stream():
+            yield writer.writerow(headers)
+            for row in rows:
+                yield writer.writerow(['' if value is None else value for value in row])
+
+        model_name = queryset.model._meta.model_name
+        filename = f"{model_name}-{timezone.now().strftime('%Y%m%d%H%M%S')}.csv"
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    export_csv.short_description = description
+    return export_csv
+
+
+# --- Filtering by a huge related table ---
+class RawIdListFilter(admin.FieldListFilter):
+    """
+    Foreign-key filter for tables too big to list in the sidebar (users):
+    an id box with the same lookup popup as raw_id_fields, so rendering
+    the filter never reads the related table.
+    """
+    template = 'admin/workouts/raw_id_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.related_model = field.remote_field.model
+        self.value = self.used_parameters.get(self.lookup_kwarg, [''])[-1]
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def lookup_url(self):
+        opts = self.related_model._meta
+        return f"{reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist')}?_to_field={self.field.target_field.name}"
+
+    def choices(self, changelist):
+        yield {
+            'selected': not self.value,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': _('All'),
+        }
+        # The form's GET replaces the query string: carry the other filters, search and ordering along
+        yield {
+            'form': True,
+            'hidden_params': [
+                (name, value)
+                for name, values in changelist.filter_params.items() if name not in (self.lookup_kwarg, PAGE_VAR)
+                for value in values
+            ],
+        }
+
+
+# --- Model Admins ---
+@admin.register(Exercise)
+class ExerciseAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user')
+    list_select_related = ('user',)
+    list_filter = (('user', admin.EmptyFieldListFilter),)  # Global vs. custom exercises
+    search_fields = ('name',)  # Required for autocomplete on WorkoutLog.exercise
+    raw_id_fields = ('user',)
+
+
+@admin.register(WorkoutSession)
+class WorkoutSessionAdmin(admin.ModelAdmin):
+    list_display = ('date', 'user', 'created_at')
+    list_select_related = ('user',)
+    date_hierarchy = 'date'  # Backed by session_date_idx
+    list_filter = (('user', RawIdListFilter),)
+    ordering = ('-date', '-pk')
+    autocomplete_fields = ('user',)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False  # Skips the second, unfiltered COUNT(*)
+    actions = [csv_export_action({
+        'id': 'pk',
+        'user': 'user__username',
+        'date': 'date',
+        'created_at': 'created_at',
+        'notes': 'notes',
+    })]
+
+
+@admin.register(WorkoutLog)
+class WorkoutLogAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'session_date', 'session_user')
+    list_select_related = ('exercise', 'session__user')
+    date_hierarchy = 'session__date'
+    list_filter = ('exercise', ('session__user', RawIdListFilter))
+    raw_id_fields = ('session',)  # A select over every session would be unusable
+    autocomplete_fields = ('exercise',)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    actions = [csv_export_action({
+        'id': 'pk',
+        'user': 'session__user__username',
+        'date': 'session__date',
+        'exercise': 'exercise__name',
+        'sets': 'sets',
+        'reps': 'reps',
+        'weight_kg': 'weight',
+        'duration': 'duration',
+        'notes': 'notes',
+    })]
+
+    @admin.display(description='Date', ordering='session__date')
+    def session_date(self, obj):
+        return obj.session.date
+
+    @admin.display(description='User', ordering='session__user__username')
+    def session_user(self, obj):
+        return obj.session.user
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'timezone', 'is_coach')
+    list_select_related = ('user',)
+    list_filter = ('is_coach',)
+    search_fields = ('user__username',)
+    autocomplete_fields = ('user',)
+
+
+@admin.register(CoachingRelationship)
+class CoachingRelationshipAdmin(admin.ModelAdmin):
+    list_display = ('coach', 'athlete', 'created_at')
+    list_select_related = ('coach', 'athlete')
+    autocomplete_fields = ('coach', 'athlete')
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'user', 'status', 'progress', 'attempts', 'created_at', 'finished_at')
+    list_select_related = ('user',)
+    list_filter = ('status', 'task')
+    raw_id_fields = ('user',)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(ArchivedMonth)
+class ArchivedMonthAdmin(admin.ModelAdmin):
+    list_display = ('user', 'year', 'month', 'session_count', 'log_count', 'size_bytes', 'archived_at')
+    list_select_related = ('user',)
+    list_filter = ('year',)
+    raw_id_fields = ('user',)
+    readonly_fields = ('filename', 'session_count', 'log_count', 'size_bytes', 'archived_at')
+
+
+@admin.register(WeeklyDigestRun)
+class WeeklyDigestRunAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'sent_count', 'skipped_count', 'started_at', 'finished_at')
+    readonly_fields = ('week_start', 'started_at', 'finished_at', 'sent_count', 'skipped_count')
+
+
+class RoutineItemInline(admin.TabularInline):
+    model = RoutineItem
+    autocomplete_fields = ('exercise',)
+    extra = 0
+
+
+@admin.register(Routine)
+class RoutineAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'updated_at')
+    list_select_related = ('user',)
+    search_fields = ('name', 'user__username')
+    autocomplete_fields = ('user',)
+    inlines = [RoutineItemInline]
+
+
+def _table(headers, rows):
+    """Renders a read-only HTML table for profile details."""
+    return format_html(
+        '<table><thead><tr>{}</tr></thead><tbody>{}</tbody></table>',
+        format_html_join('', '<th>{}</th>', ((header,) for header in headers)),
+        format_html_join('', '<tr>{}</tr>', (
+            (format_html_join('', '<td>{}</td>', ((cell,) for cell in row)),) for row in rows
+        )),
+    )
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'user', 'view_name', 'status_code', 'duration_ms', 'query_count', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('view_name',)
+    search_fields = ('path',)
+    date_hierarchy = 'created_at'
+    fields = ('user', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'query_count', 'query_time_ms',
+              'created_at', 'top_functions_table', 'slowest_queries_table', 'templates_table')
+    readonly_fields = fields
+    actions = ['download_stats']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Top functions (by cumulative time)')
+    def top_functions_table(self, obj):
+        return _table(
+            ('Function', 'Calls', 'Own ms', 'Cumulative ms'),
+            ((row['function'], row['ncalls'], row['tottime_ms'], row['cumtime_ms']) for row in obj.top_functions),
+        )
+
+    @admin.display(description='Queries (slowest first)')
+    def slowest_queries_table(self, obj):
+        queries = sorted(enumerate(obj.queries, 1), key=lambda item: item[1]['time_ms'], reverse=True)
+        return _table(('#', 'ms', 'SQL'), ((number, query['time_ms'], query['sql']) for number, query in queries))
+
+    @admin.display(description='Templates (render order)')
+    def templates_table(self, obj):
+        return _table(
+            ('Template', 'ms'),
+            (('\u2003' * entry['depth'] + entry['name'], entry['time_ms']) for entry in obj.templates),
+        )
 
-admin.site.register(Exercise)
-admin.site.register(WorkoutSession)
-admin.site.register(WorkoutLog)
-admin.site.register(UserProfile)
\ No newline at end of file
+    @admin.action(description="Download cProfile stats (.prof) of one profile")
+    def download_stats(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Select exactly one profile to download.", level='warning')
+            return None
+        profile = queryset.get()
+        response = HttpResponse(bytes(profile.stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="request-profile-{profile.pk}.prof"'
+        return response
@@ -0,0 +1,387 @@
+# workouts/analytics.py
+"""
+Vectorized training-load analytics.
+
+A user's complete (sets, reps, weight) history is loaded ONCE into columnar
+NumPy arrays and every metric on the Insights page is derived from those
+arrays in bulk, instead of looping over model instances with Decimal math.
+
+Importing this module loads NumPy (~80 ms), so the rest of the app imports
+it inside the functions that use it: web workers start without NumPy and
+only pay for it on the first chart, insights job or archive run.
+"""
+import datetime
+from dataclasses import dataclass
+
+import numpy as np
+from django.db.models import Count, Max, Min
+
+from .models import Exercise, ExerciseDayRollup, WorkoutLog
+
+# Rolling windows (in days) used for the acute:chronic workload ratio
+ACUTE_WINDOW_DAYS = 7
+CHRONIC_WINDOW_DAYS = 28
+
+# Intensity zones as a percentage of the exercise's best estimated 1RM
+INTENSITY_ZONE_EDGES = [60, 70, 80, 90]
+INTENSITY_ZONE_LABELS = ['< 60%', '60-70%', '70-80%', '80-90%', '90%+']
+
+
+@dataclass
+class TrainingArrays:
+    """
+    Columnar view of a user's training, sorted by date: one row per
+    WorkoutLog, plus one row per archived (exercise, day) rollup carrying
+    that day's totals. `detailed` is False for rollup rows, whose sets/reps
+    are not per-set values.
+    """
+    dates: np.ndarray         # datetime64[D]
+    exercise_ids: np.ndarray  # int64
+    sets: np.ndarray          # float64
+    reps: np.ndarray          # float64
+    weight: np.ndarray        # float64 (day's heaviest weight for rollup rows)
+    volume: np.ndarray        # float64, sets * reps * weight
+    e1rm: np.ndarray          # float64, Epley estimate
+    log_counts: np.ndarray    # int64, logs represented by each row
+    detailed: np.ndarray      # bool
+    exercise_names: dict      # {exercise_id: name}
+
+    def __len__(self):
+        return len(self.dates)
+
+
+def estimate_1rm(weight, reps):
+    """Epley estimate: weight * (1 + reps / 30). A single rep is the lift itself."""
+    weight = np.asarray(weight, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.float64)
+    return np.where(reps <= 1, weight, weight * (1.0 + reps / 30.0))
+
+
+def load_training_arrays(user, start_date=None, end_date=None):
+    """
+    Loads all complete logs for a user, plus rollups of archived days, into
+    a TrainingArrays (three queries, including the exercise names).
+    """
+    logs = WorkoutLog.objects.filter(
+        session__user=user,
+        sets__isnull=False,
+        reps__isnull=False,
+        weight__isnull=False,
+    )
+    rollups = ExerciseDayRollup.objects.filter(user=user, complete_logs__gt=0)
+    if start_date is not None:
+        logs = logs.filter(session__date__gte=start_date)
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date is not None:
+        logs = logs.filter(session__date__lte=end_date)
+        rollups = rollups.filter(date__lte=end_date)
+
+    log_rows = list(
+        logs.order_by('session__date', 'id')
+        .values_list('session__date', 'exercise_id', 'sets', 'reps', 'weight')
+    )
+    rollup_rows = list(
+        rollups.order_by('date', 'exercise_id')
+        .values_list('date', 'exercise_id', 'max_weight', 'volume', 'best_e1rm', 'complete_logs')
+    )
+    if not log_rows and not rollup_rows:
+        return TrainingArrays(
+            dates=np.array([], dtype='datetime64[D]'),
+            exercise_ids=np.array([], dtype=np.int64),
+            sets=np.array([], dtype=np.float64),
+            reps=np.array([], dtype=np.float64),
+            weight=np.array([], dtype=np.float64),
+            volume=np.array([], dtype=np.float64),
+            e1rm=np.array([], dtype=np.float64),
+            log_counts=np.array([], dtype=np.int64),
+            detailed=np.array([], dtype=bool),
+            exercise_names={},
+        )
+
+    # Detailed logs
+    dates, exercise_ids, sets, reps, weight = zip(*log_rows) if log_rows else ((),) * 5
+    sets = np.array(sets, dtype=np.float64)
+    reps = np.array(reps, dtype=np.float64)
+    weight = np.array(weight, dtype=np.float64)  # Decimal -> float happens here, once
+    parts = [(
+        np.array(dates, dtype='datetime64[D]'), np.array(exercise_ids, dtype=np.int64),
+        sets, reps, weight, sets * reps * weight, estimate_1rm(weight, reps),
+        np.ones(len(log_rows), dtype=np.int64), np.ones(len(log_rows), dtype=bool),
+    )]
+
+    # Archived day rollups
+    if rollup_rows:
+        r_dates, r_exercise_ids, r_weight, r_volume, r_e1rm, r_counts = zip(*rollup_rows)
+        n = len(rollup_rows)
+        parts.append((
+            np.array(r_dates, dtype='datetime64[D]'), np.array(r_exercise_ids, dtype=np.int64),
+            np.zeros(n), np.zeros(n), np.array(r_weight, dtype=np.float64),
+            np.array(r_volume, dtype=np.float64), np.array(r_e1rm, dtype=np.float64),
+            np.array(r_counts, dtype=np.int64), np.zeros(n, dtype=bool),
+        ))
+
+    columns = [np.concatenate(column) for column in zip(*parts)]
+    order = np.argsort(columns[0], kind='stable')
+    columns = [column[order] for column in columns]
+    names = dict(
+        Exercise.objects.filter(pk__in=np.unique(columns[1]).tolist()).values_list('id', 'name')
+    )
+    return TrainingArrays(*columns, exercise_names=names)
+
+
+def daily_volume(arrays, end_date=None):
+    """
+    Returns (days, volume) where `days` is every calendar day from the first
+    log up to `end_date` (default: last log) and `volume` is the total volume
+    lifted on each day (0 on rest days).
+    """
+    if not len(arrays):
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64)
+
+    first_day = arrays.dates[0]
+    last_day = np.datetime64(end_date, 'D') if end_date is not None else arrays.dates[-1]
+    last_day = max(last_day, arrays.dates[-1])
+    offsets = (arrays.dates - first_day).astype(np.int64)
+    n_days = int((last_day - first_day).astype(np.int64)) + 1
+
+    volume = np.bincount(offsets, weights=arrays.volume, minlength=n_days)
+    days = first_day + np.arange(n_days)
+    return days, volume
+
+
+def rolling_sum(values, window):
+    """Trailing rolling sum over `window` entries (shorter at the start)."""
+    cumulative = np.cumsum(np.concatenate(([0.0], values)))
+    upper = np.arange(1, len(values) + 1)
+    lower = np.maximum(upper - window, 0)
+    return cumulative[upper] - cumulative[lower]
+
+
+def acute_chronic_ratio(volume, acute=ACUTE_WINDOW_DAYS, chronic=CHRONIC_WINDOW_DAYS):
+    """
+    Acute:chronic workload ratio per day, using rolling-average volume.
+    Days without a full chronic window (or with zero chronic load) are NaN.
+    """
+    acute_avg = rolling_sum(volume, acute) / acute
+    chronic_avg = rolling_sum(volume, chronic) / chronic
+    ratio = np.full(len(volume), np.nan)
+    valid = (np.arange(len(volume)) >= chronic - 1) & (chronic_avg > 0)
+    ratio[valid] = acute_avg[valid] / chronic_avg[valid]
+    return ratio
+
+
+def intensity_distribution(arrays):
+    """
+    Share of working sets in each intensity zone, where intensity is the
+    log's weight relative to the best e1RM ever recorded for that exercise.
+    Only detailed logs are binned (archived rollups have no per-set weights),
+    but their e1RMs still count towards the best.
+    Returns a list of (label, sets, percent).
+    """
+    if not arrays.detailed.any():
+        return [(label, 0, 0.0) for label in INTENSITY_ZONE_LABELS]
+
+    # Best e1RM per exercise, broadcast back onto every row
+    codes, inverse = np.unique(arrays.exercise_ids, return_inverse=True)
+    best = np.zeros(len(codes))
+    np.maximum.at(best, inverse, arrays.e1rm)
+    best = best[inverse][arrays.detailed]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        intensity = np.where(best > 0, arrays.weight[arrays.detailed] / best * 100.0, 0.0)
+
+    zones = np.digitize(intensity, INTENSITY_ZONE_EDGES)
+    sets_per_zone = np.bincount(zones, weights=arrays.sets[arrays.detailed], minlength=len(INTENSITY_ZONE_LABELS))
+    total = sets_per_zone.sum()
+    return [
+        (label, int(n_sets), round(float(n_sets / total * 100.0), 1) if total else 0.0)
+        for label, n_sets in zip(INTENSITY_ZONE_LABELS, sets_per_zone)
+    ]
+
+
+def daily_best_e1rm(arrays):
+    """
+    Best e1RM per (exercise, day). Returns (exercise_ids, dates, e1rm) arrays,
+    sorted by exercise then date.
+    """
+    if not len(arrays):
+        return (np.array([], dtype=np.int64), np.array([], dtype='datetime64[D]'),
+                np.array([], dtype=np.float64))
+
+    day_numbers = arrays.dates.astype(np.int64)
+    keys = np.stack([arrays.exercise_ids, day_numbers], axis=1)
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    best = np.zeros(len(unique_keys))
+    np.maximum.at(best, inverse.ravel(), arrays.e1rm)
+    return unique_keys[:, 0], unique_keys[:, 1].astype('datetime64[D]'), best
+
+
+def progression_slopes(exercise_ids, dates, values):
+    """
+    Least-squares slope of `values` over time for every exercise at once,
+    in units per week. Exercises with fewer than two training days get None.
+    Returns {exercise_id: slope}.
+    """
+    if not len(exercise_ids):
+        return {}
+
+    codes, group = np.unique(exercise_ids, return_inverse=True)
+    x = (dates - dates.min()).astype(np.float64) / 7.0  # weeks
+    y = values
+
+    n = np.bincount(group).astype(np.float64)
+    sum_x = np.bincount(group, weights=x)
+    sum_y = np.bincount(group, weights=y)
+    sum_xx = np.bincount(group, weights=x * x)
+    sum_xy = np.bincount(group, weights=x * y)
+
+    denominator = n * sum_xx - sum_x ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = (n * sum_xy - sum_x * sum_y) / denominator
+
+    return {
+        int(code): (round(float(slope), 2) if count >= 2 and np.isfinite(slope) else None)
+        for code, slope, count in zip(codes, slopes, n)
+    }
+
+
+def build_insights(user, today=None, progress=None):
+    """
+    Computes everything shown on the Insights page from a single load.
+    `progress`, if given, is called with a percentage between stages (the
+    compute_insights task passes JobContext.set_progress).
+    """
+    today = today or datetime.date.today()
+    progress = progress or (lambda percent: None)
+    arrays = load_training_arrays(user)
+    progress(40)
+
+    days, volume = daily_volume(arrays, end_date=today)
+    rolling = rolling_sum(volume, ACUTE_WINDOW_DAYS)
+    acwr = acute_chronic_ratio(volume)
+    progress(60)
+
+    ex_ids, e1rm_dates, e1rm_values = daily_best_e1rm(arrays)
+    slopes = progression_slopes(ex_ids, e1rm_dates, e1rm_values)
+    progress(80)
+
+    # Per-exercise summary: latest and best e1RM, session count, weekly trend
+    exercise_rows = []
+    if len(ex_ids):
+        codes, starts, counts = np.unique(ex_ids, return_index=True, return_counts=True)
+        for code, start, count in zip(codes, starts, counts):
+            segment = e1rm_values[start:start + count]  # rows are sorted by exercise, then date
+            exercise_rows.append({
+                'exercise_id': int(code),
+                'name': arrays.exercise_names.get(int(code), 'Unknown'),
+                'sessions': int(count),
+                'last_date': e1rm_dates[start + count - 1].item(),
+                'latest_e1rm': round(float(segment[-1]), 1),
+                'best_e1rm': round(float(segment.max()), 1),
+                'slope_per_week': slopes.get(int(code)),
+            })
+        exercise_rows.sort(key=lambda row: row['sessions'], reverse=True)
+
+    # e1RM trend series per exercise for charting
+    e1rm_trends = {}
+    for row in exercise_rows:
+        mask = ex_ids == row['exercise_id']
+        e1rm_trends[row['name']] = {
+            'dates': np.datetime_as_string(e1rm_dates[mask]).tolist(),
+            'values': np.round(e1rm_values[mask], 1).tolist(),
+        }
+
+    latest_acwr = None
+    if len(acwr) and np.isfinite(acwr[-1]):
+        latest_acwr = round(float(acwr[-1]), 2)
+
+    return {
+        'log_count': int(arrays.log_counts.sum()),
+        'days': np.datetime_as_string(days).tolist(),
+        'daily_volume': np.round(volume, 1).tolist(),
+        'rolling_volume': np.round(rolling, 1).tolist(),
+        'acwr': [None if not np.isfinite(v) else round(float(v), 2) for v in acwr],
+        'latest_acwr': latest_acwr,
+        'latest_rolling_volume': round(float(rolling[-1]), 1) if len(rolling) else 0.0,
+        'intensity_distribution': intensity_distribution(arrays),
+        'exercises': exercise_rows,
+        'e1rm_trends': e1rm_trends,
+    }
+
+
+def exercise_summary(user, exercise_id):
+    """
+    Personal record (heaviest weight logged, whether or not sets and reps
+    were recorded), first/last training date and number of training days
+    for one exercise, including archived history. Two aggregate queries
+    regardless of history length.
+    """
+    hot = WorkoutLog.objects.filter(
+        session__user=user,
+        exercise_id=exercise_id,
+        weight__isnull=False,
+    ).aggregate(
+        personal_record=Max('weight'),
+        first_date=Min('session__date'),
+        last_date=Max('session__date'),
+        training_days=Count('session__date', distinct=True),
+    )
+    # Rollups only exist for archived days, so the two never overlap. top_weight covers
+    # every log of the day; max_weight only the complete ones (for volume and e1RM).
+    archived = ExerciseDayRollup.objects.filter(
+        user=user, exercise_id=exercise_id, top_weight__isnull=False,
+    ).aggregate(
+        personal_record=Max('top_weight'),
+        first_date=Min('date'),
+        last_date=Max('date'),
+        training_days=Count('id'),
+    )
+    summary = {'training_days': hot['training_days'] + archived['training_days']}
+    for key, combine in [('personal_record', max), ('first_date', min), ('last_date', max)]:
+        values = [value for value in (hot[key], archived[key]) if value is not None]
+        summary[key] = combine(values) if values else None
+    return summary
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling. Returns the indices of at most
+    `threshold` points of the (x, y) series that best preserve its visual shape.
+    The first and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    bucket_size = (n - 2) / (threshold - 2)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n)
+
+        # Average of the following bucket acts as the third triangle vertex
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        # Pick the point in this bucket forming the largest triangle with the
+        # previously selected point and the next bucket's average
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def downsample_series(dates, values, max_points):
+    """Downsamples a daily (datetime64[D] dates, values) series with LTTB."""
+    if not len(dates):
+        return dates, values
+    keep = lttb_indices(dates.astype(np.int64), values, max_points)
+    return dates[keep], values[keep]
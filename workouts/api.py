@@ -0,0 +1,334 @@
+# workouts/api.py
+"""
+Read-only JSON API (v1) for sessions, logs, exercises and exercise stats.
+
+Conventions shared by every endpoint:
+  - Rows are read with values() on explicit field paths and serialized
+    directly; no model instances are built.
+  - Lists use keyset (cursor) pagination: ?cursor=<opaque>&limit=N.
+  - Sparse fieldsets: ?fields=id,date (primary type) or ?fields[logs]=...
+  - ?include=logs on sessions embeds logs fetched with one extra query.
+  - Responses carry an ETag; a matching If-None-Match returns 304.
+Authentication uses the normal session login; anonymous requests get 401.
+"""
+import base64
+import datetime
+import hashlib
+import json
+from collections import defaultdict
+from decimal import Decimal
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET
+
+from .models import Exercise, WorkoutLog, WorkoutSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Public field name -> values() path, per resource type
+SESSION_FIELDS = {
+    'id': 'id',
+    'date': 'date',
+    'notes': 'notes',
+    'created_at': 'created_at',
+}
+LOG_FIELDS = {
+    'id': 'id',
+    'session_id': 'session_id',
+    'date': 'session__date',
+    'exercise_id': 'exercise_id',
+    'exercise': 'exercise__name',
+    'sets': 'sets',
+    'reps': 'reps',
+    'weight': 'weight',
+    'duration': 'duration',
+    'notes': 'notes',
+}
+EXERCISE_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'custom': 'user_id',  # Serialized as a boolean
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiJSONEncoder(DjangoJSONEncoder):
+    """Like DjangoJSONEncoder, but weights (Decimal) become JSON numbers."""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+def api_view(view_func):
+    """GET-only, 401 instead of a login redirect, ApiError -> JSON error response."""
+    @require_GET
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=e.status)
+    return wrapper
+
+
+def _json_response(request, payload):
+    """Compact JSON with a content ETag; answers conditional requests with 304."""
+    body = json.dumps(payload, cls=ApiJSONEncoder, separators=(',', ':'))
+    etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)  # Always revalidate, never share
+    return response
+
+
+# --- Request parsing ---
+def _selected_fields(request, resource, allowed, primary=True):
+    """Parses ?fields[resource]= (or ?fields= for the primary resource) into public field names."""
+    raw = request.GET.get(f'fields[{resource}]')
+    if raw is None and primary:
+        raw = request.GET.get('fields')
+    if not raw:
+        return list(allowed)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown {resource} field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}.")
+    return names
+
+
+def _includes(request, allowed):
+    names = [name for name in request.GET.get('include', '').split(',') if name]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown include(s): {', '.join(unknown)}.")
+    return set(names)
+
+
+def _page_size(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("limit must be an integer.")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _date_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ApiError(f"{name} must be a YYYY-MM-DD date.")
+
+
+def _encode_cursor(values):
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(request):
+    cursor = request.GET.get('cursor')
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ApiError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != 2:  # Every cursor is a (sort key, id) pair
+        raise ApiError("Invalid cursor.")
+    return values
+
+
+def _paginate(queryset, paths, key_paths, limit):
+    """
+    Keyset pagination: returns (rows, next_cursor) for a queryset already
+    filtered past the cursor and ordered by `key_paths`. The key columns are
+    always selected so the next cursor can be built from the last row.
+    """
+    select = list(dict.fromkeys(paths + key_paths))
+    rows = list(queryset.values(*select)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_cursor([rows[-1][path] for path in key_paths]) if has_more else None
+    return rows, next_cursor
+
+
+def _serialize(rows, fields, mapping, transforms=None):
+    transforms = transforms or {}
+    return [
+        {name: transforms.get(name, lambda v: v)(row[mapping[name]]) for name in fields}
+        for row in rows
+    ]
+
+
+def _list_payload(request, data, next_cursor):
+    links = {'next': None}
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        links['next'] = f"{request.path}?{params.urlencode()}"
+    return {'data': data, 'next_cursor': next_cursor, 'links': links}
+
+
+# --- Shared loaders ---
+def _embed_logs(session_rows, request):
+    """Attaches logs to serialized sessions with ONE query for the whole page."""
+    log_fields = _selected_fields(request, 'logs', LOG_FIELDS, primary=False)
+    session_ids = [row['id'] for row in session_rows]
+    paths = list(dict.fromkeys([LOG_FIELDS[name] for name in log_fields] + ['session_id']))
+    logs_by_session = defaultdict(list)
+    for row in WorkoutLog.objects.filter(session_id__in=session_ids).order_by('id').values(*paths):
+        logs_by_session[row['session_id']].append({name: row[LOG_FIELDS[name]] for name in log_fields})
+    return logs_by_session
+
+
+def _sessions_data(request, queryset, single=False):
+    fields = _selected_fields(request, 'sessions', SESSION_FIELDS)
+    include = _includes(request, {'logs'})
+    paths = [SESSION_FIELDS[name] for name in fields]
+
+    if single:
+        rows, next_cursor = list(queryset.values(*dict.fromkeys(paths + ['id']))), None
+    else:
+        rows, next_cursor = _paginate(queryset, paths, ['date', 'id'], _page_size(request))
+
+    data = _serialize(rows, fields, SESSION_FIELDS)
+    if 'logs' in include:
+        logs_by_session = _embed_logs(rows, request)
+        for item, row in zip(data, rows):
+            item['logs'] = logs_by_session.get(row['id'], [])
+    return data, next_cursor
+
+
+# --- Endpoints ---
+@api_view
+def api_root(request):
+    return _json_response(request, {
+        'version': 'v1',
+        'resources': {
+            'sessions': reverse('api_v1:sessions'),
+            'logs': reverse('api_v1:logs'),
+            'exercises': reverse('api_v1:exercises'),
+        },
+    })
+
+
+@api_view
+def sessions_list(request):
+    """GET /api/v1/sessions/?from=&to=&cursor=&limit=&fields=&include=logs (newest first)."""
+    sessions = WorkoutSession.objects.filter(user=request.user)
+    date_from, date_to = _date_param(request, 'from'), _date_param(request, 'to')
+    if date_from:
+        sessions = sessions.filter(date__gte=date_from)
+    if date_to:
+        sessions = sessions.filter(date__lte=date_to)
+    cursor = _decode_cursor(request)
+    if cursor:
+        try:
+            cursor_date, cursor_id = datetime.date.fromisoformat(cursor[0]), int(cursor[1])
+        except (ValueError, TypeError, IndexError):
+            raise ApiError("Invalid cursor.")
+        sessions = sessions.filter(Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id))
+
+    data, next_cursor = _sessions_data(request, sessions.order_by('-date', '-id'))
+    return _json_response(request, _list_payload(request, data, next_cursor))
+
+
+@api_view
+def session_detail(request, session_id):
+    """GET /api/v1/sessions/<id>/?fields=&include=logs"""
+    data, _ = _sessions_data(request, WorkoutSession.objects.filter(user=request.user, pk=session_id), single=True)
+    if not data:
+        raise ApiError("Session not found.", status=404)
+    return _json_response(request, {'data': data[0]})
+
+
+@api_view
+def logs_list(request):
+    """GET /api/v1/logs/?exercise=&from=&to=&cursor=&limit=&fields= (newest first)."""
+    logs = WorkoutLog.objects.filter(session__user=request.user)
+    if request.GET.get('exercise'):
+        try:
+            logs = logs.filter(exercise_id=int(request.GET['exercise']))
+        except ValueError:
+            raise ApiError("exercise must be an id.")
+    date_from, date_to = _date_param(request, 'from'), _date_param(request, 'to')
+    if date_from:
+        logs = logs.filter(session__date__gte=date_from)
+    if date_to:
+        logs = logs.filter(session__date__lte=date_to)
+    cursor = _decode_cursor(request)
+    if cursor:
+        try:
+            cursor_date, cursor_id = datetime.date.fromisoformat(cursor[0]), int(cursor[1])
+        except (ValueError, TypeError, IndexError):
+            raise ApiError("Invalid cursor.")
+        logs = logs.filter(Q(session__date__lt=cursor_date) | Q(session__date=cursor_date, id__lt=cursor_id))
+
+    fields = _selected_fields(request, 'logs', LOG_FIELDS)
+    rows, next_cursor = _paginate(
+        logs.order_by('-session__date', '-id'),
+        [LOG_FIELDS[name] for name in fields], ['session__date', 'id'], _page_size(request),
+    )
+    return _json_response(request, _list_payload(request, _serialize(rows, fields, LOG_FIELDS), next_cursor))
+
+
+@api_view
+def exercises_list(request):
+    """GET /api/v1/exercises/?cursor=&limit=&fields= (global + the user's custom, by name)."""
+    exercises = Exercise.objects.filter(Q(user=None) | Q(user=request.user))
+    cursor = _decode_cursor(request)
+    if cursor:
+        try:
+            cursor_name, cursor_id = str(cursor[0]), int(cursor[1])
+        except (ValueError, TypeError, IndexError):
+            raise ApiError("Invalid cursor.")
+        exercises = exercises.filter(Q(name__gt=cursor_name) | Q(name=cursor_name, id__gt=cursor_id))
+
+    fields = _selected_fields(request, 'exercises', EXERCISE_FIELDS)
+    rows, next_cursor = _paginate(
+        exercises.order_by('name', 'id'),
+        [EXERCISE_FIELDS[name] for name in fields], ['name', 'id'], _page_size(request),
+    )
+    data = _serialize(rows, fields, EXERCISE_FIELDS, transforms={'custom': lambda user_id: user_id is not None})
+    return _json_response(request, _list_payload(request, data, next_cursor))
+
+
+@api_view
+def exercise_stats(request, exercise_id):
+    """GET /api/v1/exercises/<id>/stats/ - the summary shown on the exercise stats page."""
+    if not Exercise.objects.filter(Q(user=None) | Q(user=request.user), pk=exercise_id).exists():
+        raise ApiError("Exercise not found.", status=404)
+    from .analytics import exercise_summary  # numpy-backed; imported on first use
+    summary = exercise_summary(request.user, exercise_id)
+    return _json_response(request, {
+        'data': {
+            'exercise_id': exercise_id,
+            'personal_record': summary['personal_record'],
+            'first_date': summary['first_date'],
+            'last_date': summary['last_date'],
+            'training_days': summary['training_days'],
+        },
+        'links': {'chart_data': reverse('workouts:exercise_chart_data', kwargs={'exercise_id': exercise_id})},
+    })
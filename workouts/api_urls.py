@@ -0,0 +1,14 @@
+# workouts/api_urls.py
+from django.urls import path
+from . import api
+
+app_name = 'api_v1'
+
+urlpatterns = [
+    path('', api.api_root, name='root'),
+    path('sessions/', api.sessions_list, name='sessions'),
+    path('sessions/<int:session_id>/', api.session_detail, name='session_detail'),
+    path('logs/', api.logs_list, name='logs'),
+    path('exercises/', api.exercises_list, name='exercises'),
+    path('exercises/<int:exercise_id>/stats/', api.exercise_stats, name='exercise_stats'),
+]
@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class WorkoutsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workouts'
+
+    def ready(self):
+        # GYM_TRACKER_ENV=production: refuse to start with dev-only or slow settings
+        from .checks import refuse_unsafe_production_settings
+        refuse_unsafe_production_settings()
+        # Register background tasks with the job queue
+        from . import tasks  # noqa: F401
+        # Keep the notes search index in sync on save/delete
+        from . import search  # noqa: F401
+        # Drop cached dashboard calendars when their sessions change
+        from . import calendar_cells  # noqa: F401
+        # Mark precomputed insights stale when training data changes
+        from . import insights  # noqa: F401
+        # Drop cached routine lists when routines change
+        from . import routines  # noqa: F401
+        # Log slow SQL statements with their query plans
+        from . import slow_queries
+        slow_queries.install()
@@ -0,0 +1,334 @@
+# workouts/archive.py
+"""
+Archival of cold workout history.
+
+Whole months of sessions older than settings.ARCHIVE_AFTER_DAYS are written
+to one gzip-compressed JSON file per user and month under ARCHIVE_ROOT,
+summarized into ExerciseDayRollup rows (so stats, charts and progression
+stay complete) and removed from the hot WorkoutSession/WorkoutLog tables.
+
+Reads of an archived month (dashboard calendar, monthly report) go through
+load_archived_month(), which decodes the file once and caches it. Writes
+into an archived month restore it to the hot tables first (restore_month).
+"""
+import datetime
+import gzip
+import json
+import os
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils.dateparse import parse_date, parse_datetime, parse_duration
+
+from . import search
+from .bulk import bulk_changes
+from .calendar_cells import invalidate_month as invalidate_calendar_month
+from .insights import bump_data_version
+from .models import ArchivedMonth, Exercise, ExerciseDayRollup, WorkoutLog, WorkoutSession
+from .recommendations import _top_set
+
+ARCHIVE_FORMAT_VERSION = 1
+ARCHIVE_CACHE_SECONDS = 600  # Decoded months and the per-user archived-month set
+
+
+def month_bounds(year, month):
+    """Returns (first day, first day of the next month) for a month."""
+    start = datetime.date(year, month, 1)
+    end = datetime.date(year + 1, 1, 1) if month == 12 else datetime.date(year, month + 1, 1)
+    return start, end
+
+
+def archive_cutoff(today, horizon_days=None):
+    """First day of the month containing today - horizon: only months before it are archived."""
+    horizon_days = settings.ARCHIVE_AFTER_DAYS if horizon_days is None else horizon_days
+    return (today - datetime.timedelta(days=horizon_days)).replace(day=1)
+
+
+def _archive_filename(user_id, year, month):
+    return os.path.join(str(user_id), f"{year:04d}-{month:02d}.json.gz")
+
+
+def _archive_path(filename):
+    return os.path.join(settings.ARCHIVE_ROOT, filename)
+
+
+def _months_cache_key(user_id):
+    return f"archived_months:{user_id}"
+
+
+def _month_cache_key(user_id, year, month):
+    return f"archive_month:{user_id}:{year}:{month}"
+
+
+def _invalidate(user_id, year, month):
+    cache.delete_many([_months_cache_key(user_id), _month_cache_key(user_id, year, month)])
+    # Bulk moves bypass the calendar's and insights' signal handlers
+    invalidate_calendar_month(user_id, year, month)
+    bump_data_version(user_id)
+
+
+def _read_payload(filename):
+    with gzip.open(_archive_path(filename), 'rt', encoding='utf-8') as archive_file:
+        return json.load(archive_file)
+
+
+def _write_payload(filename, payload):
+    """
+    Writes the archive next to its final path and returns (temp path, size
+    in bytes). The caller renames it into place once its transaction
+    commits, so a rollback never leaves a file that disagrees with the
+    database.
+    """
+    path = _archive_path(filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=9) as archive_file:
+        json.dump(payload, archive_file, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return temp_path, os.path.getsize(temp_path)
+
+
+# --- Read path ---
+def archived_months(user):
+    """Set of (year, month) tuples archived for a user (cached)."""
+    key = _months_cache_key(user.pk)
+    months = cache.get(key)
+    if months is None:
+        months = set(ArchivedMonth.objects.filter(user=user).values_list('year', 'month'))
+        cache.set(key, months, ARCHIVE_CACHE_SECONDS)
+    return months
+
+
+def is_month_archived(user, year, month):
+    return (year, month) in archived_months(user)
+
+
+def load_archived_month(user, year, month):
+    """
+    Returns the archived sessions of a month as unsaved WorkoutSession
+    instances, ordered by date. Each has `is_archived = True` and its logs
+    (unsaved WorkoutLog instances) in `log_list`. Empty if not archived.
+    """
+    if not is_month_archived(user, year, month):
+        return []
+
+    key = _month_cache_key(user.pk, year, month)
+    sessions = cache.get(key)
+    if sessions is None:
+        record = ArchivedMonth.objects.filter(user=user, year=year, month=month).first()
+        if record is None:
+            return []
+        sessions = _read_payload(record.filename)['sessions']
+        cache.set(key, sessions, ARCHIVE_CACHE_SECONDS)
+
+    exercise_ids = {log['exercise_id'] for session in sessions for log in session['logs']}
+    exercises = Exercise.objects.in_bulk(exercise_ids)
+
+    result = []
+    for data in sessions:
+        session = WorkoutSession(
+            id=data['id'], user=user, date=parse_date(data['date']),
+            created_at=parse_datetime(data['created_at']), notes=data['notes'],
+        )
+        session.is_archived = True
+        session.log_list = [
+            WorkoutLog(
+                id=log['id'],
+                session=session,
+                exercise=exercises.get(log['exercise_id']) or Exercise(id=log['exercise_id'], name=log['exercise_name']),
+                sets=log['sets'],
+                reps=log['reps'],
+                weight=Decimal(log['weight']) if log['weight'] is not None else None,
+                duration=parse_duration(log['duration']) if log['duration'] is not None else None,
+                notes=log['notes'],
+            )
+            for log in data['logs']
+        ]
+        result.append(session)
+    return result
+
+
+def archived_payloads():
+    """Yields (user_id, session dicts) for every archived month, e.g. to rebuild derived indexes."""
+    for record in ArchivedMonth.objects.order_by('user_id', 'year', 'month').iterator():
+        yield record.user_id, _read_payload(record.filename)['sessions']
+
+
+# --- Archiving ---
+def _serialize_month(user_id, start, end):
+    """Reads a month of hot sessions (locked) into JSON-ready dicts."""
+    sessions = list(
+        WorkoutSession.objects.select_for_update().filter(user_id=user_id, date__gte=start, date__lt=end)
+        .order_by('date').values('id', 'date', 'created_at', 'notes')
+    )
+    logs_by_session = defaultdict(list)
+    for log in WorkoutLog.objects.filter(session__in=[s['id'] for s in sessions]).order_by('id').values(
+            'id', 'session_id', 'exercise_id', 'exercise__name', 'sets', 'reps', 'weight', 'duration', 'notes'):
+        log['exercise_name'] = log.pop('exercise__name')
+        logs_by_session[log.pop('session_id')].append(log)
+    for session in sessions:
+        session['logs'] = logs_by_session[session['id']]
+    # Round-trip through the encoder so fresh and previously archived sessions look the same
+    return json.loads(json.dumps(sessions, cls=DjangoJSONEncoder))
+
+
+def _build_rollups(user_id, sessions):
+    """Aggregates archived session dicts into ExerciseDayRollup instances."""
+    from .analytics import estimate_1rm  # Only archiving needs numpy
+
+    days = defaultdict(list)  # {(exercise_id, date): [(sets, reps, weight)]}
+    for session in sessions:
+        for log in session['logs']:
+            weight = Decimal(log['weight']) if log['weight'] is not None else None
+            days[(log['exercise_id'], session['date'])].append((log['sets'], log['reps'], weight))
+
+    rollups = []
+    for (exercise_id, date), logs in days.items():
+        complete = [log for log in logs if None not in log]
+        top_sets, top_reps, top_weight = _top_set(logs)
+        rollups.append(ExerciseDayRollup(
+            user_id=user_id,
+            exercise_id=exercise_id,
+            date=parse_date(date),
+            log_count=len(logs),
+            complete_logs=len(complete),
+            volume=sum(sets * reps * float(weight) for sets, reps, weight in complete) if complete else None,
+            max_weight=max(weight for _, _, weight in complete) if complete else None,
+            best_e1rm=max(float(estimate_1rm(float(weight), reps)) for _, reps, weight in complete) if complete else None,
+            top_sets=top_sets,
+            top_reps=top_reps,
+            top_weight=top_weight,
+        ))
+    return rollups
+
+
+def archive_month(user_id, year, month):
+    """
+    Moves one month of a user's sessions into the archive. Months that are
+    already archived are merged with the new sessions. Returns the number
+    of sessions moved.
+    """
+    start, end = month_bounds(year, month)
+    with transaction.atomic():
+        sessions = _serialize_month(user_id, start, end)
+        if not sessions:
+            return 0
+
+        record = ArchivedMonth.objects.select_for_update().filter(user_id=user_id, year=year, month=month).first()
+        merged = {}
+        if record is not None:
+            merged.update((s['id'], s) for s in _read_payload(record.filename)['sessions'])
+        merged.update((s['id'], s) for s in sessions)
+        merged = sorted(merged.values(), key=lambda s: s['date'])
+
+        filename = _archive_filename(user_id, year, month)
+        temp_path, size = _write_payload(filename, {
+            'version': ARCHIVE_FORMAT_VERSION,
+            'user_id': user_id,
+            'year': year,
+            'month': month,
+            'sessions': merged,
+        })
+        try:
+            ExerciseDayRollup.objects.filter(user_id=user_id, date__gte=start, date__lt=end).delete()
+            ExerciseDayRollup.objects.bulk_create(_build_rollups(user_id, merged))
+            ArchivedMonth.objects.update_or_create(
+                user_id=user_id, year=year, month=month,
+                defaults={
+                    'filename': filename,
+                    'session_count': len(merged),
+                    'log_count': sum(len(s['logs']) for s in merged),
+                    'size_bytes': size,
+                },
+            )
+            with bulk_changes():  # No per-row calendar/search signal work; both are redone below
+                WorkoutSession.objects.filter(pk__in=[s['id'] for s in sessions]).delete()  # Logs cascade
+            # Upserting replaces the hot rows' index entries, so archived notes stay searchable
+            search.index_entries(search.entries_for_archived_sessions(user_id, sessions))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        def publish():
+            os.replace(temp_path, _archive_path(filename))
+            _invalidate(user_id, year, month)
+        transaction.on_commit(publish)
+    return len(sessions)
+
+
+# --- Restoring ---
+def restore_month(user, year, month):
+    """
+    Moves an archived month back into the hot tables (keeping the original
+    ids) and drops its rollups and archive file. Returns the number of
+    sessions restored.
+    """
+    start, end = month_bounds(year, month)
+    with transaction.atomic():
+        record = ArchivedMonth.objects.select_for_update().filter(user=user, year=year, month=month).first()
+        if record is None:
+            return 0
+        sessions = _read_payload(record.filename)['sessions']
+
+        # A session saved on an archived date after archiving keeps its row; archived logs join it
+        hot_ids = dict(
+            WorkoutSession.objects.filter(user=user, date__gte=start, date__lt=end).values_list('date', 'id')
+        )
+        new_sessions, created_at, logs = [], {}, []
+        for data in sessions:
+            date = parse_date(data['date'])
+            session_id = hot_ids.get(date)
+            if session_id is None:
+                session_id = data['id']
+                new_sessions.append(WorkoutSession(id=session_id, user=user, date=date, notes=data['notes']))
+                created_at[session_id] = parse_datetime(data['created_at'])
+            logs.extend(
+                WorkoutLog(
+                    id=log['id'], session_id=session_id, exercise_id=log['exercise_id'],
+                    sets=log['sets'], reps=log['reps'],
+                    weight=Decimal(log['weight']) if log['weight'] is not None else None,
+                    duration=parse_duration(log['duration']) if log['duration'] is not None else None,
+                    notes=log['notes'],
+                )
+                for log in data['logs']
+            )
+
+        WorkoutSession.objects.bulk_create(new_sessions)
+        if created_at:
+            # bulk_create stamps auto_now_add fields; put the original timestamps back in one UPDATE
+            WorkoutSession.objects.filter(pk__in=created_at.keys()).update(created_at=Case(
+                *[When(pk=pk, then=Value(value)) for pk, value in created_at.items()],
+                output_field=DateTimeField(),
+            ))
+        WorkoutLog.objects.bulk_create(logs)
+        # bulk_create skips the search signal handlers. Archived sessions merged into a hot one
+        # drop their own notes row; their logs are re-pointed at the hot session.
+        merged = {data['id']: hot_ids[parse_date(data['date'])] for data in sessions if parse_date(data['date']) in hot_ids}
+        search.remove_entries([(search.KIND_SESSION, archived_id) for archived_id in merged])
+        search.index_entries([
+            entry for entry in search.entries_for_archived_sessions(user.pk, [
+                dict(data, id=merged.get(data['id'], data['id'])) for data in sessions
+            ])
+            if not (entry['kind'] == search.KIND_SESSION and entry['object_id'] in merged.values())
+        ])
+        ExerciseDayRollup.objects.filter(user=user, date__gte=start, date__lt=end).delete()
+        filename = record.filename
+        record.delete()
+
+        def cleanup():
+            _invalidate(user.pk, year, month)
+            if os.path.exists(_archive_path(filename)):
+                os.remove(_archive_path(filename))
+        transaction.on_commit(cleanup)
+    return len(sessions)
+
+
+def restore_month_for_date(user, date):
+    """Restores the month containing `date` if it is archived (used before writes)."""
+    if is_month_archived(user, date.year, date.month):
+        return restore_month(user, date.year, date.month)
+    return 0
@@ -0,0 +1,29 @@
+# workouts/auth_backends.py
+"""
+Authentication backends that load the user's profile with the user.
+
+AuthenticationMiddleware resolves request.user through the backend that
+logged the user in; fetching the profile in the same query means pages that
+read it (the dashboard's streak record, timezone handling) add no query.
+"""
+from allauth.account.auth_backends import AuthenticationBackend
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class _ProfileUserMixin:
+    def get_user(self, user_id):
+        user_model = get_user_model()
+        try:
+            user = user_model._default_manager.select_related('profile').get(pk=user_id)
+        except user_model.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class ProfileModelBackend(_ProfileUserMixin, ModelBackend):
+    pass
+
+
+class ProfileAuthenticationBackend(_ProfileUserMixin, AuthenticationBackend):
+    pass
@@ -0,0 +1,27 @@
+# workouts/bulk.py
+"""
+Bulk changes to sessions and logs.
+
+The calendar and search signal handlers keep their caches in sync one row
+at a time, which costs a query or two per deleted log. Code that moves
+whole months (archive.py) runs its deletes inside bulk_changes(): the
+handlers check in_bulk_change() and return straight away, and the caller
+does a single invalidation/reindex for everything it touched.
+"""
+import contextvars
+from contextlib import contextmanager
+
+_bulk_change = contextvars.ContextVar('workouts_bulk_change', default=False)
+
+
+@contextmanager
+def bulk_changes():
+    token = _bulk_change.set(True)
+    try:
+        yield
+    finally:
+        _bulk_change.reset(token)
+
+
+def in_bulk_change():
+    return _bulk_change.get()
@@ -0,0 +1,162 @@
+# workouts/calendar_cells.py
+"""
+Precomputed dashboard calendar.
+
+build_month_calendar() turns a user's month into weeks of CalendarCell
+objects with everything the template needs already resolved - CSS classes,
+link URL and title, log count - so dashboard.html only prints attributes
+instead of running date filters, dict lookups and {% url %} per cell.
+
+Months are cached per user; the cache entry is dropped when a session or
+log in that month changes (signal handlers below, archive.py for bulk
+moves) and ignored once "today" has moved on.
+"""
+import calendar
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from .bulk import in_bulk_change
+from .models import WorkoutLog, WorkoutSession
+
+CALENDAR_CACHE_SECONDS = 60 * 60
+
+KIND_SESSION = 'session'    # Links to the workout detail page
+KIND_ARCHIVED = 'archived'  # Links to the monthly report (archived sessions have no detail page)
+KIND_ADD = 'add'            # Log-workout button (current month, not in the future)
+
+
+class CalendarCell:
+    __slots__ = ('day', 'css_class', 'kind', 'url', 'title', 'log_count')
+
+    def __init__(self, day, css_class, kind=None, url='', title='', log_count=0):
+        self.day = day
+        self.css_class = css_class
+        self.kind = kind
+        self.url = url
+        self.title = title
+        self.log_count = log_count
+
+    def __getstate__(self):
+        return (self.day, self.css_class, self.kind, self.url, self.title, self.log_count)
+
+    def __setstate__(self, state):
+        self.day, self.css_class, self.kind, self.url, self.title, self.log_count = state
+
+
+def _cache_key(user_id, year, month):
+    return f"calendar:{user_id}:{year}:{month}"
+
+
+def invalidate_month(user_id, year, month):
+    cache.delete(_cache_key(user_id, year, month))
+
+
+def _month_log_counts(user, year, month):
+    """{date: (session id or None if archived, log count)} for days with logged exercises."""
+    from .archive import load_archived_month  # Local import: archive imports this module
+
+    days = {
+        date: (session_id, log_count)
+        for date, session_id, log_count in WorkoutSession.objects.filter(
+            user=user, date__year=year, date__month=month,
+        ).annotate(log_count=Count('logs')).filter(log_count__gt=0).values_list('date', 'id', 'log_count')
+    }
+    for session in load_archived_month(user, year, month):
+        if session.log_list:
+            days.setdefault(session.date, (None, len(session.log_list)))
+    return days
+
+
+def _build_weeks(user, year, month, today):
+    days = _month_log_counts(user, year, month)
+    archived_url = reverse('workouts:monthly_report_specific', kwargs={'year': year, 'month': month})
+    weeks = []
+    for week in calendar.Calendar(firstweekday=6).monthdatescalendar(year, month):  # Sunday start
+        cells = []
+        for day in week:
+            in_month = day.month == month
+            css_class = ' '.join(filter(None, ['' if in_month else 'other-month', 'today' if day == today else '']))
+            label = day.strftime('%b %d, %Y')
+            entry = days.get(day) if in_month else None
+            if entry is not None:
+                session_id, log_count = entry
+                logs = f"{log_count} exercise{'s' if log_count != 1 else ''}"
+                if session_id is None:
+                    cell = CalendarCell(day.day, css_class, KIND_ARCHIVED, archived_url,
+                                        f"Archived workout for {label}, {logs} (shown in the monthly report)", log_count)
+                else:
+                    cell = CalendarCell(day.day, css_class, KIND_SESSION,
+                                        reverse('workouts:workout_detail', kwargs={'session_id': session_id}),
+                                        f"View workout for {label}, {logs}", log_count)
+            elif in_month and day <= today:
+                cell = CalendarCell(day.day, css_class, KIND_ADD,
+                                    reverse('workouts:log_workout_date', kwargs={'date_str': day.isoformat()}),
+                                    f"Log workout for {label}")
+            else:
+                cell = CalendarCell(day.day, css_class)
+            cells.append(cell)
+        weeks.append(tuple(cells))
+    return weeks
+
+
+def adjacent_months(year, month):
+    """First days of the previous and next month."""
+    first_day = datetime.date(year, month, 1)
+    previous = (first_day - datetime.timedelta(days=1)).replace(day=1)
+    following = datetime.date(year + 1, 1, 1) if month == 12 else datetime.date(year, month + 1, 1)
+    return previous, following
+
+
+def build_month_calendar(user, year, month, today):
+    """Weeks (tuples of CalendarCell, Sunday first) for a user's month, cached."""
+    key = _cache_key(user.pk, year, month)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == today:
+        return cached[1]
+    weeks = _build_weeks(user, year, month, today)
+    cache.set(key, (today, weeks), CALENDAR_CACHE_SECONDS)
+    return weeks
+
+
+def month_payload(user, year, month, today):
+    """Compact JSON form of a month for client-side navigation; cells are [day, class, kind, url, title]."""
+    previous, following = adjacent_months(year, month)
+    return {
+        'year': year,
+        'month': month,
+        'title': datetime.date(year, month, 1).strftime('%B %Y'),
+        'prev': {'year': previous.year, 'month': previous.month, 'label': previous.strftime('%b %Y')},
+        'next': {'year': following.year, 'month': following.month, 'label': following.strftime('%b %Y')},
+        'weeks': [
+            [[cell.day, cell.css_class, cell.kind, cell.url, cell.title] for cell in week]
+            for week in build_month_calendar(user, year, month, today)
+        ],
+    }
+
+
+# --- Invalidation ---
+@receiver(post_save, sender=WorkoutSession)
+@receiver(post_delete, sender=WorkoutSession)
+def _session_changed(sender, instance, raw=False, **kwargs):
+    if not raw and not in_bulk_change():  # Bulk moves invalidate the whole month themselves
+        invalidate_month(instance.user_id, instance.date.year, instance.date.month)
+
+
+@receiver(post_save, sender=WorkoutLog)
+@receiver(post_delete, sender=WorkoutLog)
+def _log_changed(sender, instance, raw=False, **kwargs):
+    if raw or in_bulk_change():
+        return
+    if WorkoutLog.session.is_cached(instance):
+        user_id, date = instance.session.user_id, instance.session.date
+    else:
+        row = WorkoutSession.objects.filter(pk=instance.session_id).values_list('user_id', 'date').first()
+        if row is None:
+            return  # Session already gone; its own post_delete invalidated the month
+        user_id, date = row
+    invalidate_month(user_id, date.year, date.month)
@@ -0,0 +1,110 @@
+# workouts/checks.py
+"""
+Production settings checks.
+
+With GYM_TRACKER_ENV=production these run as system checks (manage.py check,
+runserver, migrate) and again in AppConfig.ready(), where any error stops
+the process from starting - so a WSGI/ASGI server never serves with a
+dev-only or slow configuration.
+"""
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from django.core.exceptions import ImproperlyConfigured
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+MANIFEST_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+DEV_ONLY_APPS = ('debug_toolbar', 'django_extensions', 'silk')
+DEV_ONLY_CONTEXT_PROCESSORS = ('django.template.context_processors.debug',)
+
+
+def _uses_cached_loader(template_settings):
+    for loader in template_settings.get('OPTIONS', {}).get('loaders') or []:
+        if isinstance(loader, (list, tuple)) and loader[0] == CACHED_LOADER:
+            return True
+    return False
+
+
+def production_settings_issues():
+    """Returns check messages for options that must not be used in production."""
+    issues = []
+    if settings.DEBUG:
+        issues.append(Error("DEBUG is on.", hint="Unset DEBUG overrides for production.", id='workouts.E001'))
+    if settings.SECRET_KEY.startswith('django-insecure'):
+        issues.append(Error("SECRET_KEY is the development key.", hint="Set DJANGO_SECRET_KEY.", id='workouts.E002'))
+    if not settings.ALLOWED_HOSTS:
+        issues.append(Error("ALLOWED_HOSTS is empty.", hint="Set DJANGO_ALLOWED_HOSTS.", id='workouts.E003'))
+
+    django_templates = [t for t in settings.TEMPLATES if t['BACKEND'].endswith('DjangoTemplates')]
+    if not all(_uses_cached_loader(t) for t in django_templates):
+        issues.append(Error("The cached template loader is not enabled.", id='workouts.E004'))
+    for template_settings in django_templates:
+        for processor in template_settings.get('OPTIONS', {}).get('context_processors', []):
+            if processor in DEV_ONLY_CONTEXT_PROCESSORS:
+                issues.append(Error(f"Dev-only context processor {processor} is enabled.", id='workouts.E005'))
+    dev_apps = [app for app in settings.INSTALLED_APPS if app.split('.')[0] in DEV_ONLY_APPS]
+    if dev_apps:
+        issues.append(Error(f"Dev-only apps are installed: {', '.join(dev_apps)}.", id='workouts.E005'))
+
+    for alias, database in settings.DATABASES.items():
+        if not database.get('CONN_MAX_AGE'):
+            issues.append(Error(
+                f"Database '{alias}' opens a new connection per request (CONN_MAX_AGE=0).",
+                hint="Set DJANGO_CONN_MAX_AGE.", id='workouts.E006',
+            ))
+        if database['ENGINE'].endswith('sqlite3'):
+            issues.append(Warning(
+                f"Database '{alias}' is SQLite; concurrent writers will serialize.", id='workouts.W001',
+            ))
+
+    if 'workouts.middleware.CompressionMiddleware' not in settings.MIDDLEWARE:
+        issues.append(Error("Response compression (CompressionMiddleware) is not enabled.", id='workouts.E007'))
+    if settings.STORAGES['staticfiles']['BACKEND'] != MANIFEST_STORAGE:
+        issues.append(Error("Static files are not served with ManifestStaticFilesStorage.", id='workouts.E008'))
+    elif not os.path.exists(os.path.join(settings.STATIC_ROOT, 'staticfiles.json')):
+        issues.append(Warning(
+            "The static files manifest is missing.", hint="Run manage.py collectstatic.", id='workouts.W002',
+        ))
+    if not (settings.SESSION_COOKIE_SECURE and settings.CSRF_COOKIE_SECURE):
+        issues.append(Error("Session and CSRF cookies must be secure-only.", id='workouts.E009'))
+    if settings.SESSION_SAVE_EVERY_REQUEST:
+        issues.append(Error("SESSION_SAVE_EVERY_REQUEST writes the session on every request.", id='workouts.E010'))
+
+    if settings.BACKGROUND_JOBS_EAGER:
+        issues.append(Error(
+            "BACKGROUND_JOBS_EAGER runs background jobs inside requests.",
+            hint="Run the worker (manage.py run_jobs) instead.", id='workouts.E011',
+        ))
+    if settings.SLOW_QUERY_THRESHOLD_MS is not None and settings.SLOW_QUERY_THRESHOLD_MS < 10:
+        issues.append(Error(
+            "SLOW_QUERY_THRESHOLD_MS is so low that nearly every query is logged with an EXPLAIN.",
+            id='workouts.E012',
+        ))
+    if (settings.CACHES['default']['BACKEND'].endswith('LocMemCache')
+            and settings.SESSION_ENGINE in ('workouts.session_store', 'django.contrib.sessions.backends.cache')):
+        issues.append(Warning(
+            "Sessions live in a per-process memory cache; users are logged out when a worker restarts "
+            "and sessions are not shared between workers.",
+            hint="Set REDIS_URL.", id='workouts.W003',
+        ))
+    return issues
+
+
+@register('production')
+def check_production_settings(app_configs, **kwargs):
+    if not settings.PRODUCTION:
+        return []
+    return production_settings_issues()
+
+
+def refuse_unsafe_production_settings():
+    """Called from AppConfig.ready(): production processes don't start with errors."""
+    if not settings.PRODUCTION:
+        return
+    errors = [issue for issue in production_settings_issues() if issue.is_serious()]
+    if errors:
+        raise ImproperlyConfigured(
+            "Refusing to start with GYM_TRACKER_ENV=production:\n"
+            + '\n'.join(f"  {issue.id}: {issue.msg}" for issue in errors)
+        )
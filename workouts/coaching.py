@@ -0,0 +1,121 @@
+# workouts/coaching.py
+"""
+Cross-athlete aggregation for the coach dashboard.
+
+Every metric is computed for a whole page of athletes with a fixed number
+of grouped queries (four), no matter how many athletes are on the page.
+"""
+import datetime
+import hashlib
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Max, Q, Sum
+
+from .models import ExerciseDayRollup, WorkoutLog, WorkoutSession
+
+ADHERENCE_WINDOW_DAYS = 28
+ADHERENCE_TARGET_PER_WEEK = 3  # Sessions per week counted as 100% adherence
+ATHLETES_PER_PAGE = 50
+COACH_DASHBOARD_CACHE_SECONDS = 60
+
+
+def athlete_summaries(athlete_ids, today):
+    """
+    Returns {athlete_id: summary dict} with last session date, 7-day volume,
+    PRs set this month and 28-day adherence for every id in `athlete_ids`.
+    """
+    week_start = today - datetime.timedelta(days=6)
+    month_start = today.replace(day=1)
+    adherence_start = today - datetime.timedelta(days=ADHERENCE_WINDOW_DAYS - 1)
+    target_sessions = ADHERENCE_TARGET_PER_WEEK * ADHERENCE_WINDOW_DAYS / 7
+
+    summaries = {
+        athlete_id: {
+            'last_session_date': None,
+            'recent_sessions': 0,
+            'adherence_percent': 0,
+            'weekly_volume': 0.0,
+            'prs_this_month': 0,
+        }
+        for athlete_id in athlete_ids
+    }
+    if not summaries:
+        return summaries
+
+    # Query 1: last session date + sessions inside the adherence window.
+    # Like streaks and digests, only sessions with at least one log count as training.
+    session_rows = WorkoutSession.objects.filter(
+        user_id__in=athlete_ids, logs__isnull=False,
+    ).values('user_id').annotate(
+        last_date=Max('date'),
+        recent=Count('id', distinct=True, filter=Q(date__gte=adherence_start, date__lte=today)),
+    ).order_by()
+    for row in session_rows:
+        summary = summaries[row['user_id']]
+        summary['last_session_date'] = row['last_date']
+        summary['recent_sessions'] = row['recent']
+        summary['adherence_percent'] = min(100, round(row['recent'] / target_sessions * 100))
+
+    # Query 2: volume over the last 7 days
+    volume_rows = WorkoutLog.objects.filter(
+        session__user_id__in=athlete_ids,
+        session__date__gte=week_start,
+        session__date__lte=today,
+    ).values('session__user_id').annotate(
+        volume=Sum(ExpressionWrapper(F('sets') * F('reps') * F('weight'), output_field=FloatField())),
+    ).order_by()
+    for row in volume_rows:
+        summaries[row['session__user_id']]['weekly_volume'] = round(row['volume'] or 0.0, 1)
+
+    # Query 3: per (athlete, exercise) best weight before vs. during this month.
+    # A PR is an exercise whose best this month beats everything before it.
+    pr_rows = WorkoutLog.objects.filter(
+        session__user_id__in=athlete_ids,
+        session__date__lte=today,
+        weight__isnull=False,
+    ).values('session__user_id', 'exercise_id').annotate(
+        month_best=Max('weight', filter=Q(session__date__gte=month_start)),
+        prior_best=Max('weight', filter=Q(session__date__lt=month_start)),
+    ).filter(month_best__isnull=False).order_by()
+
+    # Query 4: archived history - earlier bests and last session dates from day rollups
+    archived_best = {}
+    for row in ExerciseDayRollup.objects.filter(user_id__in=athlete_ids).values('user_id', 'exercise_id').annotate(
+            prior_best=Max('top_weight', filter=Q(date__lt=month_start)),
+            last_date=Max('date'),
+    ).order_by():
+        archived_best[(row['user_id'], row['exercise_id'])] = row['prior_best']
+        summary = summaries[row['user_id']]
+        if summary['last_session_date'] is None or row['last_date'] > summary['last_session_date']:
+            summary['last_session_date'] = row['last_date']
+
+    prs = defaultdict(int)
+    for row in pr_rows:
+        priors = [row['prior_best'], archived_best.get((row['session__user_id'], row['exercise_id']))]
+        priors = [prior for prior in priors if prior is not None]
+        if priors and row['month_best'] > max(priors):
+            prs[row['session__user_id']] += 1
+    for athlete_id, count in prs.items():
+        summaries[athlete_id]['prs_this_month'] = count
+
+    return summaries
+
+
+def coach_dashboard_rows(coach, athletes_page, today):
+    """
+    Builds (and caches per coach/page/day) the rows shown on one dashboard page.
+    `athletes_page` is a list of (id, username) tuples.
+    """
+    athlete_ids = [athlete_id for athlete_id, _ in athletes_page]
+    page_digest = hashlib.md5(','.join(map(str, athlete_ids)).encode()).hexdigest()
+    cache_key = f"coach_dashboard:{coach.pk}:{today.isoformat()}:{page_digest}"
+    rows = cache.get(cache_key)
+    if rows is None:
+        summaries = athlete_summaries(athlete_ids, today)
+        rows = [
+            dict(summaries[athlete_id], athlete_id=athlete_id, username=username)
+            for athlete_id, username in athletes_page
+        ]
+        cache.set(cache_key, rows, COACH_DASHBOARD_CACHE_SECONDS)
+    return rows
@@ -0,0 +1,194 @@
+# workouts/digest.py
+"""
+Weekly digest emails.
+
+Users are processed in chunks of consecutive ids. Each chunk is summarized
+with a fixed number of grouped queries (four) whatever its size, rendered,
+and sent over a single email backend connection, so the send_weekly_digests
+command can fan chunks out to a process pool and never holds more than a
+few chunks of users in memory.
+
+Only the parent process writes progress: a WeeklyDigestChunk row per
+finished chunk. A crashed or interrupted run resumes by skipping every id
+inside a recorded range; a chunk that was being sent at the time of the
+crash is sent again (at-least-once delivery).
+"""
+import bisect
+import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Max, Q, Sum
+from django.template.loader import render_to_string
+
+from .models import ExerciseDayRollup, WorkoutLog
+
+DIGEST_TEXT_TEMPLATE = 'workouts/email/weekly_digest.txt'
+DIGEST_HTML_TEMPLATE = 'workouts/email/weekly_digest.html'
+
+
+def week_bounds(day):
+    """(Monday, next Monday) of the week containing `day`."""
+    start = day - datetime.timedelta(days=day.weekday())
+    return start, start + datetime.timedelta(days=7)
+
+
+def last_complete_week(today):
+    """Monday of the most recent week that has fully ended before `today`."""
+    return week_bounds(today - datetime.timedelta(days=7))[0]
+
+
+def _change_percent(current, previous):
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100)
+
+
+def compute_digests(user_ids, week_start):
+    """
+    Returns a digest dict per user in `user_ids` who has an email address
+    and trained in the week starting `week_start` or the week before it:
+    sessions, exercises logged, volume and PRs, with last week's numbers.
+    """
+    week_end = week_start + datetime.timedelta(days=7)
+    previous_start = week_start - datetime.timedelta(days=7)
+    this_week = Q(session__date__gte=week_start)
+    volume = ExpressionWrapper(F('sets') * F('reps') * F('weight'), output_field=FloatField())
+
+    # Query 1: recipients
+    users = {
+        user_id: {'username': username, 'first_name': first_name, 'email': email}
+        for user_id, username, first_name, email in User.objects.filter(
+            pk__in=user_ids, is_active=True).exclude(email='').values_list('pk', 'username', 'first_name', 'email')
+    }
+    if not users:
+        return []
+
+    # Query 2: sessions, logs and volume for this week and the week before
+    totals = {
+        row['session__user_id']: row
+        for row in WorkoutLog.objects.filter(
+            session__user_id__in=users.keys(),
+            session__date__gte=previous_start,
+            session__date__lt=week_end,
+        ).values('session__user_id').annotate(
+            sessions=Count('session', distinct=True, filter=this_week),
+            previous_sessions=Count('session', distinct=True, filter=~this_week),
+            logs=Count('id', filter=this_week),
+            volume=Sum(volume, filter=this_week),
+            previous_volume=Sum(volume, filter=~this_week),
+        ).order_by()
+    }
+    if not totals:
+        return []
+
+    # Query 3: per (user, exercise) best weight this week and before it.
+    # As on the coach dashboard, a PR beats every earlier weight for that exercise.
+    pr_rows = WorkoutLog.objects.filter(
+        session__user_id__in=totals.keys(),
+        session__date__lt=week_end,
+        weight__isnull=False,
+    ).values('session__user_id', 'exercise_id', 'exercise__name').annotate(
+        week_best=Max('weight', filter=this_week),
+        prior_best=Max('weight', filter=~this_week),
+    ).filter(week_best__isnull=False).order_by()
+    pr_rows = list(pr_rows)  # Also feeds query 4's exercise filter
+
+    # Query 4: earlier bests from archived history
+    archived_best = {
+        (row['user_id'], row['exercise_id']): row['prior_best']
+        for row in ExerciseDayRollup.objects.filter(
+            user_id__in=totals.keys(),
+            exercise_id__in={row['exercise_id'] for row in pr_rows},
+            date__lt=week_start,
+            top_weight__isnull=False,
+        ).values('user_id', 'exercise_id').annotate(prior_best=Max('top_weight')).order_by()
+    } if pr_rows else {}
+
+    prs = {}
+    for row in pr_rows:
+        priors = [row['prior_best'], archived_best.get((row['session__user_id'], row['exercise_id']))]
+        priors = [prior for prior in priors if prior is not None]
+        if priors and row['week_best'] > max(priors):
+            prs.setdefault(row['session__user_id'], []).append(
+                {'exercise': row['exercise__name'], 'weight': row['week_best']})
+
+    digests = []
+    for user_id, row in sorted(totals.items()):
+        user = users[user_id]
+        volume_total = round(row['volume'] or 0.0, 1)
+        previous_volume = round(row['previous_volume'] or 0.0, 1)
+        digests.append({
+            'user_id': user_id,
+            'username': user['username'],
+            'name': user['first_name'] or user['username'],
+            'email': user['email'],
+            'week_start': week_start,
+            'week_end': week_end - datetime.timedelta(days=1),
+            'sessions': row['sessions'],
+            'previous_sessions': row['previous_sessions'],
+            'logs': row['logs'],
+            'volume': volume_total,
+            'previous_volume': previous_volume,
+            'volume_change_percent': _change_percent(volume_total, previous_volume),
+            'prs': sorted(prs.get(user_id, []), key=lambda pr: pr['exercise']),
+        })
+    return digests
+
+
+def render_digest(digest, connection=None):
+    subject = f"Your training week: {digest['week_start']:%b %d} - {digest['week_end']:%b %d}"
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=render_to_string(DIGEST_TEXT_TEMPLATE, digest),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[digest['email']],
+        connection=connection,
+    )
+    message.attach_alternative(render_to_string(DIGEST_HTML_TEMPLATE, digest), 'text/html')
+    return message
+
+
+def send_digest_chunk(user_ids, week_start):
+    """
+    Summarizes, renders and sends the digests for one chunk of user ids
+    over one backend connection. Runs in pool workers, so it only reads.
+    Returns (first id, last id, sent, skipped).
+    """
+    digests = compute_digests(user_ids, week_start)
+    sent = 0
+    if digests:
+        with get_connection() as connection:
+            sent = connection.send_messages([render_digest(digest, connection) for digest in digests]) or 0
+    return user_ids[0], user_ids[-1], sent, len(user_ids) - sent
+
+
+def pending_chunks(users, done_ranges, chunk_size):
+    """
+    Yields lists of at most `chunk_size` ascending user ids from the `users`
+    queryset, paging by primary key (one query per page, never the whole
+    table) and leaving out ids inside any of the (first, last) `done_ranges`.
+    """
+    merged = []  # A resumed chunk's range can span ranges finished earlier, so merge overlaps first
+    for first, last in sorted(done_ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    done_ranges = merged
+    starts = [first for first, _ in done_ranges]
+
+    def done(user_id):
+        index = bisect.bisect_right(starts, user_id) - 1
+        return index >= 0 and user_id <= done_ranges[index][1]
+
+    after = 0
+    while True:
+        page = list(users.filter(pk__gt=after).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not page:
+            return
+        after = page[-1]
+        chunk = [user_id for user_id in page if not done(user_id)]
+        if chunk:
+            yield chunk
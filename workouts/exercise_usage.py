@@ -0,0 +1,44 @@
+# workouts/exercise_usage.py
+"""
+Most-used exercises for the log page picker.
+
+Usage counts live on the ExercisePerformance index (session_count plus
+last_date for recency), which recommendations.py keeps current as sessions
+are saved, so ranking a user's exercises reads at most FREQUENT_EXERCISE_LIMIT
+index rows instead of grouping their whole WorkoutLog history. The ranked
+ids are cached per user and dropped whenever the index is written.
+"""
+import datetime
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import ExercisePerformance
+
+FREQUENT_EXERCISE_LIMIT = 8
+FREQUENT_WINDOW_DAYS = 180  # Exercises not done in this long drop out of the shortlist
+FREQUENT_CACHE_SECONDS = 24 * 60 * 60
+
+
+def _cache_key(user_id):
+    return f"frequent_exercises:{user_id}"
+
+
+def invalidate_frequent_exercises(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def frequent_exercise_ids(user):
+    """Ids of the user's most used recent exercises, most used first (ties: most recent); cached."""
+    key = _cache_key(user.pk)
+    exercise_ids = cache.get(key)
+    if exercise_ids is not None:
+        return exercise_ids
+    cutoff = timezone.now().date() - datetime.timedelta(days=FREQUENT_WINDOW_DAYS)
+    exercise_ids = list(
+        ExercisePerformance.objects.filter(user=user, last_date__gte=cutoff, session_count__gt=0)
+        .order_by('-session_count', '-last_date', 'exercise_id')
+        .values_list('exercise_id', flat=True)[:FREQUENT_EXERCISE_LIMIT]
+    )
+    cache.set(key, exercise_ids, FREQUENT_CACHE_SECONDS)
+    return exercise_ids
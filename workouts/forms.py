@@ -3,7 +3,9 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, UsernameField
 from django.contrib.auth.models import User
 from django.forms.widgets import TextInput, EmailInput, PasswordInput
-from .models import UserProfile, Exercise
+from django.db.models import Q
+
+from .models import UserProfile, Exercise, Routine, RoutineItem
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -64,9 +66,12 @@ class UserProfileForm(forms.ModelForm):
     class Meta:
         model = UserProfile
         fields = ('timezone',)  # Only allow editing the timezone field for now
-        # widgets = { # Optional: Use a better widget if desired
-        #     'timezone': forms.Select(attrs={'class': 'form-select'})
-        # }
+        widgets = {  # Typeahead text input; suggestions come from the timezone endpoints (see timezones.py)
+            'timezone': TextInput(attrs={
+                'class': 'form-control', 'list': 'timezoneOptions', 'autocomplete': 'off',
+                'spellcheck': 'false', 'placeholder': 'Start typing a city or region',
+            }),
+        }
 
 
 # --- Form for Adding Custom Exercises ---
@@ -84,3 +89,52 @@ class CustomExerciseForm(forms.ModelForm):
         labels = {  # Customize labels if needed
             'name': 'Custom Exercise Name',
         }
+
+
+# --- Forms for Saved Routines ---
+class RoutineForm(forms.ModelForm):
+    class Meta:
+        model = Routine
+        fields = ['name', 'notes']
+        widgets = {
+            'name': forms.TextInput(attrs={'placeholder': 'e.g. Push day', 'class': 'form-control'}),
+            'notes': forms.Textarea(attrs={'placeholder': 'Optional', 'class': 'form-control', 'rows': 2}),
+        }
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean_name(self):
+        # unique_together includes user, which isn't a form field, so ModelForm won't check it
+        name = self.cleaned_data['name'].strip()
+        duplicates = Routine.objects.filter(user=self.user, name__iexact=name).exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise forms.ValidationError("You already have a routine with this name.")
+        return name
+
+
+class RoutineItemForm(forms.ModelForm):
+    class Meta:
+        model = RoutineItem
+        fields = ['exercise', 'target_sets', 'target_reps', 'target_weight']
+        widgets = {
+            'exercise': forms.Select(attrs={'class': 'form-select form-select-sm'}),
+            'target_sets': forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'min': 0}),
+            'target_reps': forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'min': 0}),
+            'target_weight': forms.NumberInput(attrs={'class': 'form-control form-control-sm', 'min': 0,
+                                                      'step': '0.01'}),
+        }
+        labels = {'target_sets': 'Sets', 'target_reps': 'Reps', 'target_weight': 'Weight (kg)'}
+
+    def __init__(self, *args, user, exercise_choices=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['exercise'].queryset = Exercise.objects.filter(Q(user=None) | Q(user=user))
+        if exercise_choices is not None:
+            # Rendered options computed once for the whole formset instead of one query per form
+            self.fields['exercise'].choices = exercise_choices
+
+
+RoutineItemFormSet = forms.inlineformset_factory(
+    Routine, RoutineItem, form=RoutineItemForm, extra=2, min_num=1, validate_min=True, can_delete=True,
+)
@@ -0,0 +1,57 @@
+# workouts/insights.py
+"""
+Freshness of the precomputed Insights page.
+
+Every change to a user's training data - a session or log saved or
+deleted (signal handlers below), a bulk save, an archived or restored
+month - replaces the user's data version, a token kept in the cache.
+compute_insights jobs carry the version they were computed from in their
+payload, so a result is stale exactly when the two differ. An evicted
+version is simply issued again, which costs one recompute.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bulk import in_bulk_change
+from .models import WorkoutLog, WorkoutSession
+
+
+def _cache_key(user_id):
+    return f"training_data_version:{user_id}"
+
+
+def data_version(user_id):
+    """The current version of the user's training data."""
+    version = cache.get(_cache_key(user_id))
+    if version is None:
+        cache.add(_cache_key(user_id), uuid.uuid4().hex, None)  # A concurrent request may have issued one first
+        version = cache.get(_cache_key(user_id))
+    return version
+
+
+def bump_data_version(user_id):
+    cache.set(_cache_key(user_id), uuid.uuid4().hex, None)
+
+
+@receiver(post_save, sender=WorkoutSession)
+@receiver(post_delete, sender=WorkoutSession)
+def _session_changed(sender, instance, raw=False, **kwargs):
+    if not raw and not in_bulk_change():  # Bulk moves bump the version themselves
+        bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=WorkoutLog)
+@receiver(post_delete, sender=WorkoutLog)
+def _log_changed(sender, instance, raw=False, **kwargs):
+    if raw or in_bulk_change():
+        return
+    if WorkoutLog.session.is_cached(instance):
+        user_id = instance.session.user_id
+    else:
+        user_id = WorkoutSession.objects.filter(pk=instance.session_id).values_list('user_id', flat=True).first()
+        if user_id is None:
+            return  # Session already gone; its own post_delete bumped the version
+    bump_data_version(user_id)
@@ -0,0 +1,252 @@
+# workouts/jobs.py
+"""
+Lightweight database-backed job queue.
+
+Heavy work (exports, analytics recomputation, index rebuilds) is enqueued
+as a BackgroundJob row and executed by `python manage.py run_jobs`, so
+request workers only ever insert a row and poll its status.
+
+Tasks are plain functions registered with @task('name'); they receive a
+JobContext for reporting progress plus the job's payload as kwargs:
+
+    @task('export_workouts_csv')
+    def export_workouts_csv(ctx, user_id):
+        ...
+        ctx.set_progress(50)
+        return {'filename': ...}   # stored as the job result
+
+While a job runs, its worker refreshes heartbeat_at; a running job whose
+heartbeat stops (its worker died) is retried. Tasks should call
+ctx.check_timeout() (set_progress does) so they stop at their timeout;
+the worker also fails or retries any job past started_at + timeout_seconds
+and stops heartbeating it, so a hung task cannot hold its job forever. Outcomes are only recorded
+by the attempt that currently owns the job, so a worker that lost a job
+to a retry cannot overwrite it. Finished jobs are purged after
+settings.BACKGROUND_JOBS_RETENTION_DAYS.
+"""
+import datetime
+import logging
+import os
+import time
+import traceback
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+RETRY_BACKOFF_SECONDS = 10  # Doubled after every failed attempt
+HEARTBEAT_INTERVAL_SECONDS = 15  # How often run_jobs refreshes heartbeat_at of the jobs it runs
+HEARTBEAT_TIMEOUT_SECONDS = 90   # A running job silent for this long is presumed dead
+
+_TASKS = {}
+
+
+class JobTimeout(Exception):
+    """Raised inside a task when it runs past its job's timeout."""
+
+
+def task(name):
+    """Registers a function as a background task under `name`."""
+    def decorator(func):
+        _TASKS[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _TASKS.get(name)
+
+
+class JobContext:
+    """Handed to running tasks for progress reporting and cooperative timeouts."""
+
+    def __init__(self, job):
+        self.job = job
+        self._deadline = time.monotonic() + job.timeout_seconds
+        self._last_progress = job.progress
+
+    def check_timeout(self):
+        if time.monotonic() > self._deadline:
+            raise JobTimeout(f"Job exceeded its {self.job.timeout_seconds}s timeout.")
+
+    def set_progress(self, percent):
+        """Records progress (0-100); writes only when the value changes. Also checks the timeout."""
+        percent = max(0, min(100, int(percent)))
+        if percent != self._last_progress:
+            BackgroundJob.objects.filter(pk=self.job.pk).update(progress=percent)
+            self._last_progress = percent
+        self.check_timeout()
+
+
+def enqueue(task_name, user=None, payload=None, dedupe=False, **options):
+    """
+    Creates a queued job and returns it. With dedupe=True an existing queued
+    or running job for the same user and task is returned instead.
+    `options` may set max_attempts / timeout_seconds.
+    """
+    if get_task(task_name) is None:
+        raise ValueError(f"Unknown background task '{task_name}'.")
+
+    if dedupe:
+        existing = BackgroundJob.objects.filter(
+            user=user, task=task_name,
+            status__in=[BackgroundJob.STATUS_QUEUED, BackgroundJob.STATUS_RUNNING],
+        ).order_by('-created_at').first()
+        if existing is not None:
+            return existing
+
+    job = BackgroundJob.objects.create(user=user, task=task_name, payload=payload or {}, **options)
+    if getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+        # Development/testing shortcut: run immediately in this process
+        if claim(job, worker='eager'):
+            run_job(job)
+            job.refresh_from_db()
+    return job
+
+
+def claim(job, worker):
+    """Atomically moves a queued job to running. Returns False if another worker won."""
+    now = timezone.now()
+    claimed = BackgroundJob.objects.filter(pk=job.pk, status=BackgroundJob.STATUS_QUEUED).update(
+        status=BackgroundJob.STATUS_RUNNING,
+        started_at=now,
+        heartbeat_at=now,
+        worker=worker,
+        attempts=job.attempts + 1,
+    )
+    if claimed:
+        job.status, job.started_at, job.worker, job.attempts = BackgroundJob.STATUS_RUNNING, now, worker, job.attempts + 1
+    return bool(claimed)
+
+
+def claim_next(worker):
+    """Claims the oldest runnable job, or returns None when the queue is empty."""
+    while True:
+        job = BackgroundJob.objects.filter(
+            status=BackgroundJob.STATUS_QUEUED, run_after__lte=timezone.now()
+        ).order_by('run_after', 'pk').first()
+        if job is None:
+            return None
+        if claim(job, worker):
+            return job
+        # Lost the race to another worker - try the next one
+
+
+def _current_attempt(job):
+    """The job's row while this attempt still owns it (not requeued and re-claimed since)."""
+    return BackgroundJob.objects.filter(pk=job.pk, status=BackgroundJob.STATUS_RUNNING, attempts=job.attempts)
+
+
+def _fail_or_retry(job, error):
+    """Records a failed attempt, scheduling a retry with backoff if attempts remain."""
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        delay = RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+        updated = _current_attempt(job).update(
+            status=BackgroundJob.STATUS_QUEUED,
+            run_after=now + datetime.timedelta(seconds=delay),
+            error=error,
+        )
+        if updated:
+            logger.warning("Job %s attempt %s failed, retrying in %ss", job.pk, job.attempts, delay)
+    else:
+        updated = _current_attempt(job).update(
+            status=BackgroundJob.STATUS_FAILED, finished_at=now, error=error,
+        )
+        if updated:
+            logger.error("Job %s failed permanently after %s attempts", job.pk, job.attempts)
+    if not updated:
+        logger.warning("Job %s attempt %s no longer owns the job; its failure was not recorded",
+                       job.pk, job.attempts)
+
+
+def run_job(job):
+    """Executes a claimed job and records its outcome. Never raises."""
+    try:
+        func = get_task(job.task)
+        if func is None:
+            raise ValueError(f"Unknown background task '{job.task}'.")
+        result = func(JobContext(job), **job.payload)
+        updated = _current_attempt(job).update(
+            status=BackgroundJob.STATUS_SUCCEEDED,
+            progress=100,
+            result=result,
+            error='',
+            finished_at=timezone.now(),
+        )
+        if not updated:
+            logger.warning("Job %s attempt %s finished after losing the job to a retry; result discarded",
+                           job.pk, job.attempts)
+    except JobTimeout as e:
+        _fail_or_retry(job, str(e))
+    except Exception:
+        _fail_or_retry(job, traceback.format_exc())
+    finally:
+        close_old_connections()
+
+
+def heartbeat(jobs):
+    """Marks the given running jobs (attempts still owned by this worker) as alive."""
+    now = timezone.now()
+    for job in jobs:
+        _current_attempt(job).update(heartbeat_at=now)
+
+
+def expire_overdue_jobs(jobs, now=None):
+    """
+    Fails (or schedules a retry of) every job in `jobs` that has run past
+    its timeout, and returns them. Their threads can't be stopped, but the
+    attempts no longer own their jobs, so anything they record later is
+    discarded.
+    """
+    now = now or timezone.now()
+    overdue = [job for job in jobs if now > job.started_at + datetime.timedelta(seconds=job.timeout_seconds)]
+    for job in overdue:
+        _fail_or_retry(job, f"Job exceeded its {job.timeout_seconds}s timeout.")
+    return overdue
+
+
+def requeue_stale_jobs():
+    """
+    Treats running jobs whose heartbeat stopped (their worker died or hung)
+    as failed attempts so they are retried or marked failed. Jobs that are
+    merely slow keep their worker's heartbeat and are left alone.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=HEARTBEAT_TIMEOUT_SECONDS)
+    stale = BackgroundJob.objects.filter(status=BackgroundJob.STATUS_RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),  # Claimed before heartbeats
+    )
+    count = 0
+    for job in stale.only('pk', 'attempts', 'max_attempts'):
+        _fail_or_retry(job, "The job's worker stopped responding.")
+        count += 1
+    return count
+
+
+def purge_finished_jobs(now=None):
+    """
+    Deletes succeeded and failed jobs that finished more than
+    BACKGROUND_JOBS_RETENTION_DAYS ago, with the export files they produced.
+    Returns the number of jobs deleted.
+    """
+    now = now or timezone.now()
+    cutoff = now - datetime.timedelta(days=settings.BACKGROUND_JOBS_RETENTION_DAYS)
+    expired = BackgroundJob.objects.filter(
+        status__in=[BackgroundJob.STATUS_SUCCEEDED, BackgroundJob.STATUS_FAILED], finished_at__lt=cutoff,
+    )
+    exports_root = os.path.realpath(settings.EXPORTS_ROOT)
+    for result in expired.filter(task='export_workouts_csv', status=BackgroundJob.STATUS_SUCCEEDED).values_list(
+            'result', flat=True).iterator():
+        path = os.path.realpath(os.path.join(exports_root, (result or {}).get('filename', '')))
+        if path.startswith(exports_root + os.sep):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    deleted, _ = expired.delete()
+    return deleted
@@ -0,0 +1,151 @@
+# workouts/live_feed.py
+"""
+Live coach feed: in-process pub/sub fanned out over Server-Sent Events.
+
+Each open feed connection is a coroutine parked on a small bounded
+asyncio.Queue, so idle connections cost no threads and almost no memory.
+Publishing is thread-safe: save_workout_view runs in Django's sync thread
+under ASGI and hands events to the event loop with call_soon_threadsafe.
+
+Events only reach coaches connected to the same server process. Running
+several ASGI workers needs a shared broker behind the same
+publish/subscribe interface.
+
+Under WSGI (runserver, the default deployment) a streaming response would
+pin a worker thread per open dashboard, so the feed answers 204 - which
+tells EventSource not to reconnect - and the dashboard falls back to
+polling recent_workouts() instead.
+"""
+import asyncio
+import itertools
+import json
+import threading
+
+from django.db.models import Count
+
+from .models import CoachingRelationship, WorkoutSession
+
+SUBSCRIBER_QUEUE_SIZE = 50    # Per-connection buffer before old events are dropped
+HEARTBEAT_SECONDS = 20        # Keeps proxies from closing idle connections
+CLIENT_RETRY_MS = 5000        # EventSource reconnect delay sent to the browser
+POLL_INTERVAL_MS = 30000      # Dashboard polling interval when the feed can't stream (WSGI)
+POLL_LIMIT = 50               # Newest workouts returned per poll
+
+
+class Subscriber:
+    __slots__ = ('coach_id', 'queue', 'dropped')
+
+    def __init__(self, coach_id):
+        self.coach_id = coach_id
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+
+class FeedBroker:
+    """Tracks connected coaches and delivers events to their queues."""
+
+    def __init__(self):
+        self._subscribers = {}  # {coach_id: set(Subscriber)}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._event_ids = itertools.count(1)
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def subscribe(self, coach_id):
+        """Registers a feed connection. Must be called from the event loop."""
+        subscriber = Subscriber(coach_id)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(coach_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.coach_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.coach_id]
+
+    def publish(self, coach_ids, event_type, data):
+        """Sends an event to every open connection of the given coaches. Safe from any thread."""
+        with self._lock:
+            targets = [sub for coach_id in coach_ids for sub in self._subscribers.get(coach_id, ())]
+            loop = self._loop
+        if not targets or loop is None or loop.is_closed():
+            return
+        message = format_sse(event_type, data, event_id=next(self._event_ids))
+        loop.call_soon_threadsafe(self._deliver, targets, message)
+
+    @staticmethod
+    def _deliver(targets, message):
+        for subscriber in targets:
+            # Backpressure: a slow client loses its oldest events, never blocks the publisher
+            if subscriber.queue.full():
+                subscriber.queue.get_nowait()
+                subscriber.dropped += 1
+            subscriber.queue.put_nowait(message)
+
+
+broker = FeedBroker()
+
+
+def format_sse(event_type, data, event_id=None):
+    """Encodes one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(coach_id):
+    """Async generator yielding SSE messages (and heartbeats) for one coach connection."""
+    subscriber = broker.subscribe(coach_id)
+    try:
+        yield f"retry: {CLIENT_RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"  # Comment line - ignored by EventSource
+                continue
+            if subscriber.dropped:
+                yield format_sse('dropped', {'count': subscriber.dropped})
+                subscriber.dropped = 0
+            yield message
+    finally:
+        # Runs when the client disconnects (the ASGI handler cancels the generator)
+        broker.unsubscribe(subscriber)
+
+
+def publish_workout_saved(athlete, workout_session, log_count):
+    """Notifies the athlete's connected coaches that a workout was saved."""
+    if not broker.has_subscribers():
+        return  # Nobody is listening - skip the relationship query entirely
+    coach_ids = list(
+        CoachingRelationship.objects.filter(athlete=athlete).values_list('coach_id', flat=True)
+    )
+    if coach_ids:
+        broker.publish(coach_ids, 'workout_saved', {
+            'athlete': athlete.username,
+            'date': workout_session.date.strftime('%Y-%m-%d'),
+            'exercises': log_count,
+        })
+
+
+def recent_workouts(coach_id, since):
+    """
+    Polling fallback: workouts the coach's athletes created after `since`
+    (oldest first, at most POLL_LIMIT), shaped like 'workout_saved' events.
+    """
+    rows = WorkoutSession.objects.filter(
+        user__coaches__coach_id=coach_id, created_at__gt=since,
+    ).annotate(exercises=Count('logs')).order_by('-created_at').values('user__username', 'date', 'exercises')
+    return [
+        {'athlete': row['user__username'], 'date': row['date'].strftime('%Y-%m-%d'), 'exercises': row['exercises']}
+        for row in reversed(rows[:POLL_LIMIT])
+    ]
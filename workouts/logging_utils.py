@@ -0,0 +1,140 @@
+# workouts/logging_utils.py
+"""
+Structured, non-blocking logging.
+
+Request threads only put records on an in-memory queue (QueueListenerHandler);
+a single listener thread formats them as JSON lines and does the actual I/O.
+Each record carries the current request's id, user id and view name
+(set by RequestLogMiddleware), and repeated warnings/errors are rate-limited
+per call site so a failure loop cannot flood the output.
+
+Wired up through settings.LOGGING.
+"""
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+_request_context = contextvars.ContextVar('request_log_context', default={})
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is logged as a field
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_CONTEXT_FIELDS = ('request_id', 'user_id', 'view')
+
+
+def set_request_context(**fields):
+    """Binds fields (request_id, user_id, view) to every record logged in this request."""
+    _request_context.set({**_request_context.get(), **fields})
+
+
+def clear_request_context():
+    _request_context.set({})
+
+
+class RequestContextFilter(logging.Filter):
+    """Copies the request context onto records. Runs in the calling thread, before queuing."""
+
+    def filter(self, record):
+        context = _request_context.get()
+        for field in _CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field))
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most `burst` WARNING+ records per call site (logger, level,
+    message template) through every `period` seconds. The first record let
+    through after a suppressed run carries `suppressed` = records dropped.
+    """
+
+    def __init__(self, period=60, burst=5, name=''):
+        super().__init__(name)
+        self.period = period
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._windows = {}  # {key: [window_start, emitted, suppressed]}
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.levelno, record.pathname, record.lineno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                if len(self._windows) > 1000:  # Forget call sites whose window has expired
+                    self._windows = {k: w for k, w in self._windows.items() if now - w[0] < self.period}
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, context and extra fields."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field, value in vars(record).items():
+            if field not in _RESERVED_ATTRS and value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Queues records and hands them to the named handlers on a background
+    QueueListener thread, which is started here and drained at exit.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True):
+        super().__init__(queue.SimpleQueue())
+        targets = []
+        for name in handlers:
+            handler = logging._handlers.get(name)  # Named handlers built earlier by dictConfig
+            if handler is None:
+                # dictConfig retries handlers failing with this message once the others exist
+                raise ValueError(f"Handler {name!r}: target not configured yet")
+            targets.append(handler)
+        self.listener = QueueListener(self.queue, *targets, respect_handler_level=respect_handler_level)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def prepare(self, record):
+        """
+        Makes the record safe to pass between threads without flattening it:
+        the message is interpolated and the traceback rendered to text, but
+        the structured fields stay on the record for the JSON formatter.
+        """
+        record = logging.makeLogRecord(vars(record))
+        record.__dict__.pop('request', None)  # django.request attaches the HttpRequest; keep it on this thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
@@ -0,0 +1,64 @@
+# workouts/management/commands/archive_workouts.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from workouts.archive import archive_cutoff, archive_month, restore_month
+from workouts.models import WorkoutSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves whole months of workout sessions older than the retention horizon into "
+        "compressed per-user archive files, leaving day-level rollups behind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=None,
+                            help="Retention horizon in days (default: settings.ARCHIVE_AFTER_DAYS).")
+        parser.add_argument('--user', help="Only archive (or restore) this username.")
+        parser.add_argument('--dry-run', action='store_true', help="List the months that would be archived.")
+        parser.add_argument('--restore', metavar='YYYY-MM', help="Restore one archived month (requires --user).")
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            return self._restore(options)
+
+        cutoff = archive_cutoff(timezone.now().date(), options['older_than_days'])
+        sessions = WorkoutSession.objects.filter(date__lt=cutoff)
+        if options['user']:
+            sessions = sessions.filter(user__username=options['user'])
+        months = sessions.annotate(
+            year=ExtractYear('date'), month=ExtractMonth('date')
+        ).values_list('user_id', 'year', 'month').distinct().order_by('user_id', 'year', 'month')
+
+        self.stdout.write(f"Archiving sessions before {cutoff:%Y-%m-%d}.")
+        archived_months = archived_sessions = 0
+        for user_id, year, month in months.iterator():
+            if options['dry_run']:
+                self.stdout.write(f"  would archive user {user_id} {year}-{month:02d}")
+                continue
+            moved = archive_month(user_id, year, month)
+            if moved:
+                archived_months += 1
+                archived_sessions += moved
+                self.stdout.write(f"  user {user_id} {year}-{month:02d}: {moved} session(s)")
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Archived {archived_sessions} session(s) across {archived_months} month(s)."
+            ))
+
+    def _restore(self, options):
+        if not options['user']:
+            raise CommandError("--restore requires --user.")
+        try:
+            year, month = (int(part) for part in options['restore'].split('-'))
+        except ValueError:
+            raise CommandError("--restore expects YYYY-MM.")
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f"Unknown user '{options['user']}'.")
+        restored = restore_month(user, year, month)
+        self.stdout.write(self.style.SUCCESS(f"Restored {restored} session(s) for {year}-{month:02d}."))
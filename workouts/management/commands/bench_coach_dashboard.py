@@ -0,0 +1,82 @@
+# workouts/management/commands/bench_coach_dashboard.py
+import datetime
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from workouts.coaching import ATHLETES_PER_PAGE, athlete_summaries
+from workouts.models import CoachingRelationship, Exercise, WorkoutLog, WorkoutSession
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks coach dashboard aggregation against synthetic athletes. "
+        "All generated data is rolled back when the benchmark finishes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--athletes', type=int, default=500)
+        parser.add_argument('--days', type=int, default=90, help="Days of history per athlete.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("Synthetic data rolled back.")
+
+    def _run(self, options):
+        n_athletes, n_days, repeat = options['athletes'], options['days'], options['repeat']
+        today = datetime.date.today()
+        rng = random.Random(42)
+
+        self.stdout.write(f"Generating {n_athletes} athletes x {n_days} days of history...")
+        coach = User.objects.create(username='__bench_coach__')
+        athletes = User.objects.bulk_create(
+            [User(username=f'__bench_athlete_{i}__') for i in range(n_athletes)]
+        )
+        CoachingRelationship.objects.bulk_create(
+            [CoachingRelationship(coach=coach, athlete=athlete) for athlete in athletes]
+        )
+        exercises = Exercise.objects.bulk_create(
+            [Exercise(name=f'__bench_exercise_{i}__', user=coach) for i in range(5)]
+        )
+        sessions = WorkoutSession.objects.bulk_create([
+            WorkoutSession(user=athlete, date=today - datetime.timedelta(days=offset))
+            for athlete in athletes
+            for offset in range(n_days)
+            if rng.random() < 0.4
+        ])
+        WorkoutLog.objects.bulk_create([
+            WorkoutLog(session=session, exercise=exercise, sets=rng.randint(3, 5),
+                       reps=rng.randint(5, 10), weight=rng.randint(40, 140))
+            for session in sessions
+            for exercise in rng.sample(exercises, 3)
+        ], batch_size=2000)
+        self.stdout.write(f"Created {len(sessions)} sessions.")
+
+        athlete_ids = [athlete.id for athlete in athletes]
+        page_ids = athlete_ids[:ATHLETES_PER_PAGE]
+        for label, ids in ((f"one page ({len(page_ids)} athletes)", page_ids),
+                           (f"all {len(athlete_ids)} athletes", athlete_ids)):
+            timings = []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    athlete_summaries(ids, today)
+                    timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f"{label}: {len(queries)} queries, "
+                f"median {timings[len(timings) // 2] * 1000:.1f} ms, best {timings[0] * 1000:.1f} ms"
+            )
@@ -0,0 +1,70 @@
+# workouts/management/commands/bench_dashboard.py
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from workouts.calendar_cells import build_month_calendar, invalidate_month
+from workouts.views import dashboard_view
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the dashboard calendar for an existing user and month: building the cells "
+        "(cold and cached), rendering dashboard.html, and the whole view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--year', type=int, default=None)
+        parser.add_argument('--month', type=int, default=None)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"Unknown user '{options['username']}'.")
+        today = timezone.localdate()
+        year, month = options['year'] or today.year, options['month'] or today.month
+        repeat = options['repeat']
+
+        request = RequestFactory().get(reverse('workouts:dashboard'), {'year': year, 'month': month})
+        request.user = user
+
+        def build_cold():
+            invalidate_month(user.pk, year, month)
+            build_month_calendar(user, year, month, today)
+
+        weeks = build_month_calendar(user, year, month, today)
+        context = {
+            'calendar_weeks': weeks,
+            'current_month_date': today.replace(year=year, month=month, day=1),
+            'prev_month_date': today,
+            'next_month_date': today,
+            'todays_date_str': today.isoformat(),
+        }
+        self.stdout.write(f"Dashboard {year}-{month:02d} for {user.username}, {repeat} runs each:")
+        self._report("cells, cold (queries + build)", build_cold, max(1, repeat // 10))
+        self._report("cells, cached", lambda: build_month_calendar(user, year, month, today), repeat)
+        self._report("template render", lambda: render_to_string('workouts/dashboard.html', context, request), repeat)
+        self._report("whole view, cached cells", lambda: dashboard_view(request), repeat)
+
+    def _report(self, label, func, repeat):
+        func()  # Warm-up: template loading, first-use imports
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        self.stdout.write(
+            f"{label}: {len(queries)} queries, "
+            f"median {timings[len(timings) // 2] * 1000:.2f} ms, best {timings[0] * 1000:.2f} ms"
+        )
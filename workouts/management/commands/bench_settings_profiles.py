@@ -0,0 +1,97 @@
+# workouts/management/commands/bench_settings_profiles.py
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+PROFILES = ('development', 'production')
+PAGES = (
+    ('dashboard', 'workouts:dashboard'),
+    ('history', 'workouts:history'),
+    ('insights', 'workouts:insights'),
+    ('monthly report', 'workouts:monthly_report'),
+    ('profile', 'workouts:profile'),
+    ('api sessions', 'api_v1:sessions'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the development and production settings profiles: runs itself once per "
+        "GYM_TRACKER_ENV in a subprocess, times the main pages for an existing user with "
+        "the test client and prints the results side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--repeat', type=int, default=100)
+        parser.add_argument('--child', action='store_true', help="Internal: time the current profile as JSON.")
+
+    def handle(self, *args, **options):
+        if options['child']:
+            self.stdout.write(json.dumps(self._time_pages(options['username'], options['repeat'])))
+            return
+
+        results = {profile: self._run_profile(profile, options) for profile in PROFILES}
+        self.stdout.write(
+            f"{'page':<18}{'dev median':>12}{'prod median':>13}{'dev bytes':>11}{'prod bytes':>12}{'speedup':>9}"
+        )
+        for label, _ in PAGES:
+            dev, prod = results['development'][label], results['production'][label]
+            self.stdout.write(
+                f"{label:<18}{dev['median_ms']:>9.2f} ms{prod['median_ms']:>10.2f} ms"
+                f"{dev['bytes']:>11}{prod['bytes']:>12}{dev['median_ms'] / prod['median_ms']:>8.2f}x"
+            )
+
+    def _run_profile(self, profile, options):
+        env = dict(
+            os.environ,
+            GYM_TRACKER_ENV=profile,
+            DJANGO_ALLOWED_HOSTS='testserver',
+            # Only for this benchmark run; production refuses to start with the development key
+            DJANGO_SECRET_KEY=os.environ.get('DJANGO_SECRET_KEY') or 'bench-' + 'x' * 50,
+        )
+        command = [sys.executable, sys.argv[0], 'bench_settings_profiles', options['username'],
+                   '--repeat', str(options['repeat']), '--child']
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f"The {profile} run failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def _time_pages(self, username, repeat):
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            raise CommandError(f"Unknown user '{username}'.")
+        setup_test_environment()
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            if settings.PRODUCTION:
+                call_command('collectstatic', interactive=False, verbosity=0)  # Manifest for hashed names
+            client = Client(HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+            client.force_login(user)
+            return {label: self._time_page(client, reverse(url_name), repeat) for label, url_name in PAGES}
+
+    def _time_page(self, client, url, repeat):
+        response = client.get(url)  # Warm-up: template loading, first-use imports
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} returned {response.status_code}.")
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return {
+            'median_ms': timings[len(timings) // 2] * 1000,
+            'best_ms': timings[0] * 1000,
+            'bytes': len(response.getvalue()) if not response.streaming else 0,
+        }
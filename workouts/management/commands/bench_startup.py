@@ -0,0 +1,56 @@
+# workouts/management/commands/bench_startup.py
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.startup_probe import DEFAULT_PATH
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks worker cold start: spawns fresh interpreters that load Django and serve one "
+        "request (workouts.startup_probe) and reports process start to first response. "
+        "With --max-ms it fails when the median is slower, for use as a regression gate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=DEFAULT_PATH, help=f"URL of the first request (default {DEFAULT_PATH}).")
+        parser.add_argument('--runs', type=int, default=7)
+        parser.add_argument('--max-ms', type=float, default=None,
+                            help="Fail if the median process start to first response exceeds this.")
+
+    def handle(self, *args, **options):
+        command = [sys.executable, '-m', 'workouts.startup_probe', options['path']]
+        subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True)  # Warm-up: bytecode and OS file cache
+
+        runs = []
+        for _ in range(options['runs']):
+            spawned = time.perf_counter()
+            completed = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True)
+            wall_ms = (time.perf_counter() - spawned) * 1000
+            if completed.returncode != 0:
+                raise CommandError(f"The probe failed:\n{completed.stderr[-4000:]}")
+            probe = json.loads(completed.stdout.strip().splitlines()[-1])
+            probe['wall_ms'] = wall_ms  # Includes interpreter start-up and shutdown
+            runs.append(probe)
+
+        self.stdout.write(
+            f"GET {runs[0]['path']} -> {runs[0]['status']} ({runs[0]['bytes']} bytes, "
+            f"{runs[0]['modules']} modules loaded), {len(runs)} cold starts:"
+        )
+        for label, key in (("django.setup() + WSGI app", 'setup_ms'),
+                           ("first response", 'first_response_ms'),
+                           ("process spawn to exit", 'wall_ms')):
+            timings = sorted(run[key] for run in runs)
+            self.stdout.write(
+                f"  {label:<26} median {timings[len(timings) // 2]:7.1f} ms  "
+                f"best {timings[0]:7.1f} ms  worst {timings[-1]:7.1f} ms"
+            )
+
+        median = sorted(run['first_response_ms'] for run in runs)[len(runs) // 2]
+        if options['max_ms'] is not None and median > options['max_ms']:
+            raise CommandError(f"Cold start regression: median first response {median:.1f} ms > {options['max_ms']:.1f} ms.")
@@ -0,0 +1,79 @@
+# workouts/management/commands/import_profile.py
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.startup_probe import DEFAULT_PATH
+
+
+def parse_importtime(lines):
+    """[(module, self_us, cumulative_us, depth)] from `python -X importtime` output."""
+    rows = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Digest of `python -X importtime` for a cold worker: starts a fresh interpreter that loads "
+        "Django and serves one request (workouts.startup_probe), then lists the slowest imports, "
+        "import time per top-level package and the project's own modules."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=DEFAULT_PATH, help=f"URL of the first request (default {DEFAULT_PATH}).")
+        parser.add_argument('--limit', type=int, default=20, help="Rows per table (default 20).")
+        parser.add_argument('--raw', help="Also write the unprocessed importtime output to this file.")
+
+    def handle(self, *args, **options):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'workouts.startup_probe', options['path']],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f"The probe failed:\n{completed.stderr[-4000:]}")
+        if options['raw']:
+            with open(options['raw'], 'w') as raw_file:
+                raw_file.write(completed.stderr)
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(completed.stderr.splitlines())
+        limit = options['limit']
+
+        total_us = sum(self_us for _, self_us, _, _ in rows)
+        self.stdout.write(
+            f"GET {probe['path']} -> {probe['status']}: first response after {probe['first_response_ms']:.0f} ms "
+            f"(setup {probe['setup_ms']:.0f} ms), {len(rows)} modules imported in {total_us / 1000:.0f} ms"
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nSlowest imports (cumulative, top-level imports only)"))
+        roots = sorted((row for row in rows if row[3] == 0), key=lambda row: row[2], reverse=True)
+        for name, _, cumulative_us, _ in roots[:limit]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nImport time by package (self time)"))
+        packages = defaultdict(lambda: [0, 0])
+        for name, self_us, _, _ in rows:
+            package = packages[name.split('.')[0]]
+            package[0] += self_us
+            package[1] += 1
+        for package, (self_us, count) in sorted(packages.items(), key=lambda item: item[1][0], reverse=True)[:limit]:
+            self.stdout.write(f"  {self_us / 1000:8.1f} ms  {package} ({count} modules)")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nProject modules (cumulative, including what they import)"))
+        project_packages = {
+            entry for entry in os.listdir(settings.BASE_DIR)
+            if os.path.isfile(os.path.join(settings.BASE_DIR, entry, '__init__.py'))
+        }
+        project = [row for row in rows if row[0].split('.')[0] in project_packages]
+        for name, _, cumulative_us, _ in sorted(project, key=lambda row: row[2], reverse=True)[:limit]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {name}")
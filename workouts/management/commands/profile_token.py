@@ -0,0 +1,24 @@
+# workouts/management/commands/profile_token.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.profiling import PROFILE_QUERY_PARAM, make_profile_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Issues a signed profile token for a user. Requests that user makes with the token "
+        "(X-Profile-Token header or ?_profile=<token>) are profiled and stored for the admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"Unknown user '{options['username']}'.")
+        token = make_profile_token(user)
+        self.stdout.write(token)
+        self.stdout.write(f"Header: X-Profile-Token: {token}")
+        self.stdout.write(f"Query:  ?{PROFILE_QUERY_PARAM}={token}")
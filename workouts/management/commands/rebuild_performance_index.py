@@ -0,0 +1,22 @@
+# workouts/management/commands/rebuild_performance_index.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from workouts.recommendations import rebuild_performance_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-(user, exercise) ExercisePerformance index used for log page suggestions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild for this username.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        total_rows = 0
+        for user in users.iterator():
+            total_rows += rebuild_performance_index(user)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total_rows} exercise performance rows."))
@@ -0,0 +1,14 @@
+# workouts/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand, CommandError
+
+from workouts.search import is_supported, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text notes search index from workout history, including archived months."
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError("Notes search needs SQLite (FTS5) or PostgreSQL.")
+        total = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} note entries."))
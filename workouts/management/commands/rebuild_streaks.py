@@ -0,0 +1,23 @@
+# workouts/management/commands/rebuild_streaks.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from workouts.streaks import rebuild_streak
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-user training streak records shown on the dashboard."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild for this username.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        count = 0
+        for user in users.iterator():
+            rebuild_streak(user)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt streak records for {count} users."))
@@ -0,0 +1,89 @@
+# workouts/management/commands/run_jobs.py
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from workouts.jobs import (HEARTBEAT_INTERVAL_SECONDS, claim_next, expire_overdue_jobs, heartbeat,
+                           purge_finished_jobs, requeue_stale_jobs, run_job)
+
+PURGE_INTERVAL_SECONDS = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs (exports, analytics recomputation, index rebuilds) in a thread pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help="Jobs executed concurrently.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between queue checks when idle.")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is drained.")
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        poll_interval = options['poll_interval']
+        worker_name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+
+        self.stdout.write(f"Job worker {worker_name} started with {threads} thread(s).")
+        running = {}  # future -> job
+        abandoned = set()  # Futures of timed-out tasks; their threads stay busy until the task returns
+        last_heartbeat = time.monotonic()
+        last_purge = None
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='job') as pool:
+            try:
+                while not self._stopping:
+                    requeued = requeue_stale_jobs()
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f"Re-queued {requeued} stale job(s)."))
+
+                    if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS:
+                        purged = purge_finished_jobs()
+                        if purged:
+                            self.stdout.write(f"Purged {purged} finished job(s) past retention.")
+                        last_purge = time.monotonic()
+
+                    running = self._expire_overdue(
+                        {future: job for future, job in running.items() if not future.done()}, abandoned)
+                    abandoned = {future for future in abandoned if not future.done()}
+                    if running and time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL_SECONDS:
+                        heartbeat(running.values())
+                        last_heartbeat = time.monotonic()
+                    claimed_any = False
+                    while len(running) + len(abandoned) < threads:
+                        job = claim_next(worker_name)
+                        if job is None:
+                            break
+                        claimed_any = True
+                        self.stdout.write(f"Running {job.task} #{job.pk} (attempt {job.attempts}/{job.max_attempts})")
+                        running[pool.submit(run_job, job)] = job
+
+                    if options['once'] and not running and not claimed_any:
+                        break
+                    if not claimed_any:
+                        time.sleep(poll_interval)
+            except KeyboardInterrupt:
+                pass
+            self.stdout.write("Waiting for running jobs to finish...")
+            while running:  # Keep them alive meanwhile, or another worker would take them over
+                finished, _ = wait(running, timeout=HEARTBEAT_INTERVAL_SECONDS)
+                running = self._expire_overdue(
+                    {future: job for future, job in running.items() if future not in finished}, abandoned)
+                heartbeat(running.values())
+            if any(not future.done() for future in abandoned):
+                self.stdout.write(self.style.WARNING("Timed-out tasks are still running; exit waits for them."))
+        self.stdout.write(self.style.SUCCESS("Job worker stopped."))
+
+    def _expire_overdue(self, running, abandoned):
+        """Gives up on jobs past their timeout: they are failed or retried and no longer heartbeated."""
+        overdue = expire_overdue_jobs(running.values())
+        for job in overdue:
+            self.stdout.write(self.style.WARNING(f"{job.task} #{job.pk} timed out after {job.timeout_seconds}s."))
+        abandoned.update(future for future, job in running.items() if job in overdue)
+        return {future: job for future, job in running.items() if job not in overdue}
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
@@ -0,0 +1,136 @@
+# workouts/management/commands/send_weekly_digests.py
+import datetime
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from workouts.digest import last_complete_week, pending_chunks, send_digest_chunk, week_bounds
+from workouts.models import WeeklyDigestChunk, WeeklyDigestRun
+
+
+class Command(BaseCommand):
+    help = (
+        "Emails every user a summary of their training week (sessions, volume, PRs, change from the week "
+        "before). Users are sent in chunks across a process pool; an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--week', metavar='YYYY-MM-DD',
+                            help="Any day of the week to summarize (default: the last complete week).")
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Users per chunk (default: settings.WEEKLY_DIGEST_CHUNK_SIZE).")
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help="Worker processes; 0 sends from this process.")
+        parser.add_argument('--max-chunks', type=int, default=None,
+                            help="Stop after this many chunks; run again to resume.")
+        parser.add_argument('--restart', action='store_true',
+                            help="Forget this week's progress and send to everyone again.")
+
+    def handle(self, *args, **options):
+        if options['week']:
+            try:
+                day = datetime.datetime.strptime(options['week'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--week expects YYYY-MM-DD.")
+            week_start = week_bounds(day)[0]
+        else:
+            week_start = last_complete_week(timezone.localdate())
+        chunk_size = options['chunk_size'] or settings.WEEKLY_DIGEST_CHUNK_SIZE
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        run, created = WeeklyDigestRun.objects.get_or_create(week_start=week_start)
+        if options['restart'] and not created:
+            run.chunks.all().delete()
+            run.finished_at, run.sent_count, run.skipped_count = None, 0, 0
+            run.save(update_fields=['finished_at', 'sent_count', 'skipped_count'])
+        elif run.finished_at:
+            self.stdout.write(f"Digests for the week of {week_start:%Y-%m-%d} were already sent "
+                              f"({run.sent_count} sent). Use --restart to send them again.")
+            return
+
+        done_ranges = list(run.chunks.values_list('first_user_id', 'last_user_id'))
+        if done_ranges:
+            self.stdout.write(f"Resuming the week of {week_start:%Y-%m-%d}: {len(done_ranges)} chunk(s) "
+                              f"and {run.sent_count} digest(s) already sent.")
+        else:
+            self.stdout.write(f"Sending digests for the week of {week_start:%Y-%m-%d}.")
+
+        users = User.objects.filter(is_active=True).exclude(email='')
+        chunks = self._limited(pending_chunks(users, done_ranges, chunk_size), options['max_chunks'])
+
+        self._run, self._sent, self._chunks, self._stopped_early = run, 0, 0, False
+        started = time.perf_counter()
+        if options['workers'] > 0:
+            self._send_in_pool(chunks, week_start, options['workers'])
+        else:
+            for chunk in chunks:
+                self._record(send_digest_chunk(chunk, week_start))
+
+        if not self._stopped_early:
+            run.finished_at = timezone.now()
+            run.save(update_fields=['finished_at'])
+        run.refresh_from_db()
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {self._sent} digest(s) in {self._chunks} chunk(s) in {time.perf_counter() - started:.1f}s "
+            f"({run.sent_count} sent, {run.skipped_count} skipped for the week so far"
+            f"{'; run again to resume' if self._stopped_early else ''})."
+        ))
+
+    def _limited(self, chunks, max_chunks):
+        for count, chunk in enumerate(chunks):
+            if max_chunks is not None and count >= max_chunks:
+                self._stopped_early = True
+                return
+            yield chunk
+
+    def _send_in_pool(self, chunks, week_start, workers):
+        connections.close_all()  # Nothing open is handed to the workers
+        # Spawned workers start from a fresh interpreter: set Django up before the first chunk arrives
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=django.setup)
+        in_flight = set()
+        try:
+            for chunk in chunks:
+                in_flight.add(pool.submit(send_digest_chunk, chunk, week_start))
+                if len(in_flight) >= workers * 2:  # Bounded: only a few chunks of ids are ever queued
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._record_finished(finished)
+            while in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                self._record_finished(finished)
+        except BaseException:
+            # Keep whatever did finish so the next run skips it, then stop
+            pool.shutdown(wait=True, cancel_futures=True)
+            self._record_finished({future for future in in_flight if future.done() and not future.cancelled()})
+            raise
+        pool.shutdown()
+
+    def _record_finished(self, futures):
+        """Records every chunk that was sent, then re-raises the first worker error, if any."""
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        for future in futures:
+            if future.exception() is None:
+                self._record(future.result())
+        if errors:
+            raise errors[0]
+
+    def _record(self, result):
+        first_user_id, last_user_id, sent, skipped = result
+        WeeklyDigestChunk.objects.create(run=self._run, first_user_id=first_user_id, last_user_id=last_user_id,
+                                         sent_count=sent, skipped_count=skipped)
+        WeeklyDigestRun.objects.filter(pk=self._run.pk).update(
+            sent_count=F('sent_count') + sent, skipped_count=F('skipped_count') + skipped,
+        )
+        self._sent += sent
+        self._chunks += 1
+        self.stdout.write(f"  users {first_user_id}-{last_user_id}: {sent} sent, {skipped} skipped")
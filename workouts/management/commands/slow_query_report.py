@@ -0,0 +1,71 @@
+# workouts/management/commands/slow_query_report.py
+import datetime
+import glob
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarizes the slow-query log (settings.SLOW_QUERY_LOG_FILE and its rotated files) "
+        "grouped by normalized SQL shape, worst total time first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=None, help="Only entries from the last N hours.")
+        parser.add_argument('--limit', type=int, default=10, help="Number of query shapes to show (default 10).")
+        parser.add_argument('--view', help="Only queries issued while serving this URL name.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['hours'] is not None:
+            since = timezone.now() - datetime.timedelta(hours=options['hours'])
+
+        groups = defaultdict(list)
+        for entry in self._entries():
+            if since is not None and datetime.datetime.fromisoformat(entry['timestamp']) < since:
+                continue
+            if options['view'] and entry.get('view') != options['view']:
+                continue
+            groups[entry['shape']].append(entry)
+
+        if not groups:
+            self.stdout.write("No slow queries logged.")
+            return
+
+        ranked = sorted(groups.items(), key=lambda item: sum(e['duration_ms'] for e in item[1]), reverse=True)
+        for rank, (shape, entries) in enumerate(ranked[:options['limit']], 1):
+            durations = [e['duration_ms'] for e in entries]
+            slowest = max(entries, key=lambda e: e['duration_ms'])
+            views = Counter(e.get('view') or '-' for e in entries)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{rank}  {len(entries)}x  total {sum(durations):.0f} ms  "
+                f"avg {sum(durations) / len(durations):.1f} ms  max {max(durations):.1f} ms"
+            ))
+            self.stdout.write(f"  shape:  {shape}")
+            self.stdout.write(f"  views:  {', '.join(f'{view} ({count})' for view, count in views.most_common(5))}")
+            for frame in slowest.get('stack', [])[:3]:
+                self.stdout.write(f"  from:   {frame}")
+            self.stdout.write(f"  params (slowest): {slowest.get('params')}")
+            if slowest.get('plan'):
+                self.stdout.write("  plan (slowest):")
+                for line in slowest['plan'].splitlines():
+                    self.stdout.write(f"    {line}")
+            self.stdout.write("")
+        self.stdout.write(f"{sum(len(e) for e in groups.values())} slow queries in {len(groups)} shape(s).")
+
+    def _entries(self):
+        base = str(settings.SLOW_QUERY_LOG_FILE)
+        for path in sorted(glob.glob(f"{glob.escape(base)}*")):  # The live file and its .1 ... .N backups
+            with open(path, encoding='utf-8') as log_file:
+                for line in log_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Truncated line from a crash mid-write
+                    if 'shape' in entry:
+                        yield entry
@@ -0,0 +1,233 @@
+# workouts/metrics.py
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Metrics are plain counters and histograms kept in memory behind a lock;
+recording one is a dict update. The /metrics view renders them in the
+Prometheus text format (version 0.0.4).
+
+With several worker processes, set settings.METRICS_MULTIPROCESS_DIR to a
+directory shared by all of them: every process then snapshots its values
+to its own file there (from a background thread, at most once per
+METRICS_FLUSH_SECONDS) and a scrape sums the snapshots of all processes.
+Clear the directory when the service (re)starts, as the prometheus_client
+multiprocess mode requires.
+"""
+import atexit
+import bisect
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1, 2, 3, 5, 8, 13, 20, 30, 50)
+METRICS_FLUSH_SECONDS = 1.0
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}  # {name: metric}, in registration order
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._flusher = None
+        self._snapshot_path = None
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        metric.registry = self
+        return metric
+
+    def changed(self):
+        """Called after every update; starts the snapshot thread in multiprocess mode."""
+        if self._flusher is None and _multiprocess_dir():
+            self._start_flusher()
+        self._dirty.set()
+
+    # --- Multiprocess snapshots ---
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            directory = _multiprocess_dir()
+            os.makedirs(directory, exist_ok=True)
+            # Unique per process lifetime: a recycled pid must not overwrite a dead worker's totals
+            self._snapshot_path = os.path.join(directory, f"metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+            self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            self.flush()
+            time.sleep(METRICS_FLUSH_SECONDS)  # Coalesce bursts of updates into one write
+
+    def flush(self):
+        if self._snapshot_path is None:
+            return
+        temp_path = f"{self._snapshot_path}.tmp"
+        with open(temp_path, 'w') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file, separators=(',', ':'))
+        os.replace(temp_path, self._snapshot_path)
+
+    def snapshot(self):
+        """{metric name: [[label values, value], ...]} for this process."""
+        with self._lock:
+            return {name: metric.samples() for name, metric in self._metrics.items()}
+
+    def collect(self):
+        """This process's samples merged with every other process's latest snapshot."""
+        merged = {name: {} for name in self._metrics}
+        snapshots = [self.snapshot()]
+        directory = _multiprocess_dir()
+        if directory:
+            for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+                if path == self._snapshot_path:
+                    continue  # Our live values are fresher than our last snapshot
+                try:
+                    with open(path) as snapshot_file:
+                        snapshots.append(json.load(snapshot_file))
+                except (OSError, ValueError):
+                    continue  # Being replaced right now; its totals show up on the next scrape
+        for snapshot in snapshots:
+            for name, samples in snapshot.items():
+                if name not in merged:
+                    continue
+                metric = self._metrics[name]
+                for labels, value in samples:
+                    key = tuple(labels)
+                    merged[name][key] = metric.merge(merged[name].get(key), value)
+        return merged
+
+    def render(self):
+        """Prometheus text exposition of all metrics."""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(values.items()):
+                lines.extend(metric.expose(dict(zip(metric.labelnames, labels)), value))
+        return '\n'.join(lines) + '\n'
+
+
+def _multiprocess_dir():
+    return getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = None
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.registry._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.changed()
+
+    def samples(self):
+        return [[list(key), value] for key, value in self._values.items()]
+
+    @staticmethod
+    def merge(current, value):
+        return value if current is None else current + value
+
+    def expose(self, labels, value):
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.labelnames = tuple(labelnames)
+        self.registry = None
+        self._values = {}  # {labels: [per-bucket counts (non-cumulative), sum, count]}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)  # First bucket with value <= bound
+        with self.registry._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+        self.registry.changed()
+
+    def samples(self):
+        return [[list(key), [list(counts), total, count]] for key, (counts, total, count) in self._values.items()]
+
+    @staticmethod
+    def merge(current, value):
+        if current is None:
+            return [list(value[0]), value[1], value[2]]
+        return [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1], current[2] + value[2]]
+
+    def expose(self, labels, value):
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            bucket_labels = dict(labels, le=_format_value(bound) if bound == math.inf else str(float(bound)))
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    'gym_request_duration_seconds', "Request latency by URL name.", LATENCY_BUCKETS, ['view', 'method'],
+))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    'gym_request_db_queries', "Database queries executed per request, by URL name.", QUERY_COUNT_BUCKETS, ['view'],
+))
+REQUEST_ERRORS = REGISTRY.register(Counter(
+    'gym_request_errors_total', "Responses with a 4xx/5xx status or an unhandled exception, by URL name.",
+    ['view', 'status'],
+))
+SESSION_CACHE = REGISTRY.register(Counter(
+    'gym_session_cache_lookups_total', "Session loads from the cache backend, by result (hit/miss).", ['result'],
+))
+CART_SIZE = REGISTRY.register(Histogram(
+    'gym_cart_items', "Items in the day's workout cart after adding an item.", SIZE_BUCKETS,
+))
+SAVE_BATCH_SIZE = REGISTRY.register(Histogram(
+    'gym_workout_save_logs', "Workout logs written per save.", SIZE_BUCKETS,
+))
@@ -1,8 +1,155 @@
 # workouts/middleware.py
+import logging
+import re
+import time
+import uuid
+import zoneinfo
+
+from django.db import connection
+from django.middleware.gzip import GZipMiddleware
 from django.utils import timezone
-import pytz
+from django.utils.cache import patch_vary_headers
+from .logging_utils import clear_request_context, set_request_context
+from .metrics import REQUEST_ERRORS, REQUEST_LATENCY, REQUEST_QUERIES
+from .profiling import profile_request, should_profile
 from .models import UserProfile # Assuming UserProfile is in the same app
 
+try:
+    import brotli
+except ImportError:  # Optional: without it responses are gzip-compressed only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger('workouts.request')
+
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+_ACCEPTS_BROTLI_RE = re.compile(r'\bbr\b')
+BROTLI_QUALITY = 5  # Close to gzip's speed with noticeably smaller output
+# Brotli has no equivalent of the random gzip filename padding Django adds against BREACH, so it is
+# only used for content that never carries a CSRF token; HTML pages stay on the padded gzip path.
+BROTLI_CONTENT_TYPES = ('application/json', 'text/css', 'text/javascript', 'application/javascript',
+                        'image/svg+xml')
+
+
+class RequestLogMiddleware:
+    """
+    Tags every log record of a request with a request id, the user id and
+    the view name, and logs one structured line per request with its timing.
+    An incoming X-Request-ID (e.g. from a proxy) is reused and echoed back.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get('X-Request-ID', '')
+        request.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        set_request_context(request_id=request.request_id)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            user = getattr(request, 'user', None)
+            request_logger.info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={
+                    'user_id': user.pk if user is not None and user.is_authenticated else None,
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+                },
+            )
+            response['X-Request-ID'] = request.request_id
+            return response
+        finally:
+            clear_request_context()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        user = getattr(request, 'user', None)
+        match = request.resolver_match
+        set_request_context(
+            user_id=user.pk if user is not None and user.is_authenticated else None,
+            view=match.view_name if match else view_func.__name__,
+        )
+
+
+class MetricsMiddleware:
+    """
+    Records latency, database query count and errors per URL name
+    (workouts/metrics.py). Labels use the URL name, never the raw path,
+    so the number of series stays bounded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_count = [0]
+
+        def count_query(execute, sql, params, many, context):
+            query_count[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, view=view, method=request.method)
+        REQUEST_QUERIES.observe(query_count[0], view=view)
+        if response.status_code >= 400:  # Unhandled exceptions arrive here as 500 responses
+            REQUEST_ERRORS.inc(view=view, status=response.status_code)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that ask for it (staff ?_profile=1 or a signed profile
+    token; see workouts/profiling.py). Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request):
+            return self.get_response(request)
+        return profile_request(request, self.get_response)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that prefers Brotli for JSON, CSS, JavaScript and SVG
+    responses when the brotli package is installed and the client accepts
+    it (see BROTLI_CONTENT_TYPES). Server-Sent Events are never compressed:
+    the compressor would hold events back until its buffer fills.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if content_type.startswith('text/event-stream'):
+            return response
+        if (brotli is not None and content_type.split(';')[0].strip() in BROTLI_CONTENT_TYPES
+                and not response.streaming and len(response.content) >= 200
+                and not response.has_header('Content-Encoding')
+                and _ACCEPTS_BROTLI_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))):
+            return self._brotli_response(response)
+        return super().process_response(request, response)
+
+    def _brotli_response(self, response):
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag  # Same rule GZipMiddleware applies
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
 class TimezoneMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -18,19 +165,17 @@ class TimezoneMiddleware:
                 if user_tz_name:
                     try:
                         # Activate the user's specified timezone
-                        timezone.activate(pytz.timezone(user_tz_name))
-                    except pytz.UnknownTimeZoneError:
+                        timezone.activate(zoneinfo.ZoneInfo(user_tz_name))
+                    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
                         # Handle case where stored timezone is invalid
-                        # Log this error ideally
-                        print(f"Warning: Invalid timezone '{user_tz_name}' for user {request.user.username}")
+                        logger.warning("Invalid timezone %r in profile", user_tz_name)
                         timezone.deactivate() # Fall back to default
                 else:
                      # User profile exists but timezone field is empty/null
                      timezone.deactivate() # Use default timezone
             except UserProfile.DoesNotExist:
                  # User is logged in but has no profile (shouldn't happen with signals)
-                 # Log this error ideally
-                 print(f"Warning: UserProfile DoesNotExist for user {request.user.username}")
+                 logger.warning("Authenticated user has no UserProfile")
                  timezone.deactivate() # Use default timezone
         else:
             # User is not authenticated, use the default timezone
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 14:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_exerciseperformance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='is_coach',
+            field=models.BooleanField(default=False, help_text='Coaches can view the multi-athlete dashboard.'),
+        ),
+        migrations.CreateModel(
+            name='CoachingRelationship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('athlete', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coaches', to=settings.AUTH_USER_MODEL)),
+                ('coach', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coached_athletes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('coach', 'athlete')},
+            },
+        ),
+    ]
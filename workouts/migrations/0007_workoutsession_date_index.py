@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 14:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0006_backgroundjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['date'], name='session_date_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-19 14:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_workoutsession_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('filename', models.CharField(max_length=255)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('log_count', models.PositiveIntegerField(default=0)),
+                ('size_bytes', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_months', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'year', 'month'],
+                'unique_together': {('user', 'year', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ExerciseDayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('log_count', models.PositiveIntegerField(default=0)),
+                ('complete_logs', models.PositiveIntegerField(default=0)),
+                ('volume', models.FloatField(blank=True, null=True)),
+                ('max_weight', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('best_e1rm', models.FloatField(blank=True, null=True)),
+                ('top_sets', models.PositiveIntegerField(blank=True, null=True)),
+                ('top_reps', models.PositiveIntegerField(blank=True, null=True)),
+                ('top_weight', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='workouts.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='rollup_user_date_idx')],
+                'unique_together': {('user', 'exercise', 'date')},
+            },
+        ),
+    ]
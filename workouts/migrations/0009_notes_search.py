@@ -0,0 +1,93 @@
+# Full-text search index over session/log notes (see workouts/search.py).
+# The table is created with raw SQL because its shape is backend specific:
+# an FTS5 virtual table on SQLite, a tsvector + GIN table on PostgreSQL.
+# Other backends get no index and search reports itself unavailable.
+# Notes of already archived months are added by `manage.py rebuild_search_index`.
+
+from django.db import migrations
+
+SQLITE_CREATE = """
+CREATE VIRTUAL TABLE workouts_notes_search USING fts5(
+    body, owner, title UNINDEXED, kind UNINDEXED, object_id UNINDEXED,
+    session_id UNINDEXED, user_id UNINDEXED, date UNINDEXED,
+    tokenize = 'porter unicode61'
+)
+"""
+
+SQLITE_POPULATE = [
+    """
+    INSERT INTO workouts_notes_search (rowid, body, owner, title, kind, object_id, session_id, user_id, date)
+    SELECT s.id * 2, s.notes, 'u' || s.user_id, 'Session notes', 'session', s.id, s.id, s.user_id, s.date
+    FROM workouts_workoutsession s WHERE s.notes IS NOT NULL AND TRIM(s.notes) <> ''
+    """,
+    """
+    INSERT INTO workouts_notes_search (rowid, body, owner, title, kind, object_id, session_id, user_id, date)
+    SELECT l.id * 2 + 1, l.notes, 'u' || s.user_id, e.name, 'log', l.id, s.id, s.user_id, s.date
+    FROM workouts_workoutlog l
+    JOIN workouts_workoutsession s ON s.id = l.session_id
+    JOIN workouts_exercise e ON e.id = l.exercise_id
+    WHERE l.notes IS NOT NULL AND TRIM(l.notes) <> ''
+    """,
+]
+
+POSTGRES_CREATE = [
+    """
+    CREATE TABLE workouts_notes_search (
+        rowid bigint PRIMARY KEY,
+        user_id integer NOT NULL,
+        kind varchar(10) NOT NULL,
+        object_id bigint NOT NULL,
+        session_id bigint NOT NULL,
+        date date NOT NULL,
+        title varchar(100) NOT NULL,
+        body text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (to_tsvector('english', body)) STORED
+    )
+    """,
+    "CREATE INDEX workouts_notes_search_doc_idx ON workouts_notes_search USING GIN (document)",
+    "CREATE INDEX workouts_notes_search_user_idx ON workouts_notes_search (user_id)",
+]
+
+POSTGRES_POPULATE = [
+    """
+    INSERT INTO workouts_notes_search (rowid, user_id, kind, object_id, session_id, date, title, body)
+    SELECT s.id * 2, s.user_id, 'session', s.id, s.id, s.date, 'Session notes', s.notes
+    FROM workouts_workoutsession s WHERE s.notes IS NOT NULL AND TRIM(s.notes) <> ''
+    """,
+    """
+    INSERT INTO workouts_notes_search (rowid, user_id, kind, object_id, session_id, date, title, body)
+    SELECT l.id * 2 + 1, s.user_id, 'log', l.id, s.id, s.date, e.name, l.notes
+    FROM workouts_workoutlog l
+    JOIN workouts_workoutsession s ON s.id = l.session_id
+    JOIN workouts_exercise e ON e.id = l.exercise_id
+    WHERE l.notes IS NOT NULL AND TRIM(l.notes) <> ''
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = [SQLITE_CREATE] + SQLITE_POPULATE
+    elif vendor == 'postgresql':
+        statements = POSTGRES_CREATE + POSTGRES_POPULATE
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS workouts_notes_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='timezone',
+            field=models.CharField(default='America/Regina', help_text='Select your local time zone.', max_length=63),
+        ),
+    ]
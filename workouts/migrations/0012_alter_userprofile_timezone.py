@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 15:08
+
+import workouts.timezones
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0011_alter_userprofile_timezone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='timezone',
+            field=models.CharField(default='America/Regina', help_text='Select your local time zone.', max_length=63, validators=[workouts.timezones.validate_timezone]),
+        ),
+    ]
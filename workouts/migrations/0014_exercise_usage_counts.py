@@ -0,0 +1,75 @@
+# Generated by Django 5.2 on 2026-10-19 15:13
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# A frozen copy of workouts.recommendations._performance_from_history as of this migration
+def top_set(logs):
+    return max(logs, key=lambda log: (log[2] if log[2] is not None else Decimal('-1'), log[1] or 0))
+
+
+def performance_fields(sessions):
+    """Index fields from a date-ordered list of (date, [(sets, reps, weight), ...]) for one exercise."""
+    tops = [(date, top_set(logs)) for date, logs in sessions]
+    last_date, (last_sets, last_reps, last_weight) = tops[-1]
+    stalled = 0
+    for (_, newer), (_, older) in zip(reversed(tops[1:]), reversed(tops[:-1])):
+        if (newer[2] or Decimal('0')) > (older[2] or Decimal('0')):
+            break
+        stalled += 1
+    weights = [top[2] for _, top in tops if top[2] is not None]
+    return {
+        'last_date': last_date,
+        'last_sets': last_sets,
+        'last_reps': last_reps,
+        'last_weight': last_weight,
+        'previous_weight': tops[-2][1][2] if len(tops) > 1 else None,
+        'stalled_sessions': stalled,
+        'best_weight': max(weights) if weights else None,
+        'session_count': len(tops),
+    }
+
+
+def backfill_performance_index(apps, schema_editor):
+    """
+    Rebuilds the whole index, training-day counts included, from live logs
+    and archived rollups. Rows missing from the index (history logged before
+    it existed) are created rather than left out of the usage ranking.
+    """
+    WorkoutLog = apps.get_model('workouts', 'WorkoutLog')
+    ExerciseDayRollup = apps.get_model('workouts', 'ExerciseDayRollup')
+    ExercisePerformance = apps.get_model('workouts', 'ExercisePerformance')
+
+    history = defaultdict(lambda: defaultdict(list))  # {(user_id, exercise_id): {date: [(sets, reps, weight)]}}
+    rows = WorkoutLog.objects.order_by('session__date', 'id').values_list(
+        'session__user', 'exercise', 'session__date', 'sets', 'reps', 'weight')
+    for user_id, exercise_id, date, sets, reps, weight in rows.iterator():
+        history[user_id, exercise_id][date].append((sets, reps, weight))
+    rollups = ExerciseDayRollup.objects.values_list('user', 'exercise', 'date', 'top_sets', 'top_reps', 'top_weight')
+    for user_id, exercise_id, date, sets, reps, weight in rollups.iterator():
+        history[user_id, exercise_id][date].append((sets, reps, weight))
+
+    ExercisePerformance.objects.all().delete()
+    ExercisePerformance.objects.bulk_create([
+        ExercisePerformance(user_id=user_id, exercise_id=exercise_id, **performance_fields(sorted(by_date.items())))
+        for (user_id, exercise_id), by_date in history.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0013_routines'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exerciseperformance',
+            name='session_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_performance_index, migrations.RunPython.noop),
+    ]
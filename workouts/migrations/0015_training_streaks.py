@@ -0,0 +1,87 @@
+# Generated by Django 5.2 on 2026-10-19 15:15
+
+import datetime
+from collections import defaultdict
+
+from django.db import migrations, models
+
+# A frozen copy of workouts.streaks.summarize_training_days as of this migration
+STREAK_FIELDS = ['first_training_date', 'last_training_date', 'streak_start_date',
+                 'longest_streak', 'training_days', 'training_weeks']
+
+
+def summarize_training_days(dates):
+    dates = sorted(dates)
+    longest, run_start = 1, dates[0]
+    for previous, date in zip(dates, dates[1:]):
+        if date - previous != datetime.timedelta(days=1):
+            run_start = date
+        longest = max(longest, (date - run_start).days + 1)
+    return {
+        'first_training_date': dates[0],
+        'last_training_date': dates[-1],
+        'streak_start_date': run_start,
+        'longest_streak': longest,
+        'training_days': len(dates),
+        'training_weeks': len({date.isocalendar()[:2] for date in dates}),
+    }
+
+
+def backfill_streaks(apps, schema_editor):
+    """Builds every existing user's streak record from their live and archived training dates."""
+    WorkoutSession = apps.get_model('workouts', 'WorkoutSession')
+    ExerciseDayRollup = apps.get_model('workouts', 'ExerciseDayRollup')
+    UserProfile = apps.get_model('workouts', 'UserProfile')
+
+    dates = defaultdict(set)
+    for user_id, date in WorkoutSession.objects.filter(logs__isnull=False).values_list('user', 'date').distinct():
+        dates[user_id].add(date)
+    for user_id, date in ExerciseDayRollup.objects.values_list('user', 'date').distinct():
+        dates[user_id].add(date)
+
+    profiles = list(UserProfile.objects.filter(user__in=dates.keys()))
+    for profile in profiles:
+        for field, value in summarize_training_days(dates[profile.user_id]).items():
+            setattr(profile, field, value)
+    UserProfile.objects.bulk_update(profiles, STREAK_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0014_exercise_usage_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='first_training_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_training_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='longest_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='streak_start_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='training_days',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='training_weeks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-19 15:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0015_training_streaks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyDigestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField(unique=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-week_start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyDigestChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_user_id', models.BigIntegerField()),
+                ('last_user_id', models.BigIntegerField()),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='workouts.weeklydigestrun')),
+            ],
+            options={
+                'ordering': ['run', 'first_user_id'],
+            },
+        ),
+    ]
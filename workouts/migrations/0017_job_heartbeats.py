@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-19 15:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0016_weekly_digests'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='backgroundjob',
+            index=models.Index(fields=['status', 'finished_at'], name='job_retention_idx'),
+        ),
+    ]
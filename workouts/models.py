@@ -2,11 +2,13 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-import pytz
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from .timezones import validate_timezone
+
 
 class Exercise(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -39,6 +41,9 @@ class WorkoutSession(models.Model):
     class Meta:
         unique_together = ('user', 'date')
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date'], name='session_date_idx'),  # Cross-user date filtering (admin)
+        ]
 
     def __str__(self):
         return f"{self.user.username}'s workout on {self.date}"
@@ -63,22 +68,40 @@ class WorkoutLog(models.Model):
 
 # --- User Profile Model ---
 class UserProfile(models.Model):
-    # Ensure pytz is installed: pip install pytz
-    TIMEZONE_CHOICES = [(tz, tz) for tz in pytz.common_timezones]  # Use common_timezones for a reasonable list
-
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     timezone = models.CharField(
         max_length=63,  # Max length of tz database names
-        choices=TIMEZONE_CHOICES,
+        validators=[validate_timezone],  # Any zoneinfo zone; the picker suggests the common ones
         default=settings.TIME_ZONE,  # Default to project's timezone
         # Or use 'UTC' as a safer default: default='UTC'
         help_text="Select your local time zone."
     )
+    is_coach = models.BooleanField(default=False, help_text="Coaches can view the multi-athlete dashboard.")
+    # Training streak record, maintained by workouts/streaks.py as training days come and go
+    first_training_date = models.DateField(blank=True, null=True)
+    last_training_date = models.DateField(blank=True, null=True)
+    streak_start_date = models.DateField(blank=True, null=True)  # First day of the run ending on last_training_date
+    longest_streak = models.PositiveIntegerField(default=0)
+    training_days = models.PositiveIntegerField(default=0)
+    training_weeks = models.PositiveIntegerField(default=0)  # Distinct ISO weeks with a training day
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
 
+# --- Coach / Athlete Relationship ---
+class CoachingRelationship(models.Model):
+    coach = models.ForeignKey(User, on_delete=models.CASCADE, related_name='coached_athletes')
+    athlete = models.ForeignKey(User, on_delete=models.CASCADE, related_name='coaches')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('coach', 'athlete')
+
+    def __str__(self):
+        return f"{self.coach.username} coaches {self.athlete.username}"
+
+
 # --- Signal to create/update UserProfile automatically ---
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
@@ -87,3 +110,218 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
     # If you want updates to User to potentially update profile:
     # instance.profile.save() # But be careful what you save here
+
+
+# --- Per-(user, exercise) "last performance" index ---
+class ExercisePerformance(models.Model):
+    """
+    Denormalized summary of a user's recent history for one exercise.
+    Kept up to date when workouts are saved/deleted so the log page can
+    suggest the next sets/reps/weight from a single row lookup.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercise_performances')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE, related_name='performances')
+    # Top set (heaviest log) of the most recent session containing this exercise
+    last_date = models.DateField()
+    last_sets = models.PositiveIntegerField(blank=True, null=True)
+    last_reps = models.PositiveIntegerField(blank=True, null=True)
+    last_weight = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    # Top weight of the session before that, for trend detection
+    previous_weight = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    # Consecutive recent sessions without a top-weight increase
+    stalled_sessions = models.PositiveIntegerField(default=0)
+    # Personal record (max weight ever), same definition as exercise_stats_view
+    best_weight = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    # Number of training days that included this exercise (ranks the log page picker)
+    session_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'exercise')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.exercise.name} (last {self.last_date})"
+
+
+# --- Background Jobs (see workouts/jobs.py and the run_jobs command) ---
+class BackgroundJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE, related_name='background_jobs')
+    task = models.CharField(max_length=100)  # Name registered with @jobs.task
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # 0-100
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    timeout_seconds = models.PositiveIntegerField(default=300)
+    run_after = models.DateTimeField(default=timezone.now)  # Pushed back between retries
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Refreshed by the worker while the job runs
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_claim_idx'),
+            models.Index(fields=['user', 'task', 'status'], name='job_user_task_idx'),
+            models.Index(fields=['status', 'finished_at'], name='job_retention_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+# --- Weekly digest emails (see workouts/digest.py and the send_weekly_digests command) ---
+class WeeklyDigestRun(models.Model):
+    """One week's digest send. Its completed chunks are the checkpoint a crashed run resumes from."""
+    week_start = models.DateField(unique=True)  # Monday of the summarized week
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    sent_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)  # No email address or no training in either week
+
+    class Meta:
+        ordering = ['-week_start']
+
+    def __str__(self):
+        return f"Weekly digest {self.week_start} ({'finished' if self.finished_at else 'in progress'})"
+
+
+class WeeklyDigestChunk(models.Model):
+    """A sent range of user ids: every user with first_user_id <= id <= last_user_id has been handled."""
+    run = models.ForeignKey(WeeklyDigestRun, on_delete=models.CASCADE, related_name='chunks')
+    first_user_id = models.BigIntegerField()
+    last_user_id = models.BigIntegerField()
+    sent_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['run', 'first_user_id']
+
+    def __str__(self):
+        return f"{self.run.week_start} users {self.first_user_id}-{self.last_user_id}"
+
+
+# --- Archived (cold) workout history (see workouts/archive.py) ---
+class ArchivedMonth(models.Model):
+    """
+    One month of a user's sessions moved out of the hot tables into a
+    compressed archive file. Presence of a row means the month is read
+    from the archive.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_months')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    filename = models.CharField(max_length=255)  # Relative to settings.ARCHIVE_ROOT
+    session_count = models.PositiveIntegerField(default=0)
+    log_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'year', 'month')
+        ordering = ['user', 'year', 'month']
+
+    def __str__(self):
+        return f"{self.user.username} {self.year}-{self.month:02d} ({self.session_count} sessions)"
+
+
+class ExerciseDayRollup(models.Model):
+    """
+    Per (user, exercise, day) aggregates of archived logs, so stats, charts
+    and progression still cover history that left the WorkoutLog table.
+    Only archived days have rollups - hot days are aggregated live.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exercise_rollups')
+    exercise = models.ForeignKey(Exercise, on_delete=models.PROTECT)  # Archived history still protects it
+    date = models.DateField()
+    log_count = models.PositiveIntegerField(default=0)
+    # Aggregates over complete logs (sets, reps and weight present), as used by stats/insights
+    complete_logs = models.PositiveIntegerField(default=0)
+    volume = models.FloatField(blank=True, null=True)
+    max_weight = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+    best_e1rm = models.FloatField(blank=True, null=True)
+    # Heaviest log of the day (any log), as used by the suggestion index
+    top_sets = models.PositiveIntegerField(blank=True, null=True)
+    top_reps = models.PositiveIntegerField(blank=True, null=True)
+    top_weight = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+
+    class Meta:
+        unique_together = ('user', 'exercise', 'date')
+        indexes = [
+            models.Index(fields=['user', 'date'], name='rollup_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.exercise.name} on {self.date}"
+
+
+# --- Stored request profiles (see workouts/profiling.py) ---
+class RequestProfile(models.Model):
+    """One profiled request: cProfile top functions, SQL trace and template timings."""
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    query_time_ms = models.FloatField(default=0)
+    top_functions = models.JSONField(default=list)  # [{function, ncalls, tottime_ms, cumtime_ms}]
+    queries = models.JSONField(default=list)        # [{sql, time_ms, many}] in execution order
+    templates = models.JSONField(default=list)      # [{name, time_ms, depth}] in render order
+    stats = models.BinaryField(blank=True)          # marshal'd pstats, loadable with pstats/snakeviz
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+# --- Saved routines (see workouts/routines.py) ---
+class Routine(models.Model):
+    """A reusable workout template: an ordered list of exercises with targets."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='routines')
+    name = models.CharField(max_length=100)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'name')
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name}"
+
+
+class RoutineItem(models.Model):
+    routine = models.ForeignKey(Routine, related_name='items', on_delete=models.CASCADE)
+    exercise = models.ForeignKey(Exercise, on_delete=models.PROTECT)
+    position = models.PositiveSmallIntegerField(default=0)  # Order within the routine
+    target_sets = models.PositiveIntegerField(blank=True, null=True)
+    target_reps = models.PositiveIntegerField(blank=True, null=True)
+    target_weight = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
+
+    class Meta:
+        ordering = ['position', 'id']
+
+    def __str__(self):
+        return f"{self.routine.name} #{self.position}: {self.exercise.name}"
@@ -0,0 +1,172 @@
+# workouts/profiling.py
+"""
+On-demand request profiling.
+
+A request is profiled only when it asks to be:
+  - a staff user adds ?_profile=1, or
+  - any request carries a profile token for its own user, either in the
+    X-Profile-Token header or as ?_profile=<token>. Tokens are signed,
+    expire after PROFILE_TOKEN_MAX_AGE and are issued by staff with
+    `python manage.py profile_token <username>`, so a slow page can be
+    profiled as the user who actually sees it slow.
+
+The request then runs under cProfile with an SQL trace and template render
+timings, and the result is stored as a RequestProfile (see the admin).
+Requests that don't ask for profiling only pay the header/query-string
+lookup in ProfilingMiddleware.
+"""
+import contextvars
+import cProfile
+import marshal
+import pstats
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection
+from django.template import base as template_base
+
+from .models import RequestProfile
+
+PROFILE_QUERY_PARAM = '_profile'
+PROFILE_TOKEN_SALT = 'workouts.profiling'
+TOP_FUNCTIONS = 40
+MAX_QUERIES = 500        # SQL statements kept per profile
+MAX_SQL_LENGTH = 2000
+PROFILE_RETENTION = 500  # Newest profiles kept; older ones are pruned on save
+
+_active_trace = contextvars.ContextVar('profiling_trace', default=None)
+_template_hook_installed = False
+
+
+# --- Tokens ---
+def make_profile_token(user):
+    return signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).sign(str(user.pk))
+
+
+def _token_user_id(token):
+    try:
+        value = signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILE_TOKEN_MAX_AGE
+        )
+        return int(value)
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def should_profile(request):
+    token = request.META.get('HTTP_X_PROFILE_TOKEN')
+    if token is None and f'{PROFILE_QUERY_PARAM}=' in request.META.get('QUERY_STRING', ''):
+        token = request.GET.get(PROFILE_QUERY_PARAM)
+    if not token or not request.user.is_authenticated:
+        return False
+    if token == '1':
+        return request.user.is_staff
+    return _token_user_id(token) == request.user.pk
+
+
+# --- Tracing ---
+class _Trace:
+    def __init__(self):
+        self.queries = []
+        self.query_count = 0
+        self.query_time = 0.0
+        self.templates = []
+        self.depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.query_count += 1
+            self.query_time += elapsed
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({'sql': sql[:MAX_SQL_LENGTH], 'time_ms': round(elapsed * 1000, 3), 'many': many})
+
+
+def _install_template_hook():
+    """
+    Wraps Template._render (every template, include and extended parent) on
+    first use. Outside a profiled request the wrapper is a single
+    contextvar lookup.
+    """
+    global _template_hook_installed
+    if _template_hook_installed:
+        return
+    original_render = template_base.Template._render
+
+    @wraps(original_render)
+    def timed_render(self, context):
+        trace = _active_trace.get()
+        if trace is None:
+            return original_render(self, context)
+        entry = {'name': self.origin.template_name or self.origin.name or '<string>', 'time_ms': 0, 'depth': trace.depth}
+        trace.templates.append(entry)
+        trace.depth += 1
+        started = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            entry['time_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            trace.depth -= 1
+
+    template_base.Template._render = timed_render
+    _template_hook_installed = True
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f"{filename}:{line}({function})",
+            'ncalls': ncalls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    return rows[:TOP_FUNCTIONS], marshal.dumps(stats.stats)
+
+
+# --- Entry point ---
+def profile_request(request, get_response):
+    """Runs the request under cProfile + SQL/template tracing and stores a RequestProfile."""
+    _install_template_hook()
+    trace = _Trace()
+    token = _active_trace.set(trace)
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(trace.record_query):
+            profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+    finally:
+        _active_trace.reset(token)
+    duration = time.perf_counter() - started
+
+    top_functions, raw_stats = _top_functions(profiler)
+    match = request.resolver_match
+    profile = RequestProfile.objects.create(
+        user=request.user,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view_name=match.view_name if match else '',
+        status_code=response.status_code,
+        duration_ms=round(duration * 1000, 3),
+        query_count=trace.query_count,
+        query_time_ms=round(trace.query_time * 1000, 3),
+        top_functions=top_functions,
+        queries=trace.queries,
+        templates=trace.templates,
+        stats=raw_stats,
+    )
+    stale = RequestProfile.objects.order_by('-created_at').values_list('pk', flat=True)[PROFILE_RETENTION:]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
+    response['X-Profile-Id'] = str(profile.pk)
+    return response
@@ -0,0 +1,231 @@
+# workouts/recommendations.py
+"""
+Progressive-overload suggestions for the log page.
+
+Suggestions are computed from the ExercisePerformance index (one row per
+user/exercise) so answering a pick never touches the WorkoutLog history.
+The index is updated incrementally when a session is saved and rebuilt for
+just the affected exercises when history changes underneath it (back-dated
+saves, deletions). It also carries per-exercise usage counts, which rank the
+log page picker (exercise_usage.py).
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from .exercise_usage import invalidate_frequent_exercises
+from .models import ExerciseDayRollup, ExercisePerformance, WorkoutLog
+
+# --- Progression rules ---
+WEIGHT_INCREMENT_KG = Decimal('2.5')
+REP_CEILING = 12          # Double progression: add reps up to here, then add weight
+REP_RESET = 8             # Reps to drop back to after a weight increase
+DELOAD_AFTER_STALLS = 3   # Sessions without progress before suggesting a deload
+DELOAD_FACTOR = Decimal('0.9')
+PR_PROXIMITY = Decimal('0.95')  # Within 5% of the PR counts as "near PR"
+
+INDEX_FIELDS = ['last_date', 'last_sets', 'last_reps', 'last_weight',
+                'previous_weight', 'stalled_sessions', 'best_weight', 'session_count', 'updated_at']
+
+
+def _top_set(logs):
+    """Heaviest log of a session (ties broken by reps). `logs` are (sets, reps, weight)."""
+    return max(logs, key=lambda log: (log[2] if log[2] is not None else Decimal('-1'), log[1] or 0))
+
+
+def _weight(value):
+    return value if value is not None else Decimal('0')
+
+
+def _round_to_increment(weight):
+    """Round to the nearest plate increment."""
+    steps = (weight / WEIGHT_INCREMENT_KG).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+    return (steps * WEIGHT_INCREMENT_KG).quantize(Decimal('0.01'))
+
+
+def _performance_from_history(user, exercise_id, sessions):
+    """
+    Builds an (unsaved) ExercisePerformance from a date-ordered list of
+    (date, [(sets, reps, weight), ...]) for one exercise.
+    """
+    tops = [(date, _top_set(logs)) for date, logs in sessions]
+    last_date, (last_sets, last_reps, last_weight) = tops[-1]
+    previous_weight = tops[-2][1][2] if len(tops) > 1 else None
+
+    # Walk backwards counting sessions whose top weight did not beat the one before
+    stalled = 0
+    for (_, newer), (_, older) in zip(reversed(tops[1:]), reversed(tops[:-1])):
+        if _weight(newer[2]) > _weight(older[2]):
+            break
+        stalled += 1
+
+    weights = [top[2] for _, top in tops if top[2] is not None]
+    return ExercisePerformance(
+        user=user,
+        exercise_id=exercise_id,
+        last_date=last_date,
+        last_sets=last_sets,
+        last_reps=last_reps,
+        last_weight=last_weight,
+        previous_weight=previous_weight,
+        stalled_sessions=stalled,
+        best_weight=max(weights) if weights else None,
+        session_count=len(tops),
+    )
+
+
+def rebuild_performance_index(user, exercise_ids=None):
+    """
+    Recomputes index rows for a user from their full history, limited to
+    `exercise_ids` when given. Used for back-dated saves, deletions and the
+    rebuild_performance_index management command - never on the read path.
+    """
+    logs = WorkoutLog.objects.filter(session__user=user)
+    if exercise_ids is not None:
+        logs = logs.filter(exercise_id__in=exercise_ids)
+    rows = logs.order_by('exercise_id', 'session__date', 'id').values_list(
+        'exercise_id', 'session__date', 'sets', 'reps', 'weight'
+    )
+
+    history = defaultdict(lambda: defaultdict(list))  # {exercise_id: {date: [(sets, reps, weight)]}}
+    for exercise_id, date, sets, reps, weight in rows.iterator():
+        history[exercise_id][date].append((sets, reps, weight))
+
+    # Archived days only keep their top set, which is all the index needs
+    rollups = ExerciseDayRollup.objects.filter(user=user)
+    if exercise_ids is not None:
+        rollups = rollups.filter(exercise_id__in=exercise_ids)
+    for exercise_id, date, sets, reps, weight in rollups.values_list(
+            'exercise_id', 'date', 'top_sets', 'top_reps', 'top_weight').iterator():
+        history[exercise_id][date].append((sets, reps, weight))
+
+    performances = [
+        _performance_from_history(user, exercise_id, sorted(by_date.items()))
+        for exercise_id, by_date in history.items()
+    ]
+
+    # Exercises with no remaining history lose their index row
+    stale = ExercisePerformance.objects.filter(user=user)
+    if exercise_ids is not None:
+        stale = stale.filter(exercise_id__in=exercise_ids)
+    stale.exclude(exercise_id__in=history.keys()).delete()
+
+    if performances:
+        ExercisePerformance.objects.bulk_create(
+            performances,
+            update_conflicts=True,
+            unique_fields=['user', 'exercise'],
+            update_fields=INDEX_FIELDS,
+        )
+    invalidate_frequent_exercises(user.pk)
+    return len(performances)
+
+
+def update_performance_index(workout_session):
+    """
+    Incrementally folds a just-saved session into the index.
+
+    The common case (logging today or the newest date) costs two queries:
+    one for the session's logs and one for the existing index rows, plus a
+    single bulk upsert. Back-dated sessions fall back to a targeted rebuild.
+    """
+    session_logs = defaultdict(list)
+    for exercise_id, sets, reps, weight in workout_session.logs.values_list(
+            'exercise_id', 'sets', 'reps', 'weight'):
+        session_logs[exercise_id].append((sets, reps, weight))
+    if not session_logs:
+        return
+
+    existing = {
+        perf.exercise_id: perf
+        for perf in ExercisePerformance.objects.filter(
+            user=workout_session.user, exercise_id__in=session_logs.keys()
+        )
+    }
+
+    to_upsert = []
+    needs_rebuild = []
+    for exercise_id, logs in session_logs.items():
+        top_sets, top_reps, top_weight = _top_set(logs)
+        perf = existing.get(exercise_id)
+
+        if perf is None:
+            perf = ExercisePerformance(user=workout_session.user, exercise_id=exercise_id,
+                                       last_date=workout_session.date, session_count=1)
+        elif workout_session.date < perf.last_date:
+            needs_rebuild.append(exercise_id)  # Back-dated: trend/stall history shifts
+            continue
+        elif workout_session.date > perf.last_date:
+            # New most-recent session: shift last -> previous
+            if _weight(top_weight) > _weight(perf.last_weight):
+                perf.stalled_sessions = 0
+            else:
+                perf.stalled_sessions += 1
+            perf.previous_weight = perf.last_weight
+            perf.last_date = workout_session.date
+            perf.session_count += 1
+        elif _weight(top_weight) > _weight(perf.previous_weight):
+            # Same date (items appended to today's session): the day's new top set may end a stall
+            perf.stalled_sessions = 0
+
+        perf.last_sets, perf.last_reps, perf.last_weight = top_sets, top_reps, top_weight
+        if top_weight is not None and (perf.best_weight is None or top_weight > perf.best_weight):
+            perf.best_weight = top_weight
+        to_upsert.append(perf)
+
+    if to_upsert:
+        ExercisePerformance.objects.bulk_create(
+            to_upsert,
+            update_conflicts=True,
+            unique_fields=['user', 'exercise'],
+            update_fields=INDEX_FIELDS,
+        )
+        invalidate_frequent_exercises(workout_session.user_id)
+    if needs_rebuild:
+        rebuild_performance_index(workout_session.user, needs_rebuild)
+
+
+def suggest_next(performance):
+    """
+    Returns a suggestion dict for the next session from an ExercisePerformance
+    row, or None if there is no usable history.
+    """
+    if performance is None:
+        return None
+
+    sets = performance.last_sets
+    reps = performance.last_reps
+    weight = performance.last_weight
+    best = performance.best_weight
+
+    if weight is None:
+        # Bodyweight / unweighted movement: just progress reps
+        next_reps = (reps or 0) + 1 if reps else None
+        return {
+            'sets': sets, 'reps': next_reps, 'weight': None, 'is_pr_attempt': False,
+            'reason': "Add a rep over last time." if next_reps else "Repeat your last session.",
+        }
+
+    if performance.stalled_sessions >= DELOAD_AFTER_STALLS:
+        weight = _round_to_increment(weight * DELOAD_FACTOR)
+        reason = f"No progress in {performance.stalled_sessions} sessions - deload about 10% and build back up."
+    elif performance.previous_weight is not None and weight < performance.previous_weight:
+        weight = performance.previous_weight
+        reason = "Last session dipped - match your previous top weight."
+    elif best is not None and weight < best * PR_PROXIMITY:
+        weight = weight + WEIGHT_INCREMENT_KG
+        reason = f"Working back toward your PR of {best}kg."
+    elif reps is not None and reps < REP_CEILING:
+        reps = reps + 1
+        reason = "Same weight, one more rep (double progression)."
+    else:
+        weight = weight + WEIGHT_INCREMENT_KG
+        reps = REP_RESET if reps is not None else None
+        reason = f"Hit {REP_CEILING} reps - add {WEIGHT_INCREMENT_KG}kg and drop to {REP_RESET} reps."
+
+    return {
+        'sets': sets,
+        'reps': reps,
+        'weight': weight,
+        'is_pr_attempt': best is not None and weight > best,
+        'reason': reason,
+    }
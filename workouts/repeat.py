@@ -0,0 +1,133 @@
+# workouts/repeat.py
+"""
+Repeating a previous workout.
+
+The source session's logs are read with a single values_list query and
+either appended to a day's cart or written into that day's session with
+one bulk_create, optionally with a progression rule applied to the
+weights. Saved routines (routines.py) are materialized the same way.
+bulk_create bypasses post_save, so everything the save path normally
+triggers is done here explicitly: the performance index, the dashboard
+calendar cache, the streak record, the save-size metric and the coach feed.
+
+Log notes are not copied (they describe the original day), so the notes
+search index has nothing new to pick up.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from .archive import restore_month_for_date
+from .calendar_cells import invalidate_month as invalidate_calendar_month
+from .insights import bump_data_version
+from .live_feed import publish_workout_saved
+from .metrics import CART_SIZE, SAVE_BATCH_SIZE
+from .models import ExercisePerformance, WorkoutLog, WorkoutSession
+from .recommendations import WEIGHT_INCREMENT_KG, _round_to_increment, suggest_next, update_performance_index
+from .streaks import training_day_added
+
+PROGRESSION_SAME = 'same'
+PROGRESSION_INCREMENT = 'increment'
+PROGRESSION_PERCENT = 'percent'
+PROGRESSION_SUGGESTED = 'suggested'
+PROGRESSION_CHOICES = [
+    (PROGRESSION_SAME, "Same weights"),
+    (PROGRESSION_INCREMENT, f"+{WEIGHT_INCREMENT_KG} kg on weighted lifts"),
+    (PROGRESSION_PERCENT, "+2.5% (rounded to the plate increment)"),
+    (PROGRESSION_SUGGESTED, "Follow the progression suggestions"),
+]
+PERCENT_PROGRESSION = Decimal('1.025')
+
+
+def source_items(session):
+    """The session's logs as cart-style dicts, in logging order (one query)."""
+    return [
+        {'exercise_id': exercise_id, 'exercise_name': name, 'sets': sets, 'reps': reps,
+         'weight': weight, 'duration': duration}
+        for exercise_id, name, sets, reps, weight, duration in session.logs.order_by('id').values_list(
+            'exercise_id', 'exercise__name', 'sets', 'reps', 'weight', 'duration',
+        )
+    ]
+
+
+def apply_progression(user, items, rule):
+    """Adjusts the items' sets/reps/weight in place according to a PROGRESSION_* rule."""
+    if rule == PROGRESSION_INCREMENT:
+        for item in items:
+            if item['weight']:
+                item['weight'] += WEIGHT_INCREMENT_KG
+    elif rule == PROGRESSION_PERCENT:
+        for item in items:
+            if item['weight']:
+                item['weight'] = _round_to_increment(item['weight'] * PERCENT_PROGRESSION)
+    elif rule == PROGRESSION_SUGGESTED:
+        by_exercise = {
+            perf.exercise_id: perf
+            for perf in ExercisePerformance.objects.filter(
+                user=user, exercise_id__in={item['exercise_id'] for item in items},
+            )
+        }
+        for item in items:
+            suggestion = suggest_next(by_exercise.get(item['exercise_id']))
+            if suggestion is None:
+                continue
+            for field in ('sets', 'reps', 'weight'):
+                if suggestion[field] is not None:
+                    item[field] = suggestion[field]
+    return items
+
+
+def add_items_to_cart(request, date_str, items):
+    """Appends cart-style item dicts to the cart for `date_str`; returns the number added."""
+    cart = request.session.get('workout_cart', {})
+    day = cart.setdefault(date_str, [])
+    for item in items:
+        # Same shape as items added through the log form (values as submitted strings)
+        day.append({
+            'exercise_id': item['exercise_id'],
+            'exercise_name': item['exercise_name'],
+            'sets': str(item['sets']) if item['sets'] is not None else None,
+            'reps': str(item['reps']) if item['reps'] is not None else None,
+            'weight': str(item['weight']) if item['weight'] is not None else None,
+        })
+    if items:
+        CART_SIZE.observe(len(day))
+        request.session['workout_cart'] = cart
+        request.session.modified = True
+    return len(items)
+
+
+def save_items_to_session(user, target_date, items):
+    """
+    Writes cart-style item dicts into the user's session for `target_date`
+    (created if needed) in one transaction with one bulk_create, then does
+    the save path's follow-up work. Returns (target session, log count).
+    """
+    restore_month_for_date(user, target_date)  # Writes into an archived month restore it first
+    with transaction.atomic():
+        target, created = WorkoutSession.objects.get_or_create(user=user, date=target_date)
+        was_training_day = not created and target.logs.exists()
+        WorkoutLog.objects.bulk_create([
+            WorkoutLog(session=target, exercise_id=item['exercise_id'], sets=item['sets'], reps=item['reps'],
+                       weight=item['weight'], duration=item.get('duration'))
+            for item in items
+        ])
+    SAVE_BATCH_SIZE.observe(len(items))
+    if items:
+        update_performance_index(target)
+        if not was_training_day:
+            training_day_added(user, target_date)
+        invalidate_calendar_month(user.pk, target_date.year, target_date.month)
+        bump_data_version(user.pk)
+        publish_workout_saved(user, target, len(items))
+    return target, len(items)
+
+
+def repeat_into_cart(request, session, date_str, rule=PROGRESSION_SAME):
+    """Appends the session's logs to the cart for `date_str`; returns the number of items added."""
+    return add_items_to_cart(request, date_str, apply_progression(request.user, source_items(session), rule))
+
+
+def repeat_into_session(user, session, target_date, rule=PROGRESSION_SAME):
+    """Copies the session's logs into the user's session for `target_date`; see save_items_to_session."""
+    return save_items_to_session(user, target_date, apply_progression(user, source_items(session), rule))
@@ -0,0 +1,76 @@
+# workouts/routines.py
+"""
+Saved routines.
+
+user_routines() is what the log page's routine picker and the routines page
+render: one cached list per user, dropped by the signal handlers below
+whenever a routine or one of its items changes. Starting a routine reads
+its items with one query and materializes them through repeat.py - into
+the day's cart, or straight into the day's session in one transaction with
+one bulk insert - so logging a routine day is a single request.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Routine, RoutineItem
+
+ROUTINE_CACHE_SECONDS = 24 * 60 * 60
+
+
+def _cache_key(user_id):
+    return f"routines:{user_id}"
+
+
+def invalidate_user_routines(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def user_routines(user):
+    """[{id, name, item_count, exercises}] for the user's routines, by name; cached."""
+    key = _cache_key(user.pk)
+    routines = cache.get(key)
+    if routines is not None:
+        return routines
+    routines = {
+        routine_id: {'id': routine_id, 'name': name, 'item_count': 0, 'exercises': []}
+        for routine_id, name in Routine.objects.filter(user=user).values_list('id', 'name')
+    }
+    for routine_id, exercise_name in RoutineItem.objects.filter(routine__user=user).order_by(
+            'routine_id', 'position', 'id').values_list('routine_id', 'exercise__name'):
+        routines[routine_id]['item_count'] += 1
+        routines[routine_id]['exercises'].append(exercise_name)
+    routines = sorted(routines.values(), key=lambda routine: routine['name'].lower())
+    cache.set(key, routines, ROUTINE_CACHE_SECONDS)
+    return routines
+
+
+def routine_items(routine):
+    """The routine's items as cart-style dicts (see repeat.py), in order (one query)."""
+    return [
+        {'exercise_id': exercise_id, 'exercise_name': name, 'sets': sets, 'reps': reps, 'weight': weight}
+        for exercise_id, name, sets, reps, weight in routine.items.order_by('position', 'id').values_list(
+            'exercise_id', 'exercise__name', 'target_sets', 'target_reps', 'target_weight',
+        )
+    ]
+
+
+# --- Invalidation ---
+@receiver(post_save, sender=Routine)
+@receiver(post_delete, sender=Routine)
+def _routine_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_user_routines(instance.user_id)
+
+
+@receiver(post_save, sender=RoutineItem)
+@receiver(post_delete, sender=RoutineItem)
+def _routine_item_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if RoutineItem.routine.is_cached(instance):
+        invalidate_user_routines(instance.routine.user_id)
+        return
+    user_id = Routine.objects.filter(pk=instance.routine_id).values_list('user_id', flat=True).first()
+    if user_id is not None:  # Otherwise the routine is gone and its own post_delete invalidated
+        invalidate_user_routines(user_id)
@@ -0,0 +1,257 @@
+# workouts/search.py
+"""
+Full-text search over session and log notes.
+
+Notes are mirrored into a dedicated search table - an FTS5 virtual table on
+SQLite, a table with a stored tsvector column and GIN index on PostgreSQL -
+kept in sync by the signal handlers below. Queries always go through the
+index (MATCH / @@), never a LIKE '%...%' scan.
+
+Archived sessions keep their rows (archive.py re-indexes them from the
+archive payload), so old notes stay searchable.
+"""
+import html
+import re
+
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.dateparse import parse_date
+from django.utils.safestring import mark_safe
+
+from .bulk import in_bulk_change
+from .models import WorkoutLog, WorkoutSession
+
+SEARCH_TABLE = 'workouts_notes_search'
+KIND_SESSION = 'session'
+KIND_LOG = 'log'
+MAX_QUERY_TERMS = 8
+SNIPPET_TOKENS = 24
+REBUILD_BATCH_SIZE = 2000
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'  # Swapped for <mark> after HTML-escaping
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def is_supported():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def _row_id(kind, object_id):
+    """Stable row id per indexed object, so sync is a primary-key delete + insert."""
+    return object_id * 2 + (1 if kind == KIND_LOG else 0)
+
+
+# --- Index maintenance ---
+def index_entries(entries):
+    """
+    Upserts index rows. Each entry is a dict with kind, object_id, session_id,
+    user_id, date, title and body; entries with blank bodies are removed.
+    """
+    if not entries or not is_supported():
+        return
+    remove_entries([(entry['kind'], entry['object_id']) for entry in entries])
+    rows = [entry for entry in entries if entry['body'] and entry['body'].strip()]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, body, owner, title, kind, object_id, session_id, user_id, date) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                [(_row_id(e['kind'], e['object_id']), e['body'], f"u{e['user_id']}", e['title'], e['kind'],
+                  e['object_id'], e['session_id'], e['user_id'], str(e['date'])) for e in rows],
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, body, title, kind, object_id, session_id, user_id, date) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                [(_row_id(e['kind'], e['object_id']), e['body'], e['title'], e['kind'],
+                  e['object_id'], e['session_id'], e['user_id'], e['date']) for e in rows],
+            )
+
+
+def remove_entries(keys):
+    """Removes index rows for (kind, object_id) pairs."""
+    if not keys or not is_supported():
+        return
+    row_ids = [_row_id(kind, object_id) for kind, object_id in keys]
+    placeholders = ', '.join(['%s'] * len(row_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", row_ids)
+
+
+def session_entry(session):
+    return {
+        'kind': KIND_SESSION, 'object_id': session.pk, 'session_id': session.pk,
+        'user_id': session.user_id, 'date': session.date, 'title': 'Session notes', 'body': session.notes,
+    }
+
+
+def log_entry(log):
+    session = log.session
+    return {
+        'kind': KIND_LOG, 'object_id': log.pk, 'session_id': session.pk,
+        'user_id': session.user_id, 'date': session.date, 'title': log.exercise.name, 'body': log.notes,
+    }
+
+
+def entries_for_archived_sessions(user_id, sessions):
+    """Index entries for archived session dicts (the archive payload format)."""
+    entries = []
+    for session in sessions:
+        entries.append({
+            'kind': KIND_SESSION, 'object_id': session['id'], 'session_id': session['id'],
+            'user_id': user_id, 'date': session['date'], 'title': 'Session notes', 'body': session['notes'],
+        })
+        entries.extend({
+            'kind': KIND_LOG, 'object_id': log['id'], 'session_id': session['id'],
+            'user_id': user_id, 'date': session['date'], 'title': log['exercise_name'], 'body': log['notes'],
+        } for log in session['logs'])
+    return entries
+
+
+@receiver(post_save, sender=WorkoutSession)
+def _index_session(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not instance.notes):
+        return  # Fixtures, or nothing to index and nothing stale to remove
+    index_entries([session_entry(instance)])
+
+
+@receiver(post_save, sender=WorkoutLog)
+def _index_log(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not instance.notes):
+        return
+    index_entries([log_entry(instance)])
+
+
+@receiver(post_delete, sender=WorkoutSession)
+def _unindex_session(sender, instance, **kwargs):
+    if in_bulk_change():
+        return  # The caller reindexes in one go (archive.py)
+    remove_entries([(KIND_SESSION, instance.pk)])
+
+
+@receiver(post_delete, sender=WorkoutLog)
+def _unindex_log(sender, instance, **kwargs):
+    if in_bulk_change():
+        return
+    remove_entries([(KIND_LOG, instance.pk)])
+
+
+# --- Querying ---
+def _terms(query):
+    return _TERM_RE.findall(query.lower())[:MAX_QUERY_TERMS]
+
+
+def _highlight(text):
+    """HTML-escapes a snippet and turns the highlight markers into <mark> tags."""
+    escaped = html.escape(text or '')
+    return mark_safe(escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
+
+
+class SearchResults:
+    """
+    Lazily evaluated, ranked matches for one user's query. Supports count()
+    and slicing, so it can be handed straight to a Paginator.
+    """
+
+    def __init__(self, user, query):
+        self.user = user
+        self.terms = _terms(query)
+
+    def _match_sql(self):
+        """Returns (from/where SQL, params, rank ORDER BY) for the current backend."""
+        if connection.vendor == 'sqlite':
+            # Every term must match; the last one as a prefix (typing "shoul" finds "shoulder")
+            body = ' AND '.join(f'"{term}"' for term in self.terms) + '*'
+            match = f'owner : u{self.user.pk} AND body : ({body})'
+            return f"{SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match], "rank"
+        tsquery = ' & '.join(self.terms) + ':*'
+        return (
+            f"{SEARCH_TABLE}, to_tsquery('english', %s) query WHERE user_id = %s AND document @@ query",
+            [tsquery, self.user.pk],
+            "ts_rank_cd(document, query) DESC",
+        )
+
+    def count(self):
+        if not self.terms or not is_supported():
+            return 0
+        source, params, _ = self._match_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {source}", params)
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.stop is None:
+            raise TypeError("SearchResults only supports bounded slicing.")
+        if not self.terms or not is_supported():
+            return []
+        offset = index.start or 0
+        limit = index.stop - offset
+        source, params, order_by = self._match_sql()
+        if connection.vendor == 'sqlite':
+            snippet = f"snippet({SEARCH_TABLE}, 0, %s, %s, '…', {SNIPPET_TOKENS})"
+            snippet_params = [HIGHLIGHT_START, HIGHLIGHT_END]
+        else:
+            snippet = "ts_headline('english', body, query, %s)"
+            snippet_params = [f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords={SNIPPET_TOKENS}"]
+        sql = (
+            f"SELECT kind, object_id, session_id, date, title, {snippet} FROM {source} "
+            f"ORDER BY {order_by}, date DESC LIMIT %s OFFSET %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, snippet_params + params + [limit, offset])
+            rows = cursor.fetchall()
+        return [
+            {
+                'kind': kind,
+                'object_id': object_id,
+                'session_id': session_id,
+                'date': parse_date(date) if isinstance(date, str) else date,
+                'title': title,
+                'snippet': _highlight(snippet_text),
+            }
+            for kind, object_id, session_id, date, title, snippet_text in rows
+        ]
+
+
+def search_notes(user, query):
+    return SearchResults(user, query)
+
+
+# --- Full rebuild ---
+def rebuild_index():
+    """
+    Rebuilds the whole index from the hot tables plus archived months.
+    Returns the number of entries considered.
+    """
+    from .archive import archived_payloads  # Local import: archive imports this module
+
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    total = 0
+    sessions = WorkoutSession.objects.exclude(notes__isnull=True).exclude(notes='')
+    logs = WorkoutLog.objects.exclude(notes__isnull=True).exclude(notes='').select_related('session', 'exercise')
+    for queryset, to_entry in [(sessions, session_entry), (logs, log_entry)]:
+        batch = []
+        for obj in queryset.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(to_entry(obj))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                index_entries(batch)
+                total += len(batch)
+                batch = []
+        index_entries(batch)
+        total += len(batch)
+
+    for user_id, archived_sessions in archived_payloads():
+        entries = entries_for_archived_sessions(user_id, archived_sessions)
+        index_entries(entries)
+        total += len(entries)
+    return total
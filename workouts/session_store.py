@@ -0,0 +1,23 @@
+# workouts/session_store.py
+"""
+Cache-backed sessions (django.contrib.sessions.backends.cache) that count
+cache hits and misses for the session cache hit ratio metric.
+Selected with SESSION_ENGINE = 'workouts.session_store'.
+"""
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+
+from .metrics import SESSION_CACHE
+
+
+class SessionStore(CacheSessionStore):
+    # Only called for requests carrying a session key; a miss resets the key to None
+
+    def load(self):
+        session_data = super().load()
+        SESSION_CACHE.inc(result='miss' if self._session_key is None else 'hit')
+        return session_data
+
+    async def aload(self):
+        session_data = await super().aload()
+        SESSION_CACHE.inc(result='miss' if self._session_key is None else 'hit')
+        return session_data
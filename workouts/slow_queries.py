@@ -0,0 +1,118 @@
+# workouts/slow_queries.py
+"""
+Slow-query log.
+
+An execute wrapper, added to every database connection when it is created,
+times each statement. Statements slower than settings.SLOW_QUERY_THRESHOLD_MS
+are logged to the 'workouts.slow_queries' logger (a rotating JSON-lines
+file, see settings.LOGGING) with their parameters, the project stack frames
+that issued them, the request's view (from the logging context) and the
+database's query plan.
+
+`python manage.py slow_query_report` groups the log by normalized SQL shape.
+With SLOW_QUERY_THRESHOLD_MS = None nothing is installed.
+"""
+import logging
+import os
+import re
+import time
+import traceback
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('workouts.slow_queries')
+
+MAX_SQL_LENGTH = 4000
+MAX_PARAMS_LENGTH = 1000
+STACK_FRAMES = 6  # Innermost project frames recorded per query
+
+_PROJECT_ROOT = str(settings.BASE_DIR)
+_THIS_FILE = os.path.abspath(__file__)
+_EXPLAIN_PREFIX = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST_RE = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Reduces a statement to its shape: literals become ?, IN (%s, %s, ...) lists collapse."""
+    shape = _STRING_RE.sub('?', sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _PLACEHOLDER_LIST_RE.sub('(...)', shape)
+    return _WHITESPACE_RE.sub(' ', shape).strip()
+
+
+def _project_stack():
+    """'path:line in function' for the innermost project frames (outside site-packages and this module)."""
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if (filename == _THIS_FILE or not filename.startswith(_PROJECT_ROOT)
+                or 'site-packages' in filename):
+            continue
+        frames.append(f"{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.lineno} in {frame.name}")
+        if len(frames) >= STACK_FRAMES:
+            break
+    return frames
+
+
+def _explain(connection, sql, params):
+    """Query plan of a SELECT, run on a fresh DB-API cursor so no execute wrapper sees it."""
+    prefix = _EXPLAIN_PREFIX.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    try:
+        cursor = connection.create_cursor()
+        try:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception as e:  # A failed EXPLAIN must never break the request
+        return f"EXPLAIN failed: {e}"
+    if connection.vendor == 'sqlite':
+        return '\n'.join(str(row[-1]) for row in rows)  # (id, parent, notused, detail)
+    return '\n'.join(' | '.join(str(value) for value in row) for row in rows)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            connection = context['connection']
+            logger.warning(
+                "Slow query (%.1f ms)", elapsed_ms,
+                extra={
+                    'duration_ms': round(elapsed_ms, 3),
+                    'database': connection.alias,
+                    'sql': sql[:MAX_SQL_LENGTH],
+                    'shape': normalize_sql(sql),
+                    'params': repr(params)[:MAX_PARAMS_LENGTH],
+                    'many': many,
+                    'stack': _project_stack(),
+                    'plan': None if many else _explain(connection, sql, params),
+                },
+            )
+
+
+def _install(sender, connection, **kwargs):
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+def install():
+    """Adds the wrapper to every new connection; called from AppConfig.ready()."""
+    if settings.SLOW_QUERY_THRESHOLD_MS is None:
+        return
+    os.makedirs(os.path.dirname(settings.SLOW_QUERY_LOG_FILE), exist_ok=True)
+    connection_created.connect(_install, dispatch_uid='workouts.slow_queries')
@@ -0,0 +1,50 @@
+# workouts/startup_probe.py
+"""
+Cold-start probe: `python -m workouts.startup_probe [path]`.
+
+Run in a fresh interpreter, it loads Django the way a WSGI worker does and
+serves one GET for `path` (default: the login page) through the WSGI
+handler, then prints a JSON line with the timings. import_profile runs it
+under `-X importtime`; bench_startup runs it repeatedly.
+
+Keep this module free of project imports: everything it measures has to be
+imported after the clock starts.
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import json  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+from wsgiref.util import setup_testing_defaults  # noqa: E402
+
+DEFAULT_PATH = '/accounts/login/'
+
+
+def run_probe(path):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gym_tracker_project.settings')
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()  # django.setup(): settings, apps, models, AppConfig.ready()
+    setup_done = time.perf_counter()
+
+    environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET'}
+    setup_testing_defaults(environ)
+    status = []
+    body = application(environ, lambda status_line, headers, exc_info=None: status.append(status_line))
+    size = sum(len(chunk) for chunk in body)  # URLconf, middleware, view and template all load here
+    if hasattr(body, 'close'):
+        body.close()
+    finished = time.perf_counter()
+    return {
+        'path': path,
+        'status': int(status[0].split()[0]),
+        'bytes': size,
+        'setup_ms': round((setup_done - STARTED) * 1000, 2),
+        'first_response_ms': round((finished - STARTED) * 1000, 2),
+        'modules': len(sys.modules),
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run_probe(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH)))
@@ -0,0 +1,124 @@
+# workouts/streaks.py
+"""
+Training streaks and weekly consistency.
+
+A training day is a date with at least one logged exercise (live, or
+archived into ExerciseDayRollup). The streak record lives on UserProfile,
+which the authentication backends (auth_backends.py) load together with
+request.user, so the dashboard shows it without a query of its own.
+
+Like the performance index, the record is folded forward in O(1) when a
+save adds a day on or after the last training day (the usual case: logging
+today). Back-dated days and days that lose their last log change runs in
+the middle of the history, so those rebuild the record from the user's
+distinct training dates (two queries).
+"""
+import datetime
+
+from .models import ExerciseDayRollup, UserProfile, WorkoutSession
+
+STREAK_FIELDS = ['first_training_date', 'last_training_date', 'streak_start_date',
+                 'longest_streak', 'training_days', 'training_weeks']
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def _week(date):
+    return date.isocalendar()[:2]
+
+
+def summarize_training_days(dates):
+    """Streak record fields (see STREAK_FIELDS) for an iterable of training dates."""
+    dates = sorted(set(dates))
+    if not dates:
+        return dict.fromkeys(STREAK_FIELDS[:3]) | dict.fromkeys(STREAK_FIELDS[3:], 0)
+
+    longest, run_start = 1, dates[0]
+    for previous, date in zip(dates, dates[1:]):
+        if date - previous != ONE_DAY:
+            run_start = date
+        longest = max(longest, (date - run_start).days + 1)
+    return {
+        'first_training_date': dates[0],
+        'last_training_date': dates[-1],
+        'streak_start_date': run_start,
+        'longest_streak': longest,
+        'training_days': len(dates),
+        'training_weeks': len({_week(date) for date in dates}),
+    }
+
+
+def training_dates(user):
+    """The user's distinct training dates, live and archived."""
+    live = WorkoutSession.objects.filter(user=user, logs__isnull=False).values_list('date', flat=True).distinct()
+    archived = ExerciseDayRollup.objects.filter(user=user).values_list('date', flat=True).distinct()
+    return set(live) | set(archived)
+
+
+def _profile(user):
+    try:
+        return user.profile  # Already loaded with request.user (auth_backends.py)
+    except UserProfile.DoesNotExist:
+        return UserProfile.objects.get_or_create(user=user)[0]
+
+
+def rebuild_streak(user):
+    """Recomputes the user's streak record from their training dates."""
+    profile = _profile(user)
+    for field, value in summarize_training_days(training_dates(user)).items():
+        setattr(profile, field, value)
+    profile.save(update_fields=STREAK_FIELDS)
+    return profile
+
+
+def training_day_added(user, date):
+    """Records that `date` became a training day (its first exercise was logged)."""
+    profile = _profile(user)
+    last = profile.last_training_date
+    if last is None:
+        profile.first_training_date = profile.streak_start_date = date
+        profile.longest_streak = profile.training_days = profile.training_weeks = 0
+    elif date == last:
+        return
+    elif date < last:
+        rebuild_streak(user)  # Back-dated: may bridge or extend runs before the current one
+        return
+    elif date - last != ONE_DAY:
+        profile.streak_start_date = date
+
+    if last is None or _week(date) != _week(last):
+        profile.training_weeks += 1
+    profile.training_days += 1
+    profile.last_training_date = date
+    profile.longest_streak = max(profile.longest_streak, (date - profile.streak_start_date).days + 1)
+    profile.save(update_fields=STREAK_FIELDS)
+
+
+def training_day_removed(user, date):
+    """Records that `date` lost its last logged exercise."""
+    rebuild_streak(user)
+
+
+def streak_summary(profile, today):
+    """
+    What the dashboard shows, computed from the stored record alone:
+    the current streak (still alive if the last training day was today or
+    yesterday), the longest one, and weekly adherence - the share of weeks
+    since the first training week that had at least one training day.
+    """
+    if profile is None or profile.last_training_date is None:
+        return None
+    last = profile.last_training_date
+    alive = last >= today - ONE_DAY
+    first_monday = profile.first_training_date - datetime.timedelta(days=profile.first_training_date.weekday())
+    this_monday = max(today, last) - datetime.timedelta(days=max(today, last).weekday())
+    total_weeks = (this_monday - first_monday).days // 7 + 1
+    return {
+        'current': (last - profile.streak_start_date).days + 1 if alive else 0,
+        'trained_today': last == today,
+        'longest': profile.longest_streak,
+        'training_days': profile.training_days,
+        'training_weeks': profile.training_weeks,
+        'total_weeks': total_weeks,
+        'adherence_percent': round(100 * profile.training_weeks / total_weeks),
+    }
@@ -0,0 +1,60 @@
+# workouts/tasks.py
+"""Background tasks run by the run_jobs worker (see workouts/jobs.py)."""
+import csv
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .jobs import task
+from .models import WorkoutLog
+from .recommendations import rebuild_performance_index
+
+EXPORT_COLUMNS = ['date', 'exercise', 'sets', 'reps', 'weight_kg', 'duration', 'log_notes', 'session_notes']
+
+
+@task('export_workouts_csv')
+def export_workouts_csv(ctx, user_id):
+    """Writes the user's full workout history to a CSV file under EXPORTS_ROOT."""
+    user = User.objects.get(pk=user_id)
+    logs = WorkoutLog.objects.filter(session__user=user).order_by('session__date', 'id').values_list(
+        'session__date', 'exercise__name', 'sets', 'reps', 'weight', 'duration', 'notes', 'session__notes'
+    )
+    total = logs.count() or 1
+
+    os.makedirs(settings.EXPORTS_ROOT, exist_ok=True)
+    filename = f"workouts-{user.pk}-{timezone.now().strftime('%Y%m%d%H%M%S')}-{ctx.job.pk}.csv"
+    path = os.path.join(settings.EXPORTS_ROOT, filename)
+
+    rows_written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as export_file:
+        writer = csv.writer(export_file)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in logs.iterator(chunk_size=2000):
+            writer.writerow(['' if value is None else value for value in row])
+            rows_written += 1
+            if rows_written % 2000 == 0:
+                ctx.set_progress(rows_written * 100 // total)
+
+    return {'filename': filename, 'rows': rows_written}
+
+
+@task('compute_insights')
+def compute_insights(ctx, user_id, data_version=None):
+    """Precomputes the Insights page for a user. `data_version` stays in the payload for insights_view."""
+    from .analytics import build_insights  # The worker loads numpy when this task first runs
+
+    user = User.objects.get(pk=user_id)
+    ctx.set_progress(10)
+    insights = build_insights(user, today=timezone.now().date(), progress=ctx.set_progress)
+    for row in insights['exercises']:
+        row['last_date'] = row['last_date'].isoformat()  # Keep the result JSON-friendly
+    return insights
+
+
+@task('rebuild_performance_index')
+def rebuild_performance_index_task(ctx, user_id):
+    """Rebuilds the log page suggestion index for a user."""
+    user = User.objects.get(pk=user_id)
+    return {'rows': rebuild_performance_index(user)}
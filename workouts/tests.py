@@ -1,3 +1,604 @@
-from django.test import TestCase
+import base64
+import datetime
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import types
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import archive, jobs, middleware
+from .api import ApiError, _decode_cursor, _encode_cursor, _selected_fields
+from .coaching import athlete_summaries
+from .digest import pending_chunks
+from .management.commands.import_profile import parse_importtime
+from .models import (ArchivedMonth, BackgroundJob, CoachingRelationship, Exercise, Routine, RoutineItem, UserProfile,
+                     WorkoutLog, WorkoutSession)
+from .slow_queries import normalize_sql
+from .streaks import summarize_training_days
+from .timezones import search_timezones
+
+
+def _cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+class ApiCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('athlete', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_malformed_cursors_are_rejected_with_400(self):
+        bad_cursors = ['not-base64!', _cursor({'x': 1}), _cursor([1]), _cursor('2026-01-01'), _cursor(None)]
+        for name in ('sessions', 'logs', 'exercises'):
+            for cursor in bad_cursors:
+                with self.subTest(endpoint=name, cursor=cursor):
+                    response = self.client.get(reverse(f'api_v1:{name}'), {'cursor': cursor})
+                    self.assertEqual(response.status_code, 400)
+
+    def test_valid_cursor_is_accepted(self):
+        response = self.client.get(reverse('api_v1:sessions'), {'cursor': _cursor(['2026-01-01', 10])})
+        self.assertEqual(response.status_code, 200)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    fake_brotli = types.SimpleNamespace(compress=lambda data, quality: b'br:' + data[:10])
+
+    def _compress(self, content_type):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        body = b'<p>csrf token abcdef</p>' * 50
+        compressor = middleware.CompressionMiddleware(lambda request: HttpResponse(body, content_type=content_type))
+        with mock.patch.object(middleware, 'brotli', self.fake_brotli):
+            return compressor(request)
+
+    def test_html_keeps_the_padded_gzip_path(self):
+        self.assertEqual(self._compress('text/html; charset=utf-8')['Content-Encoding'], 'gzip')
+
+    def test_json_uses_brotli(self):
+        self.assertEqual(self._compress('application/json')['Content-Encoding'], 'br')
+
+
+class JobRunnerTests(TestCase):
+    def _running_job(self, heartbeat_age_seconds):
+        job = BackgroundJob.objects.create(task='rebuild_performance_index', payload={'user_id': 0})
+        self.assertTrue(jobs.claim(job, worker='test'))
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - datetime.timedelta(seconds=heartbeat_age_seconds))
+        return job
+
+    def test_only_jobs_with_a_missed_heartbeat_are_requeued(self):
+        alive = self._running_job(heartbeat_age_seconds=10)
+        dead = self._running_job(heartbeat_age_seconds=jobs.HEARTBEAT_TIMEOUT_SECONDS + 5)
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        alive.refresh_from_db()
+        dead.refresh_from_db()
+        self.assertEqual(alive.status, BackgroundJob.STATUS_RUNNING)
+        self.assertEqual(dead.status, BackgroundJob.STATUS_QUEUED)
+
+    def test_heartbeat_keeps_a_slow_job_running(self):
+        job = self._running_job(heartbeat_age_seconds=jobs.HEARTBEAT_TIMEOUT_SECONDS + 5)
+        jobs.heartbeat([job])
+        self.assertEqual(jobs.requeue_stale_jobs(), 0)
+
+    def test_a_superseded_attempt_cannot_overwrite_the_retry(self):
+        job = self._running_job(heartbeat_age_seconds=jobs.HEARTBEAT_TIMEOUT_SECONDS + 5)
+        jobs.requeue_stale_jobs()
+        BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        retry = jobs.claim_next('other-worker')
+        self.assertEqual(retry.attempts, 2)
+
+        with mock.patch.dict(jobs._TASKS, {job.task: lambda ctx, **payload: {'stale': True}}):
+            jobs.run_job(job)  # The first attempt finishes late
+        retry.refresh_from_db()
+        self.assertEqual(retry.status, BackgroundJob.STATUS_RUNNING)
+        self.assertIsNone(retry.result)
+
+    def test_overdue_job_is_retried_and_its_late_result_discarded(self):
+        job = self._running_job(heartbeat_age_seconds=0)
+        self.assertEqual(jobs.expire_overdue_jobs([job]), [])
+        job.started_at -= datetime.timedelta(seconds=job.timeout_seconds + 1)
+        self.assertEqual(jobs.expire_overdue_jobs([job]), [job])
+
+        with mock.patch.dict(jobs._TASKS, {job.task: lambda ctx, **payload: {'late': True}}):
+            jobs.run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_QUEUED)
+        self.assertIn('timeout', job.error)
+        self.assertIsNone(job.result)
+
+    def test_compute_insights_checks_its_timeout(self):
+        from . import tasks
+
+        user = User.objects.create_user('athlete')
+        job = BackgroundJob.objects.create(task='compute_insights', payload={'user_id': user.pk})
+        ctx = jobs.JobContext(job)
+        ctx._deadline = time.monotonic() - 1
+        with self.assertRaises(jobs.JobTimeout):
+            tasks.compute_insights(ctx, user_id=user.pk)
+
+    @override_settings(BACKGROUND_JOBS_RETENTION_DAYS=7)
+    def test_purge_deletes_only_finished_jobs_past_retention(self):
+        now = timezone.now()
+        old = BackgroundJob.objects.create(task='compute_insights', status=BackgroundJob.STATUS_SUCCEEDED,
+                                           finished_at=now - datetime.timedelta(days=8))
+        recent = BackgroundJob.objects.create(task='compute_insights', status=BackgroundJob.STATUS_SUCCEEDED,
+                                              finished_at=now - datetime.timedelta(days=1))
+        queued = BackgroundJob.objects.create(task='compute_insights')
+        self.assertEqual(jobs.purge_finished_jobs(now), 1)
+        self.assertQuerySetEqual(BackgroundJob.objects.order_by('pk'), [recent, queued])
+        self.assertFalse(BackgroundJob.objects.filter(pk=old.pk).exists())
+
+
+class ArchiveMonthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exercise = Exercise.objects.create(name='Squat')
+
+    def setUp(self):
+        archive_root = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_root.cleanup)
+        settings_override = override_settings(ARCHIVE_ROOT=archive_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _user_with_month(self, username, days):
+        user = User.objects.create_user(username)
+        for day in range(1, days + 1):
+            session = WorkoutSession.objects.create(user=user, date=datetime.date(2020, 1, day), notes='heavy')
+            WorkoutLog.objects.bulk_create(
+                WorkoutLog(session=session, exercise=self.exercise, sets=3, reps=5, weight=100, notes='felt good')
+                for _ in range(3)
+            )
+        return user
+
+    def _archive(self, user):
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            moved = archive.archive_month(user.pk, 2020, 1)
+        return moved, len(queries)
+
+    def test_query_count_does_not_grow_with_the_month(self):
+        small, large = self._user_with_month('small', 2), self._user_with_month('large', 20)
+        small_moved, small_queries = self._archive(small)
+        large_moved, large_queries = self._archive(large)
+        self.assertEqual((small_moved, large_moved), (2, 20))
+        self.assertEqual(small_queries, large_queries)
+        self.assertFalse(WorkoutLog.objects.exists())
+
+    def test_archive_file_is_published_on_commit(self):
+        user = self._user_with_month('athlete', 3)
+        self._archive(user)
+        record = ArchivedMonth.objects.get(user=user)
+        self.assertTrue(os.path.exists(archive._archive_path(record.filename)))
+        self.assertEqual(archive.restore_month(user, 2020, 1), 3)
+        self.assertEqual(WorkoutLog.objects.filter(session__user=user).count(), 9)
+
+    def test_rolled_back_archive_leaves_no_file(self):
+        user = self._user_with_month('athlete', 3)
+        with mock.patch.object(archive.search, 'index_entries', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self._archive(user)
+        path = archive._archive_path(archive._archive_filename(user.pk, 2020, 1))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(f"{path}.tmp"))
+        self.assertEqual(WorkoutSession.objects.filter(user=user).count(), 3)
+
+
+@override_settings(BACKGROUND_JOBS_EAGER=True)
+class InsightsFreshnessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('lifter', password='pw')
+        cls.exercise = Exercise.objects.create(name='Squat')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = WorkoutSession.objects.create(user=self.user, date=datetime.date(2020, 1, 6))
+        self.log = WorkoutLog.objects.create(session=session, exercise=self.exercise, sets=3, reps=5, weight=100)
+
+    def _computed_jobs(self):
+        self.client.get(reverse('workouts:insights'))
+        return BackgroundJob.objects.filter(user=self.user, task='compute_insights').count()
+
+    def test_result_is_reused_while_the_data_is_unchanged(self):
+        self.assertEqual(self._computed_jobs(), 1)
+        self.assertEqual(self._computed_jobs(), 1)
+
+    def test_deleting_the_only_log_of_an_exercise_recomputes(self):
+        self.assertEqual(self._computed_jobs(), 1)
+        self.log.delete()  # Also removes the exercise's whole index row
+        self.assertEqual(self._computed_jobs(), 2)
+
+    def test_archiving_a_month_recomputes(self):
+        self.assertEqual(self._computed_jobs(), 1)
+        with tempfile.TemporaryDirectory() as archive_root, override_settings(ARCHIVE_ROOT=archive_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                archive.archive_month(self.user.pk, 2020, 1)
+        self.assertEqual(self._computed_jobs(), 2)
+
+
+class DeleteCustomExerciseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('lifter', password='pw')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.exercise = Exercise.objects.create(name='Zercher Squat', user=self.user)
+
+    def _delete(self):
+        response = self.client.post(reverse('workouts:delete_custom_exercise', args=[self.exercise.pk]), follow=True)
+        return [str(message) for message in response.context['messages']]
+
+    def test_unused_exercise_is_deleted(self):
+        self.assertEqual(self._delete(), ["Custom exercise 'Zercher Squat' deleted successfully."])
+        self.assertFalse(Exercise.objects.filter(pk=self.exercise.pk).exists())
+
+    def test_names_the_routines_that_still_use_it(self):
+        for name in ('Leg Day', 'Full Body'):
+            routine = Routine.objects.create(user=self.user, name=name)
+            RoutineItem.objects.create(routine=routine, exercise=self.exercise)
+        self.assertEqual(self._delete(), [
+            "Cannot delete 'Zercher Squat': it is still used in routines 'Full Body', 'Leg Day'."
+        ])
+        self.assertTrue(Exercise.objects.filter(pk=self.exercise.pk).exists())
+
+    def test_mentions_logged_workouts(self):
+        session = WorkoutSession.objects.create(user=self.user, date=datetime.date(2020, 1, 6))
+        WorkoutLog.objects.create(session=session, exercise=self.exercise, sets=3, reps=5, weight=60)
+        self.assertEqual(self._delete(), ["Cannot delete 'Zercher Squat': it is still used in your logged workouts."])
+
+
+class AthleteSummaryTests(TestCase):
+    def test_adherence_counts_only_sessions_with_logs(self):
+        today = datetime.date(2026, 3, 28)
+        athlete = User.objects.create_user('athlete')
+        exercise = Exercise.objects.create(name='Squat')
+        for day in (2, 9, 16):
+            session = WorkoutSession.objects.create(user=athlete, date=today.replace(day=day))
+            for _ in range(2):
+                WorkoutLog.objects.create(session=session, exercise=exercise, sets=3, reps=5, weight=100)
+        WorkoutSession.objects.create(user=athlete, date=today.replace(day=20))  # Opened, nothing logged
+
+        summary = athlete_summaries([athlete.pk], today)[athlete.pk]
+        self.assertEqual(summary['recent_sessions'], 3)
+        self.assertEqual(summary['adherence_percent'], 25)
+        self.assertEqual(summary['last_session_date'], today.replace(day=16))
+
+
+class LoggingConfigTests(SimpleTestCase):
+    @override_settings(ADMINS=[('ops', 'ops@example.com')], DEBUG=False)
+    def test_server_errors_are_mailed_to_admins(self):
+        logging.getLogger('django.request').error('Internal Server Error: /boom/')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Internal Server Error: /boom/', mail.outbox[0].subject)
+
+    def test_console_output_is_silenced_during_tests(self):
+        self.assertIsInstance(logging._handlers['json_console'], logging.NullHandler)
+
+
+class AdminListFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='pw')
+        cls.exercise = Exercise.objects.create(name='Squat')
+        for username in ('ann', 'bob'):
+            session = WorkoutSession.objects.create(user=User.objects.create_user(username), date=datetime.date(2026, 1, 5))
+            WorkoutLog.objects.create(session=session, exercise=cls.exercise, sets=3, reps=5, weight=100)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_user_filter_does_not_list_users(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:workouts_workoutlog_changelist'))
+        self.assertContains(response, 'name="session__user__id__exact"')
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'FROM "auth_user"' in query['sql'] and 'WHERE' not in query['sql']])
+
+    def test_user_filter_narrows_the_changelist(self):
+        ann = User.objects.get(username='ann')
+        response = self.client.get(reverse('admin:workouts_workoutsession_changelist'), {'user__id__exact': ann.pk})
+        self.assertEqual([session.user for session in response.context['cl'].result_list], [ann])
+
+
+class ExerciseSummaryTests(TestCase):
+    def test_personal_record_counts_logs_without_sets_and_reps(self):
+        from .analytics import exercise_summary
+
+        user = User.objects.create_user('athlete')
+        exercise = Exercise.objects.create(name='Squat')
+        session = WorkoutSession.objects.create(user=user, date=datetime.date(2026, 1, 5))
+        WorkoutLog.objects.create(session=session, exercise=exercise, sets=3, reps=5, weight=100)
+        WorkoutLog.objects.create(session=session, exercise=exercise, weight=120)  # Single, sets/reps not noted
+        WorkoutLog.objects.create(session=session, exercise=exercise, sets=1, reps=1)
+        summary = exercise_summary(user, exercise.pk)
+        self.assertEqual(summary['personal_record'], 120)
+        self.assertEqual(summary['training_days'], 1)
+
+
+class AnalyticsHelperTests(SimpleTestCase):
+    def setUp(self):
+        import numpy as np
+        from . import analytics
+
+        self.np, self.analytics = np, analytics
+
+    def test_rolling_sum_is_shorter_at_the_start(self):
+        self.assertEqual(self.analytics.rolling_sum([1.0, 2.0, 3.0, 4.0], 2).tolist(), [1.0, 3.0, 5.0, 7.0])
+
+    def test_acute_chronic_ratio_needs_a_full_chronic_window(self):
+        ratio = self.analytics.acute_chronic_ratio(self.np.array([0.0, 10.0, 10.0, 10.0, 40.0]), acute=1, chronic=4)
+        self.assertTrue(self.np.isnan(ratio[:3]).all())
+        self.assertAlmostEqual(ratio[3], 10.0 / 7.5)
+        self.assertAlmostEqual(ratio[4], 40.0 / 17.5)
+
+    def test_acute_chronic_ratio_is_nan_without_chronic_load(self):
+        self.assertTrue(self.np.isnan(self.analytics.acute_chronic_ratio(self.np.zeros(5), acute=1, chronic=2)).all())
+
+    def test_lttb_keeps_the_ends_and_the_peak(self):
+        x = self.np.arange(100)
+        y = self.np.zeros(100)
+        y[37] = 50.0
+        indices = self.analytics.lttb_indices(x, y, 10)
+        self.assertEqual(len(indices), 10)
+        self.assertEqual((indices[0], indices[-1]), (0, 99))
+        self.assertIn(37, indices)
+        self.assertTrue((self.np.diff(indices) > 0).all())
+
+    def test_lttb_returns_every_index_when_there_is_nothing_to_drop(self):
+        self.assertEqual(self.analytics.lttb_indices([1, 2, 3], [1, 2, 3], 10).tolist(), [0, 1, 2])
+        self.assertEqual(self.analytics.lttb_indices(list(range(10)), list(range(10)), 2).tolist(), list(range(10)))
+
+
+class HelperTests(SimpleTestCase):
+    def test_summarize_training_days(self):
+        dates = [datetime.date(2026, 1, day) for day in (1, 2, 3, 3, 7, 8, 12)]  # Thu..Sat, Wed-Thu, Mon
+        self.assertEqual(summarize_training_days(dates), {
+            'first_training_date': datetime.date(2026, 1, 1),
+            'last_training_date': datetime.date(2026, 1, 12),
+            'streak_start_date': datetime.date(2026, 1, 12),
+            'longest_streak': 3,
+            'training_days': 6,
+            'training_weeks': 3,
+        })
+
+    def test_summarize_no_training_days(self):
+        summary = summarize_training_days([])
+        self.assertIsNone(summary['last_training_date'])
+        self.assertEqual((summary['longest_streak'], summary['training_days']), (0, 0))
+
+    def test_normalize_sql_reduces_a_statement_to_its_shape(self):
+        self.assertEqual(
+            normalize_sql("SELECT *  FROM t\n WHERE name = 'bob' AND age > 42 AND id IN (%s, %s, %s)"),
+            "SELECT * FROM t WHERE name = ? AND age > ? AND id IN (...)",
+        )
+        self.assertEqual(normalize_sql("SELECT * FROM t WHERE id IN (%s, %s)"),
+                         normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s, %s)"))
+
+    def test_search_timezones_ranks_name_part_prefixes_first(self):
+        self.assertEqual(search_timezones('new york'), ['America/New_York'])
+        results = search_timezones('ver')
+        self.assertLess(results.index('Atlantic/Cape_Verde'), results.index('America/Denver'))
+        self.assertEqual(search_timezones('  '), [])
+        self.assertLessEqual(len(search_timezones('a', limit=5)), 5)
+
+    def test_parse_importtime(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   zipimport',
+            'import time:        80 |        300 |     encodings.aliases',
+            'unrelated output',
+        ]
+        self.assertEqual(parse_importtime(lines), [('zipimport', 120, 120, 1), ('encodings.aliases', 80, 300, 2)])
+
+    def test_cursor_round_trip(self):
+        cursor = _encode_cursor([datetime.date(2026, 1, 5), 42])
+        request = RequestFactory().get('/', {'cursor': cursor})
+        self.assertEqual(_decode_cursor(request), ['2026-01-05', 42])
+        self.assertIsNone(_decode_cursor(RequestFactory().get('/')))
+
+    def test_selected_fields(self):
+        allowed = ['id', 'date', 'notes']
+        parse = lambda query, primary=True: _selected_fields(RequestFactory().get('/', query), 'sessions', allowed, primary)
+        self.assertEqual(parse({}), allowed)
+        self.assertEqual(parse({'fields': 'date, id'}), ['date', 'id'])
+        self.assertEqual(parse({'fields[sessions]': 'notes', 'fields': 'id'}), ['notes'])
+        self.assertEqual(parse({'fields': 'id'}, primary=False), allowed)
+        with self.assertRaisesMessage(ApiError, 'Unknown sessions field(s): weight'):
+            parse({'fields': 'id,weight'})
+
+
+class PendingChunksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = [User.objects.create_user(f'user{n}').pk for n in range(10)]
+
+    def test_chunks_skip_done_ranges(self):
+        ids = self.ids
+        done = [(ids[2], ids[4]), (ids[3], ids[5]), (ids[8], ids[8])]  # Overlapping ranges merge
+        chunks = list(pending_chunks(User.objects.all(), done, chunk_size=3))
+        self.assertEqual([user_id for chunk in chunks for user_id in chunk], ids[:2] + ids[6:8] + ids[9:])
+        self.assertTrue(all(0 < len(chunk) <= 3 for chunk in chunks))
+
+    def test_pages_by_primary_key(self):
+        with self.assertNumQueries(4):  # Three full pages of 3, then the empty one
+            self.assertEqual(len(list(pending_chunks(User.objects.filter(pk__lte=self.ids[8]), [], 3))), 3)
+
+
+class DashboardQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exercise = Exercise.objects.create(name='Squat')
+        cls.coach = User.objects.create_user('coach')
+        UserProfile.objects.filter(user=cls.coach).update(is_coach=True)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _athlete(self, username, sessions):
+        athlete = User.objects.create_user(username)
+        CoachingRelationship.objects.create(coach=self.coach, athlete=athlete)
+        today = timezone.localdate()
+        for days_ago in range(sessions):
+            session = WorkoutSession.objects.create(user=athlete, date=today - datetime.timedelta(days=days_ago))
+            WorkoutLog.objects.create(session=session, exercise=self.exercise, sets=3, reps=5, weight=100)
+        return athlete
+
+    def test_dashboard(self):
+        athlete = self._athlete('athlete', sessions=5)
+        self.client.force_login(athlete)
+        # The user with its profile (streak card included), the month's log counts and archived months
+        with self.assertNumQueries(3):
+            self.client.get(reverse('workouts:dashboard'))
+        with self.assertNumQueries(1):  # The calendar is cached; sessions live in the cache too
+            self.client.get(reverse('workouts:dashboard'))
+
+    def test_coach_dashboard_does_not_grow_with_athletes(self):
+        self.client.force_login(self.coach)
+        self._athlete('first', sessions=2)
+        with CaptureQueriesContext(connection) as one_athlete:
+            self.client.get(reverse('workouts:coach_dashboard'))
+        for n in range(5):
+            self._athlete(f'athlete{n}', sessions=n + 3)
+        with CaptureQueriesContext(connection) as six_athletes:
+            response = self.client.get(reverse('workouts:coach_dashboard'))
+        self.assertEqual(len(response.context['athlete_rows']), 6)
+        self.assertEqual(len(one_athlete), len(six_athletes))
+
+
+class CoachFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create_user('coach')
+        UserProfile.objects.filter(user=cls.coach).update(is_coach=True)
+        cls.athlete = User.objects.create_user('athlete')
+        CoachingRelationship.objects.create(coach=cls.coach, athlete=cls.athlete)
+
+    def test_wsgi_feed_answers_204_instead_of_streaming(self):
+        self.client.force_login(self.coach)
+        response = self.client.get(reverse('workouts:coach_feed'))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_feed_is_for_coaches_only(self):
+        self.client.force_login(self.athlete)
+        self.assertEqual(self.client.get(reverse('workouts:coach_feed')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('workouts:coach_feed_recent')).status_code, 403)
+
+    def test_polling_returns_workouts_created_since_the_last_poll(self):
+        self.client.force_login(self.coach)
+        first = self.client.get(reverse('workouts:coach_feed_recent')).json()
+        self.assertEqual(first['events'], [])
+        session = WorkoutSession.objects.create(user=self.athlete, date=datetime.date(2026, 1, 5))
+        WorkoutLog.objects.create(session=session, exercise=Exercise.objects.create(name='Squat'), sets=3, reps=5)
+        WorkoutSession.objects.create(user=User.objects.create_user('stranger'), date=datetime.date(2026, 1, 5))
+
+        second = self.client.get(reverse('workouts:coach_feed_recent'), {'since': first['now']}).json()
+        self.assertEqual(second['events'], [{'athlete': 'athlete', 'date': '2026-01-05', 'exercises': 1}])
+        third = self.client.get(reverse('workouts:coach_feed_recent'), {'since': second['now']}).json()
+        self.assertEqual(third['events'], [])
+
+    async def test_asgi_feed_streams(self):
+        await self.async_client.aforce_login(self.coach)
+        response = await self.async_client.get(reverse('workouts:coach_feed'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        await stream.aclose()
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrates workouts back to `migrate_from`, lets setUpBeforeMigration add rows, then migrates to `migrate_to`."""
+    migrate_from = migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        latest = executor.loader.graph.leaf_nodes('workouts')
+        self.addCleanup(lambda: MigrationExecutor(connection).migrate(latest))
+        executor.migrate([('workouts', self.migrate_from)])
+        self.setUpBeforeMigration(executor.loader.project_state(('workouts', self.migrate_from)).apps)
+        executor = MigrationExecutor(connection)  # Reload the graph: the state changed
+        executor.migrate([('workouts', self.migrate_to)])
+        self.apps = executor.loader.project_state(('workouts', self.migrate_to)).apps
+
+    def setUpBeforeMigration(self, apps):
+        pass
+
+
+class PerformanceIndexBackfillTests(MigrationTestCase):
+    migrate_from = '0003_alter_exercise_options_exercise_user_and_more'
+    migrate_to = '0004_exerciseperformance'
+
+    def setUpBeforeMigration(self, apps):
+        user = apps.get_model('auth', 'User').objects.create(username='athlete')
+        squat = apps.get_model('workouts', 'Exercise').objects.create(name='Squat')
+        WorkoutSession, WorkoutLog = apps.get_model('workouts', 'WorkoutSession'), apps.get_model('workouts', 'WorkoutLog')
+        for day, weight in [(1, 100), (3, 110), (5, 105), (8, 105)]:
+            session = WorkoutSession.objects.create(user=user, date=datetime.date(2026, 1, day))
+            WorkoutLog.objects.create(session=session, exercise=squat, sets=3, reps=5, weight=weight)
+        WorkoutLog.objects.create(session=session, exercise=squat, sets=1, reps=8, weight=60)  # Back-off set
+
+    def test_index_is_built_from_existing_logs(self):
+        performance = self.apps.get_model('workouts', 'ExercisePerformance').objects.get()
+        self.assertEqual(performance.last_date, datetime.date(2026, 1, 8))
+        self.assertEqual((performance.last_sets, performance.last_reps, performance.last_weight), (3, 5, 105))
+        self.assertEqual((performance.previous_weight, performance.best_weight), (105, 110))
+        self.assertEqual(performance.stalled_sessions, 2)
+
+
+class SessionCountBackfillTests(MigrationTestCase):
+    migrate_from = '0013_routines'
+    migrate_to = '0014_exercise_usage_counts'
+
+    def setUpBeforeMigration(self, apps):
+        user = apps.get_model('auth', 'User').objects.create(username='athlete')
+        Exercise = apps.get_model('workouts', 'Exercise')
+        squat, bench = Exercise.objects.create(name='Squat'), Exercise.objects.create(name='Bench')
+        WorkoutSession, WorkoutLog = apps.get_model('workouts', 'WorkoutSession'), apps.get_model('workouts', 'WorkoutLog')
+        for day in (10, 12):
+            session = WorkoutSession.objects.create(user=user, date=datetime.date(2026, 1, day))
+            WorkoutLog.objects.create(session=session, exercise=squat, sets=3, reps=5, weight=100)
+            WorkoutLog.objects.create(session=session, exercise=squat, sets=1, reps=5, weight=80)
+        apps.get_model('workouts', 'ExerciseDayRollup').objects.create(
+            user=user, exercise=bench, date=datetime.date(2024, 1, 2), log_count=1, top_sets=3, top_reps=5, top_weight=60)
+        # No index rows: history logged before the index was backfilled
+
+    def test_missing_index_rows_are_created_with_counts(self):
+        counts = dict(self.apps.get_model('workouts', 'ExercisePerformance').objects.values_list(
+            'exercise__name', 'session_count'))
+        self.assertEqual(counts, {'Squat': 2, 'Bench': 1})
+
+
+class RunJobsTimeoutTests(TransactionTestCase):
+    def test_worker_gives_up_on_a_hung_task(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        job = BackgroundJob.objects.create(task='rebuild_performance_index', payload={'user_id': 0},
+                                           timeout_seconds=1)
+        hung = lambda ctx, **payload: release.wait(10)  # Never checks its timeout
+        threading.Timer(3, release.set).start()  # Lets the worker's thread pool shut down afterwards
+        with mock.patch.dict(jobs._TASKS, {job.task: hung}):
+            call_command('run_jobs', '--once', '--poll-interval', '0.1', stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_QUEUED)  # Retried, not left running
+        self.assertIn('timeout', job.error)
+        self.assertEqual(job.result, None)
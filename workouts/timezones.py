@@ -0,0 +1,73 @@
+# workouts/timezones.py
+"""
+Time zone names for the profile picker.
+
+The profile page no longer renders ~430 <option> elements on every GET. The
+field is a text input backed by a <datalist>: the full option list is
+rendered once per process and served as a cacheable fragment
+(timezone_options_view) that the picker fetches when first focused, and
+timezone_search_view returns only the zones matching what has been typed.
+
+Saved values are validated with a set lookup against zoneinfo's zones
+instead of a scan of the choice list.
+"""
+import functools
+import hashlib
+import zoneinfo
+
+from django.core.exceptions import ValidationError
+from django.utils.html import format_html_join
+
+SEARCH_LIMIT = 20
+
+
+@functools.cache
+def timezone_choices():
+    """(name, name) for pytz's common timezones - the curated list offered in the picker."""
+    import pytz  # Only needed when the list is first built
+    return [(tz, tz) for tz in pytz.common_timezones]
+
+
+@functools.cache
+def available_timezones():
+    return frozenset(zoneinfo.available_timezones())
+
+
+def validate_timezone(value):
+    if value not in available_timezones():
+        raise ValidationError(
+            "%(value)s is not a known time zone.", code='invalid_timezone', params={'value': value},
+        )
+
+
+@functools.cache
+def options_fragment():
+    """(html, etag) of the <option> list for the picker's <datalist>, built once per process."""
+    html = format_html_join('', '<option value="{}"></option>', ((name,) for name, _ in timezone_choices()))
+    return html, hashlib.md5(html.encode()).hexdigest()
+
+
+@functools.cache
+def _search_index():
+    return [(name.lower(), name) for name, _ in timezone_choices()]
+
+
+def search_timezones(query, limit=SEARCH_LIMIT):
+    """
+    Common zones matching `query` (case-insensitive, spaces match underscores):
+    zones where a part of the name starts with it first, e.g. "york" ->
+    America/New_York, then zones containing it anywhere.
+    """
+    needle = query.strip().lower().replace(' ', '_')
+    if not needle:
+        return []
+    prefix, substring = [], []
+    for lowered, name in _search_index():
+        if needle not in lowered:
+            continue
+        parts = lowered.replace('/', '_').split('_')
+        if lowered.startswith(needle) or any(part.startswith(needle) for part in parts):
+            prefix.append(name)
+        else:
+            substring.append(name)
+    return (prefix + substring)[:limit]
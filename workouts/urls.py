@@ -6,6 +6,7 @@ app_name = 'workouts'
 
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
+    path('calendar/', views.calendar_month_data_view, name='calendar_month_data'),
     # New URL for logging today (will redirect)
     path('log/today/', views.log_workout_today_redirect_view, name='log_workout_today'),
     # Updated URL to handle specific dates
@@ -13,12 +14,31 @@ urlpatterns = [
     path('log/remove/<str:date_str>/<int:item_index>/', views.remove_from_cart_view, name='remove_from_cart'),
     path('save/', views.save_workout_view, name='save_workout'),
     path('session/<int:session_id>/', views.workout_detail_view, name='workout_detail'),
+    path('session/<int:session_id>/repeat/', views.repeat_workout_view, name='repeat_workout'),
+    path('routines/', views.routines_view, name='routines'),
+    path('routines/new/', views.routine_edit_view, name='routine_create'),
+    path('routines/<int:routine_id>/edit/', views.routine_edit_view, name='routine_edit'),
+    path('routines/<int:routine_id>/delete/', views.routine_delete_view, name='routine_delete'),
+    path('routines/<int:routine_id>/start/', views.start_routine_view, name='start_routine'),
     path('log/delete/<int:log_id>/', views.delete_workout_log_view, name='delete_workout_log'),
     path('stats/exercise/<int:exercise_id>/', views.exercise_stats_view, name='exercise_stats'),
+    path('stats/exercise/<int:exercise_id>/data/', views.exercise_chart_data_view, name='exercise_chart_data'),
+    path('insights/', views.insights_view, name='insights'),
+    path('history/', views.history_view, name='history'),
+    path('search/', views.search_view, name='search'),
+    path('export/', views.export_workouts_view, name='export_workouts'),
+    path('jobs/<int:job_id>/', views.job_status_view, name='job_status'),
+    path('jobs/<int:job_id>/result/', views.job_result_view, name='job_result'),
+    path('coach/', views.coach_dashboard_view, name='coach_dashboard'),
+    path('coach/feed/', views.coach_feed_view, name='coach_feed'),
+    path('coach/feed/recent/', views.coach_feed_recent_view, name='coach_feed_recent'),
     path('report/monthly/', views.monthly_report_view, name='monthly_report'),
     path('report/monthly/<int:year>/<int:month>/', views.monthly_report_view, name='monthly_report_specific'),
     path('tools/health/', views.health_tools_view, name='health_tools'),
     path('profile/', views.profile_view, name='profile'),
+    path('timezones/', views.timezone_search_view, name='timezone_search'),
+    path('timezones/options/', views.timezone_options_view, name='timezone_options'),
+    path('exercises/<int:exercise_id>/suggestion/', views.exercise_suggestion_view, name='exercise_suggestion'),
     path('exercises/add/', views.add_custom_exercise_view, name='add_custom_exercise'),
     path('exercises/delete/<int:exercise_id>/', views.delete_custom_exercise_view, name='delete_custom_exercise'),
 
@@ -1,36 +1,61 @@
 # workouts/views.py
 
 # Standard Python imports
-import calendar
 import datetime
+import hashlib
 import json
-# Standard library imports
-import pytz
-import traceback
-from collections import defaultdict
-from decimal import Decimal
+import logging
+import os
+import zoneinfo
 
 # Django imports
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
-from django.db import IntegrityError
-from django.db.models import Count, Max, Q
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import (Count, Exists, ExpressionWrapper, F, FloatField, Max, OuterRef, Prefetch, ProtectedError,
+                              Q, Sum)
 from django.db.models.functions import TruncDate
-from django.http import HttpResponseNotAllowed, JsonResponse
+from django.http import (FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed,
+                         JsonResponse, StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import quote_etag
 
 
 # Local app imports (Ensure these paths are correct)
 # If using the simple signup, CustomUserCreationForm might not be needed here
 # from .forms import CustomUserCreationForm
 from .forms import UserProfileForm
-from .forms import CustomExerciseForm
-from .models import Exercise, WorkoutSession, WorkoutLog, UserProfile
+from .forms import CustomExerciseForm, RoutineForm, RoutineItemFormSet
+from .archive import archived_months, load_archived_month, restore_month_for_date
+from .calendar_cells import adjacent_months, build_month_calendar, month_payload
+from .coaching import ATHLETES_PER_PAGE, coach_dashboard_rows
+from .jobs import enqueue
+from .live_feed import POLL_INTERVAL_MS, event_stream, publish_workout_saved, recent_workouts
+from .metrics import CART_SIZE, REGISTRY as METRICS_REGISTRY, SAVE_BATCH_SIZE
+from .models import (BackgroundJob, Exercise, ExerciseDayRollup, ExercisePerformance, Routine, RoutineItem,
+                     WorkoutSession, WorkoutLog, UserProfile)
+from .recommendations import rebuild_performance_index, suggest_next, update_performance_index
+from .repeat import (PROGRESSION_CHOICES, PROGRESSION_SAME, add_items_to_cart, repeat_into_cart, repeat_into_session,
+                     save_items_to_session)
+from .exercise_usage import frequent_exercise_ids
+from .insights import data_version
+from .routines import invalidate_user_routines, routine_items, user_routines
+from .streaks import streak_summary, training_day_added, training_day_removed
+from .search import is_supported as search_is_supported, search_notes
+from .timezones import options_fragment, search_timezones
+
+logger = logging.getLogger(__name__)
 
 
 # --- Homepage View ---
@@ -64,37 +89,20 @@ def dashboard_view(request):
         year = current_month_date.year
         month = current_month_date.month
 
-    # Fetch sessions for the month that actually have logs
-    user_sessions = WorkoutSession.objects.filter(
-        user=request.user,
-        date__year=year,
-        date__month=month
-    ).annotate(
-        log_count=Count('logs')
-    ).filter(
-        log_count__gt=0
-    )
-    # Create a map for easy lookup in the template
-    sessions_map = {session.date: session for session in user_sessions}
+    # Per-cell links, titles and flags are precomputed (and cached per user and month)
+    calendar_weeks = build_month_calendar(request.user, year, month, timezone.localdate())
 
-    # Prepare calendar data
-    cal = calendar.Calendar(firstweekday=6)  # Sunday start
-    month_calendar_weeks = cal.monthdatescalendar(year, month)
+    # Previous/next month for the navigation links
+    prev_month_date, next_month_date = adjacent_months(year, month)
 
-    # Calculate previous/next month for navigation links
-    first_day_current_month = datetime.date(year, month, 1)
-    last_day_prev_month = first_day_current_month - datetime.timedelta(days=1)
-    prev_month_date = last_day_prev_month  # Use the actual date for linking year/month
-
-    if month == 12:
-        first_day_next_month = datetime.date(year + 1, 1, 1)
-    else:
-        first_day_next_month = datetime.date(year, month + 1, 1)
-    next_month_date = first_day_next_month  # Use the actual date for linking year/month
+    try:
+        profile = request.user.profile  # Fetched with the user (workouts.auth_backends): no extra query
+    except UserProfile.DoesNotExist:
+        profile = None
 
     context = {
-        'calendar_weeks': month_calendar_weeks,
-        'sessions_map': sessions_map,
+        'calendar_weeks': calendar_weeks,
+        'streak': streak_summary(profile, timezone.localdate()),
         'current_month_date': current_month_date,
         'prev_month_date': prev_month_date,
         'next_month_date': next_month_date,
@@ -103,6 +111,31 @@ def dashboard_view(request):
     return render(request, 'workouts/dashboard.html', context)
 
 
+@login_required
+def calendar_month_data_view(request):
+    """
+    JSON month summary for client-side calendar navigation (?year=&month=).
+    Served from the cached calendar cells, with an ETag so refetches are 304s.
+    """
+    try:
+        year, month = int(request.GET['year']), int(request.GET['month'])
+        current_year = timezone.now().year
+        if not (1 <= month <= 12 and current_year - 10 <= year <= current_year + 1):
+            raise ValueError
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Invalid year or month.'}, status=400)
+
+    body = json.dumps(month_payload(request.user, year, month, timezone.localdate()), separators=(',', ':'))
+    etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 # --- Redirect View for Logging Today ---
 @login_required
 def log_workout_today_redirect_view(request):
@@ -178,19 +211,19 @@ def log_workout_view(request, date_str):
                 if date_str not in cart:
                     cart[date_str] = []
                 cart[date_str].append(item_data)
+                CART_SIZE.observe(len(cart[date_str]))
                 request.session['workout_cart'] = cart
                 request.session.modified = True
                 form_valid = True  # Mark as successful
 
             except (ValueError, Exercise.DoesNotExist, KeyError) as e:
                 error_message = f"{e}"  # Use the specific exception message
-                print(f"Error adding item to cart for date {date_str}: {error_message}")  # Log error
+                logger.warning("Error adding item to cart for date %s: %s", date_str, error_message)
                 form_valid = False
             except Exception as e:
                 # Catch any other unexpected errors during item add process
                 error_message = "An unexpected server error occurred while adding the item."
-                print(f"Unexpected error adding item for date {date_str}: {e}")
-                traceback.print_exc()  # Print full traceback
+                logger.exception("Unexpected error adding item for date %s", date_str)
                 form_valid = False
 
             # --- Respond: AJAX or Full Reload ---
@@ -209,8 +242,7 @@ def log_workout_view(request, date_str):
                         return JsonResponse({'success': True, 'cart_html': html_fragment})
                     except Exception as e:
                         # Catch potential template rendering errors for AJAX
-                        print(f"Error rendering partial template for AJAX: {e}")
-                        traceback.print_exc()
+                        logger.exception("Error rendering partial template for AJAX")
                         return JsonResponse({'success': False, 'error': 'Error updating cart display.'}, status=500)
                 else:
                     # Return JSON error for AJAX request
@@ -298,6 +330,8 @@ def save_workout_view(request):
 
     # --- Save to Database ---
     try:
+        # Writes into an archived month bring that month back into the hot tables first
+        restore_month_for_date(request.user, session_date)
         # Use a transaction potentially? from django.db import transaction; with transaction.atomic():
         workout_session, created = WorkoutSession.objects.get_or_create(
             user=request.user,
@@ -307,6 +341,7 @@ def save_workout_view(request):
         if not created and request.POST.get('session_notes'):  # If session existed, update notes if new ones provided
             workout_session.notes = request.POST.get('session_notes', '')
             workout_session.save()
+        was_training_day = not created and workout_session.logs.exists()
 
         log_count = 0
         errors_during_log_creation = False
@@ -322,7 +357,7 @@ def save_workout_view(request):
                     reps_val = int(item.get('reps')) if item.get('reps') else None
                     weight_val = float(item.get('weight')) if item.get('weight') else None
                 except (ValueError, TypeError):
-                    print(f"Warning: Invalid data type for sets/reps/weight in item {item}. Skipping calculation.")
+                    logger.warning("Invalid sets/reps/weight in cart item %s; saving it without them", item)
                     sets_val, reps_val, weight_val = None, None, None  # Or handle as needed
 
                 WorkoutLog.objects.create(
@@ -341,10 +376,18 @@ def save_workout_view(request):
                 continue
             except (KeyError, Exception) as e:  # Catch other potential errors per item
                 messages.error(request, f"Error saving log for {item.get('exercise_name', 'Unknown')}: {e}")
-                print(f"Error processing log item {item}: {e}")
+                logger.exception("Error processing log item %s", item)
                 errors_during_log_creation = True
                 continue
 
+        # --- Keep the per-exercise "last performance" index current ---
+        SAVE_BATCH_SIZE.observe(log_count)
+        if log_count > 0:
+            update_performance_index(workout_session)
+            if not was_training_day:
+                training_day_added(request.user, session_date)
+            publish_workout_saved(request.user, workout_session, log_count)  # Live coach feed
+
         # --- Clean up session cart ---
         if date_to_save_str in request.session.get('workout_cart', {}):
             del request.session['workout_cart'][date_to_save_str]
@@ -363,8 +406,7 @@ def save_workout_view(request):
 
     except Exception as e:
         # Handle unexpected errors during session creation or the overall save process
-        print(f"Unexpected error during save_workout_view for date '{date_to_save_str}': {e}")
-        traceback.print_exc()
+        logger.exception("Unexpected error saving workout for date %r", date_to_save_str)
         messages.error(request, f"An unexpected error occurred while saving the workout. Please try again.")
         # Redirect back to the log page where the save was attempted
         return redirect('workouts:log_workout_date', date_str=date_to_save_str)
@@ -399,10 +441,168 @@ def workout_detail_view(request, session_id):
         'log_count': log_count,
         'heaviest_lift_weight': heaviest_lift_weight,
         'heaviest_lift_exercise_name': heaviest_lift_exercise_name,
+        'today_date_str': timezone.localdate().isoformat(),  # Default/max date for "repeat this workout"
+        'progression_choices': PROGRESSION_CHOICES,
     }
     return render(request, 'workouts/workout_detail.html', context)
 
 
+# --- Repeat Workout View ---
+@login_required
+def repeat_workout_view(request, session_id):
+    """
+    Repeats a saved session on another date (POST). `target` is 'cart'
+    (add its exercises to that day's cart for review) or 'session' (save
+    them straight into that day's session); `progression` picks the weight
+    rule (see repeat.PROGRESSION_CHOICES).
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    source = get_object_or_404(WorkoutSession, pk=session_id, user=request.user)
+
+    today = timezone.localdate()
+    date_str = request.POST.get('date') or today.isoformat()
+    try:
+        target_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        messages.error(request, f"Invalid date format provided: {date_str}")
+        return redirect('workouts:workout_detail', session_id=source.pk)
+    if target_date > today:
+        messages.error(request, "You cannot log workouts for future dates.")
+        return redirect('workouts:workout_detail', session_id=source.pk)
+    if target_date == source.date:
+        messages.error(request, "Pick a different date to repeat this workout on.")
+        return redirect('workouts:workout_detail', session_id=source.pk)
+
+    progression = request.POST.get('progression', PROGRESSION_SAME)
+    if progression not in dict(PROGRESSION_CHOICES):
+        progression = PROGRESSION_SAME
+    source_label = source.date.strftime('%B %d, %Y')
+
+    if request.POST.get('target') == 'session':
+        target, log_count = repeat_into_session(request.user, source, target_date, progression)
+        if not log_count:
+            messages.warning(request, f"The workout from {source_label} has no exercises to repeat.")
+            return redirect('workouts:workout_detail', session_id=source.pk)
+        messages.success(request, f"Repeated {log_count} exercise{'s' if log_count != 1 else ''} from {source_label}.")
+        return redirect('workouts:workout_detail', session_id=target.pk)
+
+    added = repeat_into_cart(request, source, target_date.isoformat(), progression)
+    if added:
+        messages.success(request, f"Added {added} exercise{'s' if added != 1 else ''} from {source_label} "
+                                  "to the workout. Review and save.")
+    else:
+        messages.warning(request, f"The workout from {source_label} has no exercises to repeat.")
+    return redirect('workouts:log_workout_date', date_str=target_date.isoformat())
+
+
+# --- Saved Routines ---
+@login_required
+def routines_view(request):
+    """Lists the user's saved routines (served from the per-user routine cache)."""
+    context = {
+        'routines': user_routines(request.user),
+        'today_date_str': timezone.localdate().isoformat(),
+    }
+    return render(request, 'workouts/routines.html', context)
+
+
+@login_required
+def routine_edit_view(request, routine_id=None):
+    """Creates a routine, or edits one, with its ordered items as an inline formset."""
+    if routine_id is None:
+        routine = Routine(user=request.user)
+    else:
+        routine = get_object_or_404(Routine, pk=routine_id, user=request.user)
+    exercise_choices = [('', '---------')] + list(
+        Exercise.objects.filter(Q(user=None) | Q(user=request.user)).order_by('name').values_list('id', 'name')
+    )
+    form_kwargs = {'user': request.user, 'exercise_choices': exercise_choices}
+
+    if request.method == 'POST':
+        form = RoutineForm(request.POST, instance=routine, user=request.user)
+        formset = RoutineItemFormSet(request.POST, instance=routine, form_kwargs=form_kwargs)
+        if form.is_valid() and formset.is_valid():
+            with transaction.atomic():
+                routine = form.save()
+                new_items, existing_items, deleted_ids = [], [], []
+                for item_form in formset.forms:
+                    item = item_form.instance
+                    if not item_form.cleaned_data:
+                        continue  # Untouched blank row
+                    if item_form.cleaned_data.get('DELETE'):
+                        if item.pk:
+                            deleted_ids.append(item.pk)
+                        continue
+                    item.routine = routine
+                    item.position = len(new_items) + len(existing_items)  # Order of the rows on the page
+                    (existing_items if item.pk else new_items).append(item)
+                RoutineItem.objects.filter(routine=routine, pk__in=deleted_ids).delete()
+                RoutineItem.objects.bulk_update(
+                    existing_items, ['exercise', 'target_sets', 'target_reps', 'target_weight', 'position'],
+                )
+                RoutineItem.objects.bulk_create(new_items)
+            invalidate_user_routines(request.user.pk)  # The bulk writes skip the signal handlers
+            messages.success(request, f"Routine '{routine.name}' saved.")
+            return redirect('workouts:routines')
+        messages.error(request, 'Please correct the errors below.')
+    else:
+        form = RoutineForm(instance=routine, user=request.user)
+        formset = RoutineItemFormSet(instance=routine, form_kwargs=form_kwargs)
+
+    context = {'form': form, 'formset': formset, 'routine': routine}
+    return render(request, 'workouts/routine_form.html', context)
+
+
+@login_required
+def routine_delete_view(request, routine_id):
+    """Deletes one of the user's routines (POST)."""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    routine = get_object_or_404(Routine, pk=routine_id, user=request.user)
+    routine.delete()
+    messages.success(request, f"Routine '{routine.name}' deleted.")
+    return redirect('workouts:routines')
+
+
+@login_required
+def start_routine_view(request, routine_id):
+    """
+    Starts a routine on a date (POST, `date` defaults to today): target=cart
+    adds its items to that day's cart, target=session saves them straight
+    into that day's session (one transaction, one bulk insert).
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    routine = get_object_or_404(Routine, pk=routine_id, user=request.user)
+
+    today = timezone.localdate()
+    date_str = request.POST.get('date') or today.isoformat()
+    try:
+        target_date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        messages.error(request, f"Invalid date format provided: {date_str}")
+        return redirect('workouts:routines')
+    if target_date > today:
+        messages.error(request, "You cannot log workouts for future dates.")
+        return redirect('workouts:routines')
+
+    items = routine_items(routine)
+    if not items:
+        messages.warning(request, f"Routine '{routine.name}' has no exercises yet.")
+        return redirect('workouts:routine_edit', routine_id=routine.pk)
+
+    if request.POST.get('target') == 'session':
+        target, log_count = save_items_to_session(request.user, target_date, items)
+        messages.success(request, f"Logged '{routine.name}' ({log_count} exercise{'s' if log_count != 1 else ''}).")
+        return redirect('workouts:workout_detail', session_id=target.pk)
+
+    added = add_items_to_cart(request, target_date.isoformat(), items)
+    messages.success(request, f"Added '{routine.name}' ({added} exercise{'s' if added != 1 else ''}) "
+                              "to the workout. Adjust and save.")
+    return redirect('workouts:log_workout_date', date_str=target_date.isoformat())
+
+
 # --- Signup View (Using Standard Django Form) ---
 def signup_view(request):
     """Handles user registration."""
@@ -437,17 +637,24 @@ def delete_workout_log_view(request, log_id):
 
     try:
         entry_name = log_entry.exercise.name  # Get name for message
+        exercise_id = log_entry.exercise_id
         log_entry.delete()
+        rebuild_performance_index(request.user, [exercise_id])  # History changed - refresh suggestions
+        if not WorkoutLog.objects.filter(session_id=session_id).exists():
+            training_day_removed(request.user, log_entry.session.date)
         messages.success(request, f"Workout entry '{entry_name}' deleted successfully.")
     except Exception as e:
         messages.error(request, f"Could not delete entry: {e}")
-        print(f"Error deleting WorkoutLog ID {log_id}: {e}")
+        logger.exception("Error deleting WorkoutLog %s", log_id)
 
     # Redirect back to the detail page of the session it belonged to
     return redirect('workouts:workout_detail', session_id=session_id)
 
 
 # --- User Profile View ---
+TIMEZONE_OPTIONS_MAX_AGE = 24 * 60 * 60
+
+
 @login_required
 def profile_view(request):
     """Displays and handles updates to the user's profile (e.g., timezone)."""
@@ -461,8 +668,8 @@ def profile_view(request):
             messages.success(request, 'Your profile has been updated.')
             # Activate the new timezone immediately for this request session
             try:
-                timezone.activate(pytz.timezone(saved_profile.timezone))
-            except pytz.UnknownTimeZoneError:
+                timezone.activate(zoneinfo.ZoneInfo(saved_profile.timezone))
+            except (zoneinfo.ZoneInfoNotFoundError, ValueError):
                 messages.warning(request, "Selected timezone is invalid, using default.")
                 timezone.deactivate()  # Revert to default if selected one fails
 
@@ -479,73 +686,440 @@ def profile_view(request):
     return render(request, 'workouts/profile.html', context)
 
 
+@login_required
+def timezone_options_view(request):
+    """The picker's full <option> list: rendered once per process, cached by the browser for a day."""
+    html, etag = options_fragment()
+    etag = quote_etag(etag)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = HttpResponse(html)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=TIMEZONE_OPTIONS_MAX_AGE)
+    return response
+
+
+@login_required
+def timezone_search_view(request):
+    """Typeahead for the picker: common zones matching ?q=, best matches first."""
+    return JsonResponse({'results': search_timezones(request.GET.get('q', ''))})
+
+
 # --- Exercise Stats View ---
+CHART_DEFAULT_POINTS = 300  # Default point budget per chart series
+CHART_MAX_POINTS = 2000
+
+
 @login_required
 def exercise_stats_view(request, exercise_id):
-    """Displays progress charts and PR for a specific exercise."""
+    """
+    Displays progress charts and PR for a specific exercise.
+    Chart points are fetched lazily from exercise_chart_data_view, so the page
+    itself only needs one aggregate query regardless of history length.
+    """
+    from .analytics import exercise_summary  # Imported on first use: see the analytics docstring
+
     exercise = get_object_or_404(Exercise, pk=exercise_id)
 
-    # Fetch logs with necessary data for charts and PR
-    all_logs = WorkoutLog.objects.filter(
-        session__user=request.user,
-        exercise=exercise,
-        weight__isnull=False  # Need weight for both PR and charts here
-        # Could relax this if charting something else like reps only
-    ).select_related('session').order_by('session__date')
-
-    # Process data for charts
-    daily_max_weight = {}
-    daily_volume = defaultdict(Decimal)  # Use defaultdict for easier aggregation
-
-    for log in all_logs:
-        # Ensure data needed for calculations is present for this log
-        if log.sets is not None and log.reps is not None and log.weight is not None:
-            log_date = log.session.date
-            log_date_str = log_date.strftime('%Y-%m-%d')
-
-            # Aggregate Max Weight
-            current_max = daily_max_weight.get(log_date_str, Decimal('-1'))  # Use -1 to handle 0 weight
-            if log.weight > current_max:
-                daily_max_weight[log_date_str] = log.weight
-
-            # Aggregate Volume
-            try:
-                volume = Decimal(log.sets) * Decimal(log.reps) * Decimal(log.weight)
-                daily_volume[log_date_str] += volume
-            except (TypeError, ValueError):
-                pass  # Ignore volume calculation for this log if data invalid
-
-    # Prepare data for Chart.js
-    # Use dates from max weight dict keys, ensuring consistency
-    chart_dates = sorted(daily_max_weight.keys())
-    chart_weights = [float(daily_max_weight[dt]) for dt in chart_dates]
-    # Get volume for the same sorted dates, defaulting to 0 if no volume was calculated
-    chart_volumes = [float(daily_volume.get(dt, Decimal('0.0'))) for dt in chart_dates]
-
-    has_data = bool(chart_dates)
-
-    # Calculate Personal Record (Max Weight)
-    personal_record = None
-    # Use the already filtered all_logs QuerySet if it contains all needed entries,
-    # otherwise, perform a separate aggregate query for clarity/correctness
-    pr_query = WorkoutLog.objects.filter(
+    summary = exercise_summary(request.user, exercise.pk)
+
+    context = {
+        'exercise': exercise,
+        'has_data': summary['last_date'] is not None,
+        'personal_record': summary['personal_record'],
+        'first_date_str': summary['first_date'].strftime('%Y-%m-%d') if summary['first_date'] else '',
+        'last_date_str': summary['last_date'].strftime('%Y-%m-%d') if summary['last_date'] else '',
+        'default_points': CHART_DEFAULT_POINTS,
+    }
+    return render(request, 'workouts/exercise_stats.html', context)
+
+
+# --- Exercise Chart Data API (AJAX) ---
+@login_required
+def exercise_chart_data_view(request, exercise_id):
+    """
+    Returns per-day max weight and volume for an exercise as JSON.
+    Optional GET params:
+      from / to  - inclusive date window (YYYY-MM-DD)
+      points     - point budget; each series is LTTB-downsampled to fit it
+    """
+    import numpy as np  # Only the chart data needs numpy; loaded on first call
+    from .analytics import downsample_series
+
+    exercise = get_object_or_404(Exercise, pk=exercise_id)
+
+    try:
+        date_from = datetime.datetime.strptime(request.GET['from'], '%Y-%m-%d').date() if request.GET.get('from') else None
+        date_to = datetime.datetime.strptime(request.GET['to'], '%Y-%m-%d').date() if request.GET.get('to') else None
+        points = int(request.GET.get('points', CHART_DEFAULT_POINTS))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid from/to date or points value.'}, status=400)
+    points = max(3, min(points, CHART_MAX_POINTS))
+
+    logs = WorkoutLog.objects.filter(
         session__user=request.user,
         exercise=exercise,
-        weight__isnull=False
-    ).aggregate(max_overall_weight=Max('weight'))
+        sets__isnull=False,
+        reps__isnull=False,
+        weight__isnull=False,
+    )
+    rollups = ExerciseDayRollup.objects.filter(user=request.user, exercise=exercise, max_weight__isnull=False)
+    if date_from:
+        logs = logs.filter(session__date__gte=date_from)
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to:
+        logs = logs.filter(session__date__lte=date_to)
+        rollups = rollups.filter(date__lte=date_to)
+
+    # Aggregate per training day in the database instead of looping over logs
+    daily_rows = logs.values_list('session__date').annotate(
+        max_weight=Max('weight'),
+        volume=Sum(ExpressionWrapper(F('sets') * F('reps') * F('weight'), output_field=FloatField())),
+    ).order_by('session__date')
+
+    # Archived days come pre-aggregated; a day is either archived or hot, never both
+    rows = sorted(list(rollups.values_list('date', 'max_weight', 'volume')) + list(daily_rows))
+    if rows:
+        dates, max_weights, volumes = zip(*rows)
+        dates = np.array(dates, dtype='datetime64[D]')
+        max_weights = np.array(max_weights, dtype=np.float64)
+        volumes = np.array(volumes, dtype=np.float64)
+    else:
+        dates = np.array([], dtype='datetime64[D]')
+        max_weights = volumes = np.array([], dtype=np.float64)
+
+    weight_dates, weight_values = downsample_series(dates, max_weights, points)
+    volume_dates, volume_values = downsample_series(dates, volumes, points)
+
+    return JsonResponse({
+        'success': True,
+        'total_points': len(dates),
+        'weight': {
+            'dates': np.datetime_as_string(weight_dates).tolist(),
+            'values': np.round(weight_values, 2).tolist(),
+        },
+        'volume': {
+            'dates': np.datetime_as_string(volume_dates).tolist(),
+            'values': np.round(volume_values, 2).tolist(),
+        },
+    })
+
+
+# --- Exercise Suggestion API (AJAX) ---
+@login_required
+def exercise_suggestion_view(request, exercise_id):
+    """
+    Returns the suggested next sets/reps/weight for an exercise as JSON.
+    Served from the ExercisePerformance index - a single indexed row lookup.
+    """
+    performance = ExercisePerformance.objects.filter(
+        user=request.user, exercise_id=exercise_id
+    ).first()
+    suggestion = suggest_next(performance)
+
+    if suggestion is None:
+        return JsonResponse({'success': True, 'suggestion': None})
+
+    return JsonResponse({
+        'success': True,
+        'suggestion': {
+            'sets': suggestion['sets'],
+            'reps': suggestion['reps'],
+            'weight': str(suggestion['weight']) if suggestion['weight'] is not None else None,
+            'is_pr_attempt': suggestion['is_pr_attempt'],
+            'reason': suggestion['reason'],
+        },
+        'last': {
+            'date': performance.last_date.strftime('%Y-%m-%d'),
+            'sets': performance.last_sets,
+            'reps': performance.last_reps,
+            'weight': str(performance.last_weight) if performance.last_weight is not None else None,
+        },
+        'personal_record': str(performance.best_weight) if performance.best_weight is not None else None,
+    })
+
+
+# --- Insights (Training Load Analytics) View ---
+@login_required
+def insights_view(request):
+    """
+    Displays rolling volume, workload ratio, intensity zones and e1RM trends.
+    The numbers are computed by the 'compute_insights' background job; this
+    view only reads the latest result and enqueues a refresh when it is stale.
+    """
+    today = timezone.now().date()
+    job = BackgroundJob.objects.filter(
+        user=request.user, task='compute_insights', status=BackgroundJob.STATUS_SUCCEEDED
+    ).order_by('-finished_at').first()
+
+    # Stale if computed on an earlier day or from an older version of the user's data
+    version = data_version(request.user.pk)
+    is_stale = (
+        job is None
+        or job.created_at.date() != today
+        or job.payload.get('data_version') != version
+    )
+    pending_job = None
+    if is_stale:
+        pending_job = enqueue('compute_insights', user=request.user,
+                              payload={'user_id': request.user.id, 'data_version': version}, dedupe=True)
+        if pending_job.status == BackgroundJob.STATUS_SUCCEEDED:  # Ran eagerly
+            job, pending_job = pending_job, None
+
+    if job is None:
+        # First visit: nothing computed yet - the page polls until the job finishes
+        return render(request, 'workouts/insights.html', {'pending_job': pending_job, 'computing': True})
 
-    if pr_query and pr_query['max_overall_weight'] is not None:
-        personal_record = pr_query['max_overall_weight']
+    insights = job.result
+    for row in insights['exercises']:
+        row['last_date'] = datetime.date.fromisoformat(row['last_date'])
 
     context = {
-        'exercise': exercise,
-        'dates_json': json.dumps(chart_dates),
-        'weights_json': json.dumps(chart_weights),
-        'volumes_json': json.dumps(chart_volumes),
-        'has_data': has_data,
-        'personal_record': personal_record,
+        'pending_job': pending_job,  # Set while a fresher result is being computed
+        'computed_at': job.finished_at,
+        'has_data': insights['log_count'] > 0,
+        'log_count': insights['log_count'],
+        'latest_acwr': insights['latest_acwr'],
+        'latest_rolling_volume': insights['latest_rolling_volume'],
+        'intensity_distribution': insights['intensity_distribution'],
+        'exercise_rows': insights['exercises'],
+        'days_json': json.dumps(insights['days']),
+        'rolling_volume_json': json.dumps(insights['rolling_volume']),
+        'acwr_json': json.dumps(insights['acwr']),
+        'e1rm_trends': insights['e1rm_trends'],  # Rendered with json_script (contains exercise names)
     }
-    return render(request, 'workouts/exercise_stats.html', context)
+    return render(request, 'workouts/insights.html', context)
+
+
+# --- Workout History View (keyset pagination, infinite scroll) ---
+HISTORY_PAGE_SIZE = 20
+
+
+def _parse_history_cursor(cursor):
+    """Decodes a 'YYYY-MM-DD_id' cursor into (date, id); raises ValueError if malformed."""
+    date_str, session_id = cursor.split('_', 1)
+    return datetime.datetime.strptime(date_str, '%Y-%m-%d').date(), int(session_id)
+
+
+@login_required
+def history_view(request):
+    """
+    Reverse-chronological workout history. Pages are addressed by a
+    (date, id) cursor instead of an offset, so every page costs the same
+    two queries (sessions + one logs prefetch) however deep the user scrolls.
+
+    GET params:
+      after   - cursor of the last session already shown
+      format  - 'json' for a data-only page
+    AJAX requests get the rendered page fragment as JSON for infinite scroll.
+    """
+    sessions = WorkoutSession.objects.filter(
+        user=request.user,
+    ).filter(
+        Exists(WorkoutLog.objects.filter(session=OuterRef('pk')))  # Same rule as the calendar
+    )
+
+    cursor = request.GET.get('after')
+    if cursor:
+        try:
+            cursor_date, cursor_id = _parse_history_cursor(cursor)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid cursor.'}, status=400)
+        sessions = sessions.filter(Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id))
+
+    # Fetch one extra row to learn whether another page exists without a COUNT
+    page = list(
+        sessions.order_by('-date', '-id').prefetch_related(
+            Prefetch('logs', queryset=WorkoutLog.objects.select_related('exercise').order_by('id'), to_attr='log_list')
+        )[:HISTORY_PAGE_SIZE + 1]
+    )
+    has_more = len(page) > HISTORY_PAGE_SIZE
+    page = page[:HISTORY_PAGE_SIZE]
+    next_cursor = f"{page[-1].date:%Y-%m-%d}_{page[-1].id}" if has_more else None
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'success': True,
+            'next_cursor': next_cursor,
+            'sessions': [
+                {
+                    'id': session.id,
+                    'date': session.date.strftime('%Y-%m-%d'),
+                    'notes': session.notes or '',
+                    'logs': [
+                        {
+                            'exercise': log.exercise.name,
+                            'sets': log.sets,
+                            'reps': log.reps,
+                            'weight': float(log.weight) if log.weight is not None else None,
+                            'notes': log.notes or '',
+                        }
+                        for log in session.log_list
+                    ],
+                }
+                for session in page
+            ],
+        })
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        html_fragment = render_to_string('workouts/partials/history_page.html', {'sessions': page}, request=request)
+        return JsonResponse({'success': True, 'history_html': html_fragment, 'next_cursor': next_cursor})
+
+    context = {
+        'sessions': page,
+        'next_cursor': next_cursor,
+        'has_archive': bool(archived_months(request.user)),
+    }
+    return render(request, 'workouts/history.html', context)
+
+
+# --- Notes Search View ---
+SEARCH_RESULTS_PER_PAGE = 20
+
+
+@login_required
+def search_view(request):
+    """Full-text search over the user's session and exercise notes (ranked, highlighted, paginated)."""
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query and search_is_supported():
+        paginator = Paginator(search_notes(request.user, query), SEARCH_RESULTS_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('page'))
+        archived = archived_months(request.user)
+        for result in page_obj:
+            # Archived sessions are shown in their monthly report instead of the detail page
+            result['is_archived'] = (result['date'].year, result['date'].month) in archived
+
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'search_available': search_is_supported(),
+    }
+    return render(request, 'workouts/search.html', context)
+
+
+# --- Metrics Endpoint ---
+def metrics_view(request):
+    """Prometheus scrape target; only reachable from METRICS_ALLOWED_IPS or by staff."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(METRICS_REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# --- Workout Export View ---
+@login_required
+def export_workouts_view(request):
+    """Queues a CSV export of the user's workout history (POST only)."""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    job = enqueue('export_workouts_csv', user=request.user, payload={'user_id': request.user.id}, dedupe=True)
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'success': True,
+            'job_id': job.id,
+            'status_url': reverse('workouts:job_status', kwargs={'job_id': job.id}),
+            'result_url': reverse('workouts:job_result', kwargs={'job_id': job.id}),
+        })
+    messages.info(request, "Your export is being prepared. It will be ready to download shortly.")
+    return redirect('workouts:profile')
+
+
+# --- Background Job Status / Result Views (AJAX) ---
+@login_required
+def job_status_view(request, job_id):
+    """Returns the status and progress of one of the user's background jobs."""
+    job = get_object_or_404(BackgroundJob, pk=job_id, user=request.user)
+    return JsonResponse({
+        'success': True,
+        'job': {
+            'id': job.id,
+            'task': job.task,
+            'status': job.status,
+            'progress': job.progress,
+            'attempts': job.attempts,
+            'error': "The job failed. Please try again later." if job.status == BackgroundJob.STATUS_FAILED else None,
+            'result_url': reverse('workouts:job_result', kwargs={'job_id': job.id})
+            if job.status == BackgroundJob.STATUS_SUCCEEDED else None,
+        },
+    })
+
+
+@login_required
+def job_result_view(request, job_id):
+    """Returns a finished job's result: a file download for exports, JSON otherwise."""
+    job = get_object_or_404(BackgroundJob, pk=job_id, user=request.user)
+    if job.status != BackgroundJob.STATUS_SUCCEEDED:
+        return JsonResponse({'success': False, 'error': f"Job is {job.status}."}, status=409)  # Conflict
+
+    if job.task == 'export_workouts_csv':
+        exports_root = os.path.realpath(settings.EXPORTS_ROOT)
+        path = os.path.realpath(os.path.join(exports_root, job.result['filename']))
+        if not path.startswith(exports_root + os.sep) or not os.path.exists(path):
+            raise Http404("Export file is no longer available.")
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename='workouts.csv', content_type='text/csv')
+
+    return JsonResponse({'success': True, 'result': job.result})
+
+
+# --- Coach Dashboard View ---
+@login_required
+def coach_dashboard_view(request):
+    """Displays a paginated overview of every athlete the logged-in coach manages."""
+    profile, created = UserProfile.objects.get_or_create(user=request.user)
+    if not profile.is_coach:
+        messages.error(request, "The coach dashboard is only available to coaches.")
+        return redirect('workouts:dashboard')
+
+    athletes = User.objects.filter(coaches__coach=request.user).order_by('username').values_list('id', 'username')
+    paginator = Paginator(athletes, ATHLETES_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    today = timezone.now().date()
+    context = {
+        'page_obj': page_obj,
+        'athlete_rows': coach_dashboard_rows(request.user, list(page_obj.object_list), today),
+        'total_athletes': paginator.count,
+    }
+    return render(request, 'workouts/coach_dashboard.html', context)
+
+
+# --- Live Coach Feed (Server-Sent Events, ASGI only) ---
+@login_required
+async def coach_feed_view(request):
+    """
+    Streams 'workout_saved' events for the coach's athletes as they happen.
+    Async so each idle connection is a parked coroutine rather than a worker
+    thread. Under WSGI the stream would hold a worker thread forever, so it
+    answers 204 instead (EventSource then stops reconnecting) and the
+    dashboard polls coach_feed_recent_view.
+    """
+    user = await request.auser()
+    if not await UserProfile.objects.filter(user=user, is_coach=True).aexists():
+        return HttpResponseForbidden("The live feed is only available to coaches.")
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(event_stream(user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop reverse proxies from buffering the stream
+    return response
+
+
+@login_required
+def coach_feed_recent_view(request):
+    """Polling fallback for the live feed: workouts created since ?since= (the `now` of the previous poll)."""
+    if not UserProfile.objects.filter(user=request.user, is_coach=True).exists():
+        return HttpResponseForbidden("The live feed is only available to coaches.")
+    now = timezone.now()
+    try:
+        since = parse_datetime(request.GET.get('since', ''))
+    except ValueError:
+        since = None
+    events = recent_workouts(request.user.pk, since) if since is not None else []
+    return JsonResponse({'now': now.isoformat(), 'events': events, 'interval_ms': POLL_INTERVAL_MS})
 
 
 # --- Monthly Report View ---
@@ -605,17 +1179,24 @@ def monthly_report_view(request, year=None, month=None):
 
     # --- Fetch Data ---
     try:
-        sessions_in_month = WorkoutSession.objects.filter(
+        sessions_in_month = list(WorkoutSession.objects.filter(
             user=request.user,
             date__gte=start_date,
             date__lt=end_date
         ).prefetch_related(  # Use prefetch_related for efficiency
-            'logs', 'logs__exercise'
-        ).order_by('date')
-        total_workout_days = sessions_in_month.count()  # Get count efficiently
+            Prefetch('logs', queryset=WorkoutLog.objects.select_related('exercise').order_by('id'), to_attr='log_list')
+        ).order_by('date'))
+        # Archived months are read through from the compressed archive (cached)
+        hot_dates = {session.date for session in sessions_in_month}
+        archived_sessions = [
+            session for session in load_archived_month(request.user, year, month) if session.date not in hot_dates
+        ]
+        if archived_sessions:
+            sessions_in_month = sorted(sessions_in_month + archived_sessions, key=lambda session: session.date)
+        total_workout_days = len(sessions_in_month)
     except Exception as e:
         messages.error(request, f"Error fetching report data: {e}")
-        sessions_in_month = WorkoutSession.objects.none()
+        sessions_in_month = []
         total_workout_days = 0
 
     # --- Prepare Context ---
@@ -676,7 +1257,7 @@ def remove_from_cart_view(request, date_str, item_index):
         if 0 <= item_index < len(items_for_date):
             # Remove the item at the specified index
             removed_item = items_for_date.pop(item_index)
-            print(f"Removed item: {removed_item.get('exercise_name', 'Unknown')}")  # Logging
+            logger.debug("Removed cart item %s", removed_item.get('exercise_name', 'Unknown'))
 
             # Update the session
             if not items_for_date:  # If list is now empty, remove the date key
@@ -697,18 +1278,17 @@ def remove_from_cart_view(request, date_str, item_index):
 
         else:  # Index out of bounds
             error_message = "Invalid item index specified."
-            print(f"Error removing item: {error_message} Index: {item_index}, List length: {len(items_for_date)}")
+            logger.warning("Cart item index %s out of range (%s items)", item_index, len(items_for_date))
             return JsonResponse({'success': False, 'error': error_message}, status=400)  # Bad Request
 
     except KeyError:  # Date string not found in cart (shouldn't happen if called correctly)
         error_message = "Workout date not found in cart."
-        print(f"Error removing item: {error_message} Date: {date_str}")
+        logger.warning("Cart has no items for date %s", date_str)
         return JsonResponse({'success': False, 'error': error_message}, status=404)  # Not Found
     except Exception as e:
         # Catch unexpected errors
         error_message = "An unexpected error occurred while removing the item."
-        print(f"Unexpected error removing item: {e}")
-        traceback.print_exc()
+        logger.exception("Unexpected error removing cart item")
         return JsonResponse({'success': False, 'error': error_message}, status=500)  # Internal Server Error
 
 
@@ -740,8 +1320,7 @@ def add_custom_exercise_view(request):
             except Exception as e:
                 # Catch other potential saving errors
                 messages.error(request, f"An unexpected error occurred while saving: {e}")
-                print(f"Error saving custom exercise for user {request.user.id}: {e}")
-                traceback.print_exc() # Log the full traceback
+                logger.exception("Error saving custom exercise")
                 # Let the view fall through to render the form again
     else:
         # GET request: Display a blank form
@@ -758,6 +1337,9 @@ def add_custom_exercise_view(request):
     return render(request, 'workouts/add_custom_exercise.html', context)
 
 
+RECENT_SESSIONS_TO_REPEAT = 8
+
+
 @login_required
 def log_workout_view(request, date_str):
     """
@@ -821,18 +1403,18 @@ def log_workout_view(request, date_str):
                 cart = request.session.get('workout_cart', {})
                 if date_str not in cart: cart[date_str] = []
                 cart[date_str].append(item_data)
+                CART_SIZE.observe(len(cart[date_str]))
                 request.session['workout_cart'] = cart
                 request.session.modified = True
                 form_valid = True
 
             except (ValueError, Exercise.DoesNotExist, KeyError) as e:
                 error_message = f"{e}"
-                print(f"Error adding item to cart for date {date_str}: {error_message}")
+                logger.warning("Error adding item to cart for date %s: %s", date_str, error_message)
                 form_valid = False
             except Exception as e:
                 error_message = "An unexpected server error occurred while adding the item."
-                print(f"Unexpected error adding item for date {date_str}: {e}")
-                traceback.print_exc()
+                logger.exception("Unexpected error adding item for date %s", date_str)
                 form_valid = False
 
             # Respond: AJAX or Full Reload
@@ -845,8 +1427,7 @@ def log_workout_view(request, date_str):
                         html_fragment = render_to_string('workouts/partials/cart_items_list.html', context_for_partial)
                         return JsonResponse({'success': True, 'cart_html': html_fragment})
                     except Exception as e:
-                         print(f"Error rendering partial template for AJAX: {e}")
-                         traceback.print_exc()
+                         logger.exception("Error rendering partial template for AJAX")
                          return JsonResponse({'success': False, 'error': 'Error updating cart display.'}, status=500)
                 else:
                     return JsonResponse({'success': False, 'error': error_message}, status=400)
@@ -881,11 +1462,25 @@ def log_workout_view(request, date_str):
         cart = request.session.get('workout_cart', {})
         cart_items_for_date = cart.get(date_str, [])
 
+        # The user's most used exercises are listed first in the picker (ranks cached per user)
+        frequent_ranks = {exercise_id: rank for rank, exercise_id in enumerate(frequent_exercise_ids(request.user))}
+        available_exercises = list(available_exercises)
+        for exercise in available_exercises:
+            exercise.frequent_rank = frequent_ranks.get(exercise.id)
+
+        # Recent sessions offered by "Repeat a previous workout"
+        recent_sessions = WorkoutSession.objects.filter(user=request.user).exclude(date=view_date).annotate(
+            log_count=Count('logs')).filter(log_count__gt=0).order_by('-date')[:RECENT_SESSIONS_TO_REPEAT]
+
         # --- Construct Context for GET request ---
         # 'view_date' and 'today' are now guaranteed to be defined here
         context = {
             'available_exercises': available_exercises,
+            'has_frequent_exercises': bool(frequent_ranks),
             'cart_items': cart_items_for_date,
+            'recent_sessions': recent_sessions,
+            'routines': user_routines(request.user),  # Cached per user
+            'progression_choices': PROGRESSION_CHOICES,
             'view_date': view_date, # Use the validated date object
             'view_date_str': date_str, # Keep the original string too if needed
             'today_date_str': today.strftime('%Y-%m-%d'), # Use today defined at the start
@@ -913,9 +1508,19 @@ def delete_custom_exercise_view(request, exercise_id):
         exercise_name = exercise_to_delete.name # Get name for message
         exercise_to_delete.delete()
         messages.success(request, f"Custom exercise '{exercise_name}' deleted successfully.")
+    except ProtectedError as e:
+        # Routine items and logged history (live or archived) protect the exercise
+        routine_names = sorted({obj.routine.name for obj in e.protected_objects if isinstance(obj, RoutineItem)})
+        uses = []
+        if routine_names:
+            uses.append("routine" + ("s " if len(routine_names) > 1 else " ")
+                        + ", ".join(f"'{name}'" for name in routine_names))
+        if any(not isinstance(obj, RoutineItem) for obj in e.protected_objects):
+            uses.append("your logged workouts")
+        messages.error(request, f"Cannot delete '{exercise_to_delete.name}': it is still used in {' and '.join(uses)}.")
     except Exception as e:
         messages.error(request, f"Could not delete custom exercise: {e}")
-        print(f"Error deleting custom Exercise ID {exercise_id} for user {request.user.id}: {e}")
+        logger.exception("Error deleting custom Exercise %s", exercise_id)
 
     # Redirect back to the page where they manage custom exercises
     return redirect('workouts:add_custom_exercise')
\ No newline at end of file